@@ -0,0 +1,1069 @@
+import os
+import sys
+import csv
+import time
+import gc
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+src_dir = os.path.join(proj_dir, 'src')
+sys.path.extend([proj_dir, src_dir])
+
+import numpy as np
+import torch
+from tqdm import tqdm
+os.environ["HF_HOME"] = os.path.expanduser("~/.cache/huggingface")
+
+from src.audioldm import AudioLDM as ldm
+from src.utilities.data.dataprocessor import AudioDataProcessor as prcssr
+from evaluation.evaluate_audiocaps import calculate_sisdr
+
+
+# --------------------------------------------------------------------------------------------- #
+
+def sync(device):
+    if torch.device(device).type == 'cuda':
+        torch.cuda.synchronize(device)
+
+def timeit(fn, device, warmup=1, repeat=3):  # -> (mean sec, last output)
+    out = None
+    for _ in range(warmup):
+        out = fn()
+    sync(device)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        out = fn()
+    sync(device)
+    return (time.perf_counter() - start) / max(repeat, 1), out
+
+def load_audiocaps_items(processor, num_items, audio_dir='evaluation/data/audiocaps'):  # -> list of (caption, mel_mix, wav_src)
+    with open('evaluation/metadata/audiocaps_eval.csv') as csv_file:
+        eval_list = [row for row in csv.reader(csv_file, delimiter=',')][1:]
+    items = []
+    for idx, caption, labels, _, _ in eval_list[:num_items]:
+        _, _, _, wav_src, _ = processor.read_audio_file(os.path.join(audio_dir, f'segment-{idx}.wav'))
+        mel_mix, _, _, _, _ = processor.read_audio_file(os.path.join(audio_dir, f'mixture-{idx}.wav'))
+        items.append((caption, mel_mix, wav_src.squeeze(0).cpu().numpy()))
+    return items
+
+def sisdr_to(ref, est):
+    ref = np.asarray(ref, dtype=np.float64).reshape(-1)
+    est = np.asarray(est, dtype=np.float64).reshape(-1)
+    n = min(len(ref), len(est))
+    return float(calculate_sisdr(ref[:n], est[:n]))
+
+def free(aldm):
+    del aldm
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+# --------------------------------------------------------------------------------------------- #
+
+def bench_precision(config):
+    r"""precision policy별 edit 속도 및 fp32 대비 SI-SDR drift.
+    - sisdr_src: 원본 source 대비 SI-SDR (분리 성능)
+    - drift: sisdr_src(policy) - sisdr_src(fp32)
+    - agree: fp32 출력 대비 SI-SDR (동일 seed에서 출력이 얼마나 같은지)
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    edit_kwargs = dict(duration=10.24, batch_size=1, transfer_strength=config['transfer_strength'],
+                       guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], return_type="np")
+
+    results, reference = {}, None
+    for policy in config['policies']:
+        aldm = ldm(device, precision=policy)
+        times, outputs = [], []
+        for caption, mel_mix, _ in tqdm(items, desc=policy):
+            def run():
+                torch.manual_seed(config['seed'])
+                return aldm.edit_audio_with_ddim(mel=mel_mix.to(device), text=caption, **edit_kwargs)
+            sec, wav = timeit(run, device, warmup=config['warmup'], repeat=config['repeat'])
+            times.append(sec); outputs.append(wav)
+        free(aldm)
+
+        sisdr_src = [sisdr_to(wav_src, out) for (_, _, wav_src), out in zip(items, outputs)]
+        if reference is None:
+            reference = (outputs, sisdr_src)
+        results[policy] = {
+            'sec/edit': float(np.mean(times)),
+            'sisdr_src': float(np.mean(sisdr_src)),
+            'drift': float(np.mean(sisdr_src) - np.mean(reference[1])),
+            'agree': float(np.mean([sisdr_to(r, o) for r, o in zip(reference[0], outputs)])),
+        }
+
+    print(f"{'policy':>10} | {'sec/edit':>9} | {'SI-SDR':>7} | {'drift':>7} | {'agree':>7}")
+    for policy, r in results.items():
+        print(f"{policy:>10} | {r['sec/edit']:9.3f} | {r['sisdr_src']:7.2f} | {r['drift']:+7.2f} | {r['agree']:7.2f}")
+    return results
+
+def bench_startup(config):
+    r"""eager 로드 vs lazy 로드의 startup 시간.
+    - vocoder only: mel -> waveform 복원 스크립트
+    - text only: prompt embedding precompute 스크립트
+    """
+    device = config['device']
+    workflows = {
+        'eager (all)': (False, lambda aldm: None),
+        'lazy (vocoder only)': (True, lambda aldm: aldm.mel_to_waveform(torch.zeros(1, 1, 1024, 64, device=device))),
+        'lazy (text only)': (True, lambda aldm: aldm.encode_prompt(["A cat meowing"], do_cfg=True)),
+        'lazy (all)': (True, lambda aldm: [aldm.load_component(name) for name in ['vae', 'text_encoder', 'unet', 'vocoder']]),
+    }
+    results = {}
+    for name, (lazy, workflow) in workflows.items():
+        start = time.perf_counter()
+        aldm = ldm(device, lazy=lazy, use_safetensors=config['use_safetensors'])
+        with torch.no_grad():
+            workflow(aldm)
+        sync(device)
+        results[name] = time.perf_counter() - start
+        print(f"--- {name}: {results[name]:.2f}s")
+        aldm.startup_report()
+        free(aldm)
+    return results
+
+def bench_guidance_interval(config):
+    r"""CFG를 일부 step에만 적용했을 때 UNet evaluation 절감량 vs SI-SDR (AudioCaps eval subset).
+    첫 setting (full CFG)이 기준.
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    aldm = ldm(device, precision=config['precision'])
+
+    results = {}
+    for name, (interval, every) in config['settings'].items():
+        stats, sisdrs, start = {}, [], time.perf_counter()
+        for caption, mel_mix, wav_src in tqdm(items, desc=name):
+            torch.manual_seed(config['seed'])
+            wav = aldm.edit_audio_with_ddim(
+                mel=mel_mix.to(device), text=caption, duration=10.24, batch_size=1,
+                transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                ddim_steps=config['ddim_steps'], return_type="np",
+                guidance_interval=interval, guidance_every=every, stats=stats,
+            )
+            sisdrs.append(sisdr_to(wav_src, wav))
+        sync(device)
+        results[name] = {'unet_evals': stats['unet_evals'], 'sisdr': float(np.mean(sisdrs)),
+                         'sec/item': (time.perf_counter() - start) / len(items)}
+
+    base = next(iter(results.values()))
+    print(f"{'setting':>16} | {'UNet evals':>10} | {'saved':>6} | {'sec/item':>8} | {'SI-SDR':>7} | {'delta':>7}")
+    for name, r in results.items():
+        saved = 1 - r['unet_evals'] / base['unet_evals']
+        print(f"{name:>16} | {r['unet_evals']:10d} | {saved:6.1%} | {r['sec/item']:8.2f} | {r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f}")
+    return results
+
+def bench_solver(config):
+    r"""solver / step 수별 edit 속도 vs SI-SDR (AudioCaps eval subset).
+    첫 setting (200 step DDIM)이 기준.
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    aldm = ldm(device, precision=config['precision'])
+
+    results = {}
+    for name, (solver, steps) in config['settings'].items():
+        stats, sisdrs, start = {}, [], time.perf_counter()
+        for caption, mel_mix, wav_src in tqdm(items, desc=name):
+            torch.manual_seed(config['seed'])
+            wav = aldm.edit_audio_with_ddim(
+                mel=mel_mix.to(device), text=caption, duration=10.24, batch_size=1,
+                transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                ddim_steps=steps, return_type="np", solver=solver, stats=stats,
+            )
+            sisdrs.append(sisdr_to(wav_src, wav))
+        sync(device)
+        results[name] = {'unet_evals': stats['unet_evals'], 'sisdr': float(np.mean(sisdrs)),
+                         'sec/item': (time.perf_counter() - start) / len(items)}
+
+    base = next(iter(results.values()))
+    print(f"{'setting':>16} | {'UNet evals':>10} | {'sec/item':>8} | {'speedup':>7} | {'SI-SDR':>7} | {'delta':>7}")
+    for name, r in results.items():
+        print(f"{name:>16} | {r['unet_evals']:10d} | {r['sec/item']:8.2f} | {base['sec/item'] / r['sec/item']:6.1f}x | {r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f}")
+    return results
+
+def bench_vocoder(config):
+    r"""mel_to_waveform: 한 번에 vs chunk + crossfade. 속도, peak memory, 한 번에 돌린 결과 대비 SI-SDR.
+    첫 setting이 기준.
+    """
+    device = config['device']
+    aldm = ldm(device, precision=config['precision'])
+    torch.manual_seed(config['seed'])
+    mel = torch.randn(config['batch_size'], 1, config['num_frames'], 64, device=device) - 5.0  # log-mel 대략의 범위
+
+    results, reference = {}, None
+    for name, (chunk_frames, overlap_frames, max_batch) in config['settings'].items():
+        if torch.device(device).type == 'cuda':
+            torch.cuda.reset_peak_memory_stats(device)
+        with torch.no_grad():
+            sec, wav = timeit(lambda: aldm.mel_to_waveform(mel, chunk_frames, overlap_frames, max_batch, to_host=False),
+                              device, warmup=config['warmup'], repeat=config['repeat'])
+        peak = torch.cuda.max_memory_allocated(device) / 2**20 if torch.device(device).type == 'cuda' else float('nan')
+        wav = wav.cpu().numpy()
+        if reference is None:
+            reference = wav
+        results[name] = {'sec': sec, 'peak_mb': peak,
+                         'agree': float(np.mean([sisdr_to(r, w) for r, w in zip(reference, wav)]))}
+
+    print(f"{'setting':>20} | {'sec':>7} | {'peak MB':>8} | {'agree':>7}")
+    for name, r in results.items():
+        print(f"{name:>20} | {r['sec']:7.3f} | {r['peak_mb']:8.0f} | {r['agree']:7.2f}")
+    return results
+
+def bench_compile(config):
+    r"""eager vs compiled (enable_compile): 호출 경로별 1회성 compile 비용과 steady-state 시간.
+    - UNet step: [2B,8,256,16] (CFG batch), VAE decode: [B,8,256,16], vocoder: [B,1024,64]
+    """
+    device = config['device']
+    torch.set_num_threads(config['num_threads'])
+    aldm = ldm(device, precision=config['precision'])
+    B = config['batch_size']
+    latents = torch.randn(B, 8, 256, 16, device=device)
+    embeds = aldm.encode_prompt(["A cat meowing"] * B, do_cfg=True)
+    t = torch.tensor(500, device=device)
+    mel = torch.randn(B, 1, 1024, 64, device=device) - 5.0
+    workloads = {
+        'unet step': lambda: aldm._predict_noise(torch.cat([latents] * 2), t, embeds),
+        'vae decode': lambda: aldm.decode_latents(latents),
+        'vocoder': lambda: aldm.mel_to_waveform(mel, to_host=False),
+    }
+
+    results = {}
+    with torch.no_grad():
+        for name, fn in workloads.items():
+            aldm.disable_compile()
+            eager, _ = timeit(fn, device, warmup=1, repeat=config['repeat'])
+            aldm.enable_compile(mode=config['mode'])
+            first, _ = timeit(fn, device, warmup=0, repeat=1)  # compile 포함
+            compiled, _ = timeit(fn, device, warmup=0, repeat=config['repeat'])
+            results[name] = {'eager': eager, 'compile': first - compiled, 'compiled': compiled}
+    aldm.compile_report()
+
+    print(f"{'workload':>12} | {'eager s':>8} | {'compiled s':>10} | {'speedup':>7} | {'compile s':>9} | {'break-even':>10}")
+    for name, r in results.items():
+        gain = r['eager'] - r['compiled']
+        break_even = f"{r['compile'] / gain:10.0f}" if gain > 0 else f"{'-':>10}"
+        print(f"{name:>12} | {r['eager']:8.3f} | {r['compiled']:10.3f} | {r['eager'] / r['compiled']:6.2f}x | {r['compile']:9.1f} | {break_even}")
+    return results
+
+def bench_attention(config):
+    r"""attention backend별 UNet step (CFG batch [2B,8,256,16]) 속도와 peak memory.
+    OOM이면 해당 batch size는 'OOM'으로 표시.
+    """
+    device = config['device']
+    aldm = ldm(device, precision=config['precision'])
+    t = torch.tensor(500, device=device)
+
+    results = {}
+    for name, (backend, slice_size) in config['backends'].items():
+        aldm.set_attention_backend(backend, slice_size)
+        for B in config['batch_sizes']:
+            latents = torch.randn(2 * B, 8, 256, 16, device=device)
+            embeds = torch.randn(2 * B, 512, device=device)
+            free_cache = torch.device(device).type == 'cuda'
+            if free_cache:
+                torch.cuda.empty_cache()
+                torch.cuda.reset_peak_memory_stats(device)
+            try:
+                with torch.no_grad():
+                    sec, _ = timeit(lambda: aldm._predict_noise(latents, t, embeds), device,
+                                    warmup=config['warmup'], repeat=config['repeat'])
+                peak = torch.cuda.max_memory_allocated(device) / 2**20 if free_cache else float('nan')
+                results[(name, B)] = (sec, peak)
+            except torch.cuda.OutOfMemoryError:
+                results[(name, B)] = None
+            del latents, embeds
+
+    print(f"{'backend':>14} | {'B':>3} | {'sec/step':>8} | {'peak MB':>8}")
+    for (name, B), r in results.items():
+        if r is None:
+            print(f"{name:>14} | {B:3d} | {'OOM':>8} | {'OOM':>8}")
+        else:
+            print(f"{name:>14} | {B:3d} | {r[0]:8.3f} | {r[1]:8.0f}")
+    return results
+
+def _shared_weights_worker(shared_weights, ready, done):  # spawn worker: 모든 component 로드 후 대기
+    aldm = ldm('cpu', shared_weights=shared_weights)
+    with torch.no_grad():
+        for name in ['vae', 'text_encoder', 'unet', 'vocoder']:
+            aldm.load_component(name)
+        aldm.encode_prompt(["A cat meowing"], do_cfg=True)
+    ready.put(os.getpid())
+    done.wait()  # 모든 worker가 로드된 상태에서 부모가 측정할 때까지 유지
+
+def bench_shared_weights(config):
+    r"""N개 worker process가 각자 AudioLDM을 로드할 때의 RSS / PSS 합 (/proc/<pid>/smaps_rollup).
+    - private: 일반 from_pretrained (process마다 weight 복사본)
+    - shared: export_shared_weights 후 mmap 로드 (page cache 한 벌을 공유 -> PSS 합이 줄어듦)
+    """
+    import multiprocessing as mp
+    from src.shared_weights import export_shared_weights, memory_usage
+
+    if not os.path.exists(os.path.join(config['weights_dir'], 'unet.pt')):
+        export_shared_weights(ldm('cpu'), config['weights_dir'])
+
+    ctx = mp.get_context('spawn')
+    results = {}
+    for name, shared_weights in [('private', None), ('shared', config['weights_dir'])]:
+        ready, done = ctx.Queue(), ctx.Event()
+        workers = [ctx.Process(target=_shared_weights_worker, args=(shared_weights, ready, done))
+                   for _ in range(config['num_workers'])]
+        for w in workers:
+            w.start()
+        pids = [ready.get() for _ in workers]
+        usages = [memory_usage(pid) for pid in pids]
+        done.set()
+        for w in workers:
+            w.join()
+        results[name] = {key: sum(u[key] for u in usages) for key in usages[0]}
+
+    print(f"{config['num_workers']} workers")
+    print(f"{'mode':>8} | {'RSS MB':>8} | {'PSS MB':>8} | {'shared MB':>9} | {'private MB':>10}")
+    for name, r in results.items():
+        print(f"{name:>8} | {r['rss']:8.0f} | {r['pss']:8.0f} | {r['shared']:9.0f} | {r['private']:10.0f}")
+    return results
+
+def bench_multi_query(config):
+    r"""한 mixture에서 Q개 query 분리: query별 edit_audio_with_ddim vs separate_queries (한 번에).
+    agree: 두 방식 출력 간 SI-SDR (같은 seed -> 같아야 함).
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'])
+    mel_mix, _, _, _, _ = processor.read_audio_file(config['mixture'])
+    mel_mix, texts = mel_mix.to(device), config['queries']
+    edit_kwargs = dict(transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                       ddim_steps=config['ddim_steps'], return_type="np", seed=config['seed'])
+
+    with torch.no_grad():
+        sec_seq, seq = timeit(lambda: [aldm.edit_audio_with_ddim(mel=mel_mix, text=text, duration=10.24, batch_size=1, **edit_kwargs)[0]
+                                       for text in texts], device, warmup=1, repeat=config['repeat'])
+        sec_multi, multi = timeit(lambda: aldm.separate_queries(mel=mel_mix, texts=texts, **edit_kwargs),
+                                  device, warmup=1, repeat=config['repeat'])
+
+    agree = np.mean([sisdr_to(a, b) for a, b in zip(seq, multi)])
+    print(f"{len(texts)} queries | per-query: {sec_seq:.2f}s | multi-query: {sec_multi:.2f}s "
+          f"({sec_seq / sec_multi:.2f}x) | agree: {agree:.1f} dB")
+    return {'per_query': sec_seq, 'multi_query': sec_multi, 'agree': float(agree)}
+
+def bench_region(config):
+    r"""edit_region: 편집 구간 길이별 시간 (UNet / VAE / vocoder가 window만 처리 -> 길이에 비례).
+    기준: 같은 설정의 전체 edit_audio_with_ddim.
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'])
+    mel_mix, _, _, wav_mix, _ = processor.read_audio_file(config['mixture'])
+    mel_mix, wav_mix = mel_mix.to(device), wav_mix.to(device)
+    edit_kwargs = dict(transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                       ddim_steps=config['ddim_steps'], seed=config['seed'])
+
+    results = {}
+    with torch.no_grad():
+        results['full (10.24s)'], _ = timeit(lambda: aldm.edit_audio_with_ddim(
+            mel=mel_mix, text=config['text'], duration=10.24, batch_size=1, **edit_kwargs),
+            device, warmup=1, repeat=config['repeat'])
+        for length in config['lengths']:
+            start = config['start']
+            results[f'region {length}s'], _ = timeit(lambda: aldm.edit_region(
+                mel=mel_mix, text=config['text'], start=start, end=start + length,
+                margin=config['margin'], waveform=wav_mix, **edit_kwargs),
+                device, warmup=1, repeat=config['repeat'])
+
+    base = results['full (10.24s)']
+    print(f"{'setting':>16} | {'sec':>7} | {'vs full':>7}")
+    for name, sec in results.items():
+        print(f"{name:>16} | {sec:7.3f} | {sec / base:7.1%}")
+    return results
+
+def bench_inversion(config):
+    r"""한 mixture에 여러 (prompt, guidance) 조합을 시도할 때: random noising vs cache된 DDIM inversion.
+    inversion은 첫 조합에서만 UNet을 t_enc번 더 돌리고 이후는 cache hit.
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'])
+    items = load_audiocaps_items(processor, config['num_items'])
+
+    results = {}
+    for inversion in [False, True]:
+        aldm.inversion_cache.clear()  # 측정마다 비움
+        stats, sisdrs, start = {}, [], time.perf_counter()
+        for caption, mel_mix, wav_src in tqdm(items, desc=f'inversion={inversion}'):
+            for prompt in [caption, f'Nothing but {caption}']:
+                for guidance_scale in config['guidance_scales']:
+                    wav = aldm.edit_audio_with_ddim(
+                        mel=mel_mix.to(device), text=prompt, duration=10.24, batch_size=1,
+                        transfer_strength=config['transfer_strength'], guidance_scale=guidance_scale,
+                        ddim_steps=config['ddim_steps'], return_type="np", seed=config['seed'],
+                        inversion=inversion, stats=stats,
+                    )
+                    sisdrs.append(sisdr_to(wav_src, wav))
+        sync(device)
+        results[inversion] = {'sec': time.perf_counter() - start, 'unet_evals': stats['unet_evals'],
+                              'sisdr': float(np.mean(sisdrs)), 'cache': aldm.inversion_cache.stats()}
+
+    print(f"{'mode':>10} | {'sec':>7} | {'UNet evals':>10} | {'SI-SDR':>7} | cache")
+    for inversion, r in results.items():
+        print(f"{'inversion' if inversion else 'noising':>10} | {r['sec']:7.1f} | {r['unet_evals']:10d} | {r['sisdr']:7.2f} | {r['cache']}")
+    return results
+
+def bench_tome(config):
+    r"""token merging ratio별 속도 vs SI-SDR (AudioCaps eval subset). 첫 ratio (0 = 끔)가 기준."""
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    aldm = ldm(device, precision=config['precision'], attention_backend=config['attention_backend'])
+
+    results = {}
+    for ratio in config['ratios']:
+        aldm.set_token_merging(ratio, min_tokens=config['min_tokens'])
+        sisdrs, times = [], []
+        for caption, mel_mix, wav_src in tqdm(items, desc=f'ratio={ratio}'):
+            sec, wav = timeit(lambda: aldm.edit_audio_with_ddim(
+                mel=mel_mix.to(device), text=caption, duration=10.24, batch_size=1,
+                transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                ddim_steps=config['ddim_steps'], return_type="np", seed=config['seed'],
+            ), device, warmup=0, repeat=1)
+            times.append(sec); sisdrs.append(sisdr_to(wav_src, wav))
+        results[ratio] = {'sec/item': float(np.mean(times[1:] or times)), 'sisdr': float(np.mean(sisdrs))}
+
+    base = results[config['ratios'][0]]
+    print(f"{'ratio':>6} | {'sec/item':>8} | {'speedup':>7} | {'SI-SDR':>7} | {'delta':>7}")
+    for ratio, r in results.items():
+        print(f"{ratio:6.2f} | {r['sec/item']:8.2f} | {base['sec/item'] / r['sec/item']:6.2f}x | {r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f}")
+    return results
+
+def bench_deepcache(config):
+    r"""step caching interval별 (1 = 끔) editing 속도 vs SI-SDR, SDS train_step 속도 vs noise MSE."""
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    aldm = ldm(device, precision=config['precision'])
+
+    results = {}
+    for interval in config['intervals']:
+        aldm.enable_step_caching(interval, branch=config['branch'])
+        stats, sisdrs, times = {}, [], []
+        for caption, mel_mix, wav_src in tqdm(items, desc=f'interval={interval}'):
+            sec, wav = timeit(lambda: aldm.edit_audio_with_ddim(
+                mel=mel_mix.to(device), text=caption, duration=10.24, batch_size=1,
+                transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                ddim_steps=config['ddim_steps'], return_type="np", seed=config['seed'], stats=stats,
+            ), device, warmup=0, repeat=1)
+            times.append(sec); sisdrs.append(sisdr_to(wav_src, wav))
+
+        # SDS: 같은 mixture에 train_step 반복 (optimizer 없이 gradient만)
+        batch = processor.making_dataset(config['mixture'])
+        torch.manual_seed(config['seed'])
+        sds_mse = []
+        def sds_steps():
+            for _ in range(config['sds_steps']):
+                batch['log_mel_spec'].grad = None
+                batch['log_mel_spec'].requires_grad_(True)
+                sds_mse.append(aldm.train_step(batch, guidance_scale=config['sds_guidance_scale'])[0])
+        sds_sec, _ = timeit(sds_steps, device, warmup=0, repeat=1)
+        results[interval] = {
+            'sec/item': float(np.mean(times[1:] or times)), 'sisdr': float(np.mean(sisdrs)),
+            'cached': stats.get('cached_evals', 0) / stats['unet_evals'],
+            'sds sec/step': sds_sec / config['sds_steps'], 'sds mse': float(np.mean(sds_mse)),
+        }
+    aldm.disable_step_caching()
+
+    base = results[config['intervals'][0]]
+    print(f"{'interval':>8} | {'cached':>6} | {'sec/item':>8} | {'speedup':>7} | {'SI-SDR':>7} | {'delta':>7} | {'SDS s/step':>10} | {'speedup':>7} | {'SDS mse':>8}")
+    for interval, r in results.items():
+        print(f"{interval:8d} | {r['cached']:6.1%} | {r['sec/item']:8.2f} | {base['sec/item'] / r['sec/item']:6.2f}x | "
+              f"{r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f} | {r['sds sec/step']:10.3f} | "
+              f"{base['sds sec/step'] / r['sds sec/step']:6.2f}x | {r['sds mse']:8.4f}")
+    return results
+
+def bench_early_exit(config):
+    r"""early exit tolerance별 batch editing 처리량 vs SI-SDR. 첫 값 (None = 끔)이 기준."""
+    device = config['device']
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+    aldm = ldm(device, precision=config['precision'])
+    bs = config['batch_size']
+    batches = [items[k:k + bs] for k in range(0, len(items), bs)]
+
+    results = {}
+    for tol in config['tolerances']:
+        stats, sisdrs = {}, []
+        sync(device)
+        start = time.perf_counter()
+        for batch in tqdm(batches, desc=f'early_exit={tol}'):
+            wavs = aldm.edit_audio_with_ddim(
+                mel=torch.cat([mel for _, mel, _ in batch]).to(device), text=[caption for caption, _, _ in batch],
+                duration=10.24, batch_size=len(batch), transfer_strength=config['transfer_strength'],
+                guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], return_type="np",
+                seed=config['seed'], solver=config['solver'], early_exit=tol, stats=stats,
+            )
+            sisdrs += [sisdr_to(wav_src, wav) for (_, _, wav_src), wav in zip(batch, wavs)]
+        sync(device)
+        results[tol] = {'sec/item': (time.perf_counter() - start) / len(items), 'sisdr': float(np.mean(sisdrs)),
+                        'exited': stats.get('early_exit_items', 0) / len(items),
+                        'saved': stats.get('skipped_evals', 0) / (stats['unet_evals'] + stats.get('skipped_evals', 0))}
+
+    base = results[config['tolerances'][0]]
+    print(f"{'tol':>8} | {'exited':>6} | {'saved':>6} | {'sec/item':>8} | {'speedup':>7} | {'SI-SDR':>7} | {'delta':>7}")
+    for tol, r in results.items():
+        print(f"{str(tol):>8} | {r['exited']:6.1%} | {r['saved']:6.1%} | {r['sec/item']:8.2f} | "
+              f"{base['sec/item'] / r['sec/item']:6.2f}x | {r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f}")
+    return results
+
+def bench_quantization(config):
+    r"""CPU int8 quantization profile별 startup (cold: quantize + 저장 / warm: cache 로드), weight 크기, 속도, SI-SDR.
+    첫 profile (None = fp32)이 기준.
+    """
+    from src.quantization import module_size_mb
+
+    device = 'cpu'
+    torch.set_num_threads(config['num_threads'])
+    processor = prcssr(device=device)
+    items = load_audiocaps_items(processor, config['num_items'])
+
+    results = {}
+    for profile in config['profiles']:
+        startup = {}
+        for phase in ['cold', 'warm']:  # warm: quantization_cache에서 로드
+            start = time.perf_counter()
+            aldm = ldm(device, quantization=profile, quantization_cache=config['cache_dir'], lazy=False)
+            startup[phase] = time.perf_counter() - start
+            if phase == 'cold':
+                free(aldm)
+        sizes = {name: module_size_mb(aldm.load_component(name)) for name in ['vae', 'text_encoder', 'unet', 'vocoder']}
+
+        sisdrs, times = [], []
+        for caption, mel_mix, wav_src in tqdm(items, desc=f'quantization={profile}'):
+            sec, wav = timeit(lambda: aldm.edit_audio_with_ddim(
+                mel=mel_mix.to(device), text=caption, duration=10.24, batch_size=1,
+                transfer_strength=config['transfer_strength'], guidance_scale=config['guidance_scale'],
+                ddim_steps=config['ddim_steps'], return_type="np", seed=config['seed'],
+            ), device, warmup=0, repeat=1)
+            times.append(sec); sisdrs.append(sisdr_to(wav_src, wav))
+        results[str(profile)] = {'startup': startup, 'MB': sizes, 'sec/item': float(np.mean(times[1:] or times)),
+                                 'sisdr': float(np.mean(sisdrs))}
+        free(aldm)
+
+    base = results[str(config['profiles'][0])]
+    print(f"{'profile':>14} | {'cold s':>6} | {'warm s':>6} | {'weights MB':>10} | {'sec/item':>8} | {'speedup':>7} | {'SI-SDR':>7} | {'delta':>7}")
+    for profile, r in results.items():
+        print(f"{profile:>14} | {r['startup']['cold']:6.1f} | {r['startup']['warm']:6.1f} | {sum(r['MB'].values()):10.0f} | "
+              f"{r['sec/item']:8.2f} | {base['sec/item'] / r['sec/item']:6.2f}x | {r['sisdr']:7.2f} | {r['sisdr'] - base['sisdr']:+7.2f}")
+    for profile, r in results.items():
+        print(f"{profile:>14} | " + ", ".join(f"{name} {mb:.0f}MB" for name, mb in r['MB'].items()))
+    return results
+
+def bench_onnx(config):
+    r"""vocoder / VAE decoder: eager PyTorch vs onnxruntime (CPU). shape별 parity (max abs / rel error)와 속도."""
+    from src.onnx_backend import export_onnx, onnx_path
+
+    device = 'cpu'
+    torch.set_num_threads(config['num_threads'])
+    aldm = ldm(device, precision='fp32')
+    if not all(os.path.exists(onnx_path(config['onnx_dir'], name)) for name in ['vocoder', 'vae']):
+        export_onnx(aldm, config['onnx_dir'])
+    generator = torch.Generator().manual_seed(config['seed'])
+
+    results = {}
+    for batch_size, frames in config['shapes']:  # frames: mel frame 수 (latent는 / 4)
+        latents = torch.randn(batch_size, 8, frames // aldm.vae_scale_factor, 16, generator=generator)
+        with torch.no_grad():
+            mel_in = aldm.decode_latents(latents)  # vocoder parity는 두 backend에 같은 mel 입력
+        runs = {}
+        for backend in ['torch', 'onnx']:
+            if backend == 'onnx':
+                aldm.enable_onnx(config['onnx_dir'], num_threads=config['num_threads'])
+            with torch.no_grad():
+                dec_sec, mel = timeit(lambda: aldm.decode_latents(latents), device, repeat=config['repeat'])
+                voc_sec, wav = timeit(lambda: aldm.mel_to_waveform(mel_in), device, repeat=config['repeat'])
+            runs[backend] = {'vae': (dec_sec, mel), 'vocoder': (voc_sec, wav)}
+            aldm.disable_onnx()
+        for stage in ['vae', 'vocoder']:
+            (t_sec, ref), (o_sec, out) = runs['torch'][stage], runs['onnx'][stage]
+            err = (out - ref).abs().max().item()
+            rel = ((out - ref).norm() / ref.norm().clamp(min=1e-8)).item()
+            results[(stage, batch_size, frames)] = {'torch': t_sec, 'onnx': o_sec, 'max_abs': err, 'rel': rel,
+                                                    'pass': rel < config['rel_tol']}
+
+    print(f"{'stage':>8} | {'B':>2} | {'frames':>6} | {'torch s':>7} | {'onnx s':>7} | {'speedup':>7} | {'max abs':>8} | {'rel':>8} | parity")
+    for (stage, batch_size, frames), r in results.items():
+        print(f"{stage:>8} | {batch_size:2d} | {frames:6d} | {r['torch']:7.3f} | {r['onnx']:7.3f} | {r['torch'] / r['onnx']:6.2f}x | "
+              f"{r['max_abs']:8.1e} | {r['rel']:8.1e} | {'PASS' if r['pass'] else 'FAIL'}")
+    failed = [key for key, r in results.items() if not r['pass']]
+    assert not failed, f"ONNX parity failed (rel >= {config['rel_tol']}): {failed}"
+    return results
+
+def bench_offload(config):
+    r"""offload mode별 batch size에 따른 peak device memory와 sec/item (CUDA). OOM이면 그 batch는 건너뜀."""
+    device = config['device']
+    processor = prcssr(device=device)
+    mel_mix = processor.read_audio_file(config['mixture'])[0]
+    aldm = ldm(device, precision=config['precision'], lazy=False)
+
+    results = {}
+    for mode in config['modes']:
+        aldm.enable_offload(mode)
+        for batch_size in config['batch_sizes']:
+            gc.collect(); torch.cuda.empty_cache()
+            torch.cuda.reset_peak_memory_stats(device)
+            try:
+                sec, _ = timeit(lambda: aldm.edit_audio_with_ddim(
+                    mel=mel_mix.repeat(batch_size, 1, 1, 1).to(device), text=[config['text']] * batch_size,
+                    duration=10.24, batch_size=batch_size, transfer_strength=config['transfer_strength'],
+                    guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], seed=config['seed'],
+                ), device, warmup=1, repeat=config['repeat'])
+                results[(mode, batch_size)] = {'sec/item': sec / batch_size,
+                                               'peak GB': torch.cuda.max_memory_allocated(device) / 2 ** 30}
+            except torch.cuda.OutOfMemoryError:
+                results[(mode, batch_size)] = None
+    aldm.disable_offload()
+
+    print(f"{'mode':>10} | {'batch':>5} | {'sec/item':>8} | {'peak GB':>7}")
+    for (mode, batch_size), r in results.items():
+        if r is None:
+            print(f"{mode:>10} | {batch_size:5d} | {'OOM':>8} | {'-':>7}")
+        else:
+            print(f"{mode:>10} | {batch_size:5d} | {r['sec/item']:8.3f} | {r['peak GB']:7.2f}")
+    return results
+
+def bench_vae_tiling(config):
+    r"""VAE tiling 설정별 encode / decode peak memory (CUDA), 시간, untiled 대비 상대 오차 (posterior mean, decode mel)."""
+    device = config['device']
+    aldm = ldm(device, precision=config['precision'], lazy=False)
+    rel = lambda a, b: ((a - b).float().norm() / b.float().norm()).item()
+
+    results = {}
+    for batch_size, frames in config['shapes']:
+        g = torch.Generator().manual_seed(config['seed'])
+        mel = (torch.randn(batch_size, 1, frames, 64, generator=g).cumsum(2) * 0.05 - 5).to(device)  # ts[B, 1, T, M]
+        latents = torch.randn(batch_size, 8, frames // aldm.vae_scale_factor, 16, generator=g).to(device)
+        reference = None
+        for name, setting in config['settings'].items():
+            if setting is None:
+                aldm.disable_vae_tiling()
+            else:
+                aldm.enable_vae_tiling(*setting)
+            if device != 'cpu':
+                gc.collect(); torch.cuda.empty_cache()
+                torch.cuda.reset_peak_memory_stats(device)
+            try:
+                with torch.no_grad():
+                    enc_sec, z = timeit(lambda: aldm.encode_audios(mel, sample=False), device, warmup=1, repeat=config['repeat'])
+                    dec_sec, out = timeit(lambda: aldm.decode_latents(latents), device, warmup=1, repeat=config['repeat'])
+            except torch.cuda.OutOfMemoryError:
+                results[(batch_size, frames, name)] = None
+                continue
+            if reference is None:
+                reference = (z, out)
+            results[(batch_size, frames, name)] = {
+                'enc sec': enc_sec, 'dec sec': dec_sec,
+                'peak GB': torch.cuda.max_memory_allocated(device) / 2 ** 30 if device != 'cpu' else float('nan'),
+                'enc err': rel(z, reference[0]), 'dec err': rel(out, reference[1]),
+            }
+    aldm.disable_vae_tiling()
+
+    print(f"{'batch':>5} | {'frames':>6} | {'setting':>16} | {'enc sec':>7} | {'dec sec':>7} | {'peak GB':>7} | {'enc err':>8} | {'dec err':>8}")
+    for (batch_size, frames, name), r in results.items():
+        if r is None:
+            print(f"{batch_size:5d} | {frames:6d} | {name:>16} | {'OOM':>7} |")
+        else:
+            print(f"{batch_size:5d} | {frames:6d} | {name:>16} | {r['enc sec']:7.3f} | {r['dec sec']:7.3f} | "
+                  f"{r['peak GB']:7.2f} | {r['enc err']:8.2e} | {r['dec err']:8.2e}")
+    return results
+
+def bench_long_audio(config):
+    r"""긴 파일 sliding-window separation: 파일 길이 x window batch size별 처리 속도 (audio sec / sec)와 peak device memory.
+    mixture를 반복해서 만든 긴 파일 사용. peak memory는 파일 길이와 무관해야 함.
+    """
+    import soundfile as sf
+    from src.long_audio import separate_long_audio, edit_separator
+
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'], lazy=False)
+    _, _, _, wav_mix, _ = processor.read_audio_file(config['mixture'])  # ts[1, N]
+    separate_fn = edit_separator(aldm, processor, config['text'], transfer_strength=config['transfer_strength'],
+                                 guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], seed=config['seed'])
+
+    results = {}
+    for seconds in config['durations']:
+        path = os.path.join(config['work_dir'], f'long_{seconds}s.wav')
+        os.makedirs(config['work_dir'], exist_ok=True)
+        repeats = int(np.ceil(seconds * processor.sampling_rate / wav_mix.shape[-1]))
+        sf.write(path, wav_mix[0].repeat(repeats)[:int(seconds * processor.sampling_rate)].numpy(), processor.sampling_rate)
+        for batch_size in config['batch_sizes']:
+            if device != 'cpu':
+                gc.collect(); torch.cuda.empty_cache()
+                torch.cuda.reset_peak_memory_stats(device)
+            sec, _ = timeit(lambda: separate_long_audio(path, separate_fn, processor, output_path=path[:-4] + '_sep.wav',
+                                                        overlap=config['overlap'], batch_size=batch_size),
+                            device, warmup=0, repeat=1)
+            results[(seconds, batch_size)] = {
+                'x realtime': seconds / sec,
+                'peak GB': torch.cuda.max_memory_allocated(device) / 2 ** 30 if device != 'cpu' else float('nan'),
+            }
+
+    print(f"{'sec':>5} | {'batch':>5} | {'x realtime':>10} | {'peak GB':>7}")
+    for (seconds, batch_size), r in results.items():
+        print(f"{seconds:5d} | {batch_size:5d} | {r['x realtime']:10.2f} | {r['peak GB']:7.2f}")
+    return results
+
+def bench_activity(config):
+    r"""대부분 무음인 긴 파일: activity index로 무음 window를 건너뛸 때 처리 시간 / 건너뛴 window 수.
+    agree: 건너뛰지 않은 결과 대비 SI-SDR (소리가 있는 window는 같은 seed -> 같은 결과).
+    """
+    import soundfile as sf
+    from src.long_audio import separate_long_audio, edit_separator
+
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'], lazy=False)
+    _, _, _, wav_mix, _ = processor.read_audio_file(config['mixture'])  # ts[1, N]
+    separate_fn = edit_separator(aldm, processor, config['text'], transfer_strength=config['transfer_strength'],
+                                 guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], seed=config['seed'])
+
+    # 무음 파일의 config['events'] 위치 (sec)에 mixture를 넣음
+    sr = processor.sampling_rate
+    os.makedirs(config['work_dir'], exist_ok=True)
+    path = os.path.join(config['work_dir'], 'sparse.wav')
+    waveform = np.zeros(int(config['seconds'] * sr), dtype=np.float32)
+    for start in config['events']:
+        segment = wav_mix[0, :len(waveform) - int(start * sr)].numpy()
+        waveform[int(start * sr):int(start * sr) + len(segment)] += segment
+    sf.write(path, waveform, sr)
+
+    results, outputs = {}, {}
+    for threshold in config['thresholds']:
+        stats = {}
+        sec, outputs[threshold] = timeit(lambda: separate_long_audio(
+            path, separate_fn, processor, batch_size=config['batch_size'], silence_threshold=threshold, stats=stats,
+        ), device, warmup=0, repeat=1)
+        results[threshold] = {'sec': sec, 'skipped': stats['skipped_windows'], 'windows': stats['windows']}
+    reference = outputs[config['thresholds'][0]]
+    for threshold in config['thresholds']:
+        results[threshold]['agree'] = sisdr_to(reference, outputs[threshold])
+
+    print(f"{'threshold':>9} | {'sec':>7} | {'skipped':>11} | {'agree dB':>8}")
+    for threshold, r in results.items():
+        print(f"{str(threshold):>9} | {r['sec']:7.1f} | {r['skipped']:4d} / {r['windows']:4d} | {r['agree']:8.1f}")
+    return results
+
+def bench_sds_timesteps(config):
+    r"""train_step의 num_timesteps (K)별 sec/step과 gradient 품질.
+    cos: step 하나의 mel gradient와 기준 gradient (K=max, 여러 step 평균)의 cosine similarity -> 클수록 noise가 작음.
+    cos / sec: wall-clock 대비 gradient 품질.
+    """
+    device = config['device']
+    processor = prcssr(device=device)
+    aldm = ldm(device, precision=config['precision'])
+    batch = processor.making_dataset(config['mixture'])
+    batch['text'] = [config['text']]
+    mel = batch['log_mel_spec'].to(device).requires_grad_(True)
+    batch['log_mel_spec'] = mel
+
+    def grad_of(num_timesteps):
+        mel.grad = None
+        aldm.train_step(batch, guidance_scale=config['guidance_scale'], num_timesteps=num_timesteps)
+        return mel.grad.detach().flatten().clone()
+
+    torch.manual_seed(config['seed'])
+    reference = torch.stack([grad_of(max(config['timesteps'])) for _ in range(config['reference_steps'])]).mean(0)
+
+    results = {}
+    for K in config['timesteps']:
+        sec, _ = timeit(lambda: grad_of(K), device, warmup=1, repeat=config['repeat'])
+        cos = [torch.nn.functional.cosine_similarity(grad_of(K), reference, dim=0).item() for _ in range(config['repeat'])]
+        results[K] = {'sec/step': sec, 'cos': float(np.mean(cos))}
+
+    print(f"{'K':>3} | {'sec/step':>8} | {'cos':>6} | {'cos / sec':>9}")
+    for K, r in results.items():
+        print(f"{K:3d} | {r['sec/step']:8.3f} | {r['cos']:6.3f} | {r['cos'] / r['sec/step']:9.2f}")
+    return results
+
+
+BENCHMARKS = {
+    'precision': bench_precision,
+    'startup': bench_startup,
+    'guidance_interval': bench_guidance_interval,
+    'solver': bench_solver,
+    'vocoder': bench_vocoder,
+    'compile': bench_compile,
+    'attention': bench_attention,
+    'shared_weights': bench_shared_weights,
+    'multi_query': bench_multi_query,
+    'region': bench_region,
+    'inversion': bench_inversion,
+    'tome': bench_tome,
+    'deepcache': bench_deepcache,
+    'early_exit': bench_early_exit,
+    'quantization': bench_quantization,
+    'onnx': bench_onnx,
+    'offload': bench_offload,
+    'vae_tiling': bench_vae_tiling,
+    'long_audio': bench_long_audio,
+    'activity': bench_activity,
+    'sds_timesteps': bench_sds_timesteps,
+}
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else 'precision'
+    device = 'cuda:0' if torch.cuda.is_available() else 'cpu'
+
+    configs = {
+        'precision': {
+            'device': device,
+            # 첫 policy가 drift 기준 (fp32)
+            'policies': ['fp32', 'fp16', 'bf16', 'mixed'] if device != 'cpu' else ['fp32', 'bf16', 'cpu_bf16'],
+            'num_items': 10,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+            'warmup': 1,
+            'repeat': 1,
+        },
+        'startup': {
+            'device': device,
+            'use_safetensors': None,  # local safetensors 경로를 repo_id로 주면 mmap 로드
+        },
+        'guidance_interval': {
+            'device': device,
+            'precision': 'fp32',
+            'num_items': 30,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 200,
+            'seed': 0,
+            # name: (guidance_interval (t_min, t_max), guidance_every)
+            'settings': {
+                'full CFG': (None, 1),
+                'every 2': (None, 2),
+                'every 4': (None, 4),
+                't in [0, 100]': ((0, 100), 1),
+                't in [100, 200]': ((100, 200), 1),
+            },
+        },
+        'solver': {
+            'device': device,
+            'precision': 'fp32',
+            'num_items': 30,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'seed': 0,
+            # name: (solver, ddim_steps) -- 실제 denoising step 수는 ddim_steps * transfer_strength
+            'settings': {
+                'ddim 200': ('ddim', 200),
+                'ddim 50': ('ddim', 50),
+                'dpmpp 100': ('dpmpp', 100),
+                'dpmpp 50': ('dpmpp', 50),
+                'unipc 100': ('unipc', 100),
+                'unipc 50': ('unipc', 50),
+            },
+        },
+        'vocoder': {
+            'device': device,
+            'precision': 'fp32',
+            'batch_size': 4,
+            'num_frames': 4096,  # 40.96s
+            'seed': 0,
+            'warmup': 1,
+            'repeat': 3,
+            # name: (chunk_frames, overlap_frames, max_batch)
+            'settings': {
+                'whole': (4096, 0, 4),
+                'chunk 1024 / 32': (1024, 32, 8),
+                'chunk 512 / 32': (512, 32, 8),
+                'chunk 256 / 16': (256, 16, 16),
+            },
+        },
+        'compile': {
+            'device': 'cpu',  # CPU에서 steady-state gain / compile 비용 측정
+            'precision': 'fp32',
+            'num_threads': 8,
+            'batch_size': 1,
+            'mode': 'default',
+            'repeat': 5,
+        },
+        'attention': {
+            'device': device,
+            'precision': 'fp16' if device != 'cpu' else 'fp32',
+            'batch_sizes': [1, 4, 16, 32],
+            'warmup': 1,
+            'repeat': 3,
+            # name: (backend, slice_size)
+            'backends': {
+                'default': ('default', None),
+                'sdpa': ('sdpa', None),
+                'sliced auto': ('sliced', None),
+                'sliced 1': ('sliced', 1),
+            },
+        },
+        'shared_weights': {
+            'num_workers': 4,
+            'weights_dir': os.path.join(proj_dir, 'ckpt', 'shared_weights'),
+        },
+        'multi_query': {
+            'device': device,
+            'precision': 'fp32',
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'queries': ['A cat meowing', 'Footsteps on a wooden floor', 'Nothing but a cat meowing'],
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+            'repeat': 2,
+        },
+        'region': {
+            'device': device,
+            'precision': 'fp32',
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'text': 'A cat meowing',
+            'start': 2.0,
+            'lengths': [0.5, 1.0, 2.0, 4.0],  # sec
+            'margin': 0.32,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+            'repeat': 2,
+        },
+        'inversion': {
+            'device': device,
+            'precision': 'fp32',
+            'num_items': 10,
+            'transfer_strength': 0.2,
+            'guidance_scales': [1.5, 2.5, 4.0],
+            'ddim_steps': 50,
+            'seed': 0,
+        },
+        'tome': {
+            'device': device,
+            'precision': 'fp32',
+            'attention_backend': 'sdpa',
+            'num_items': 30,
+            'ratios': [0.0, 0.25, 0.4, 0.5],  # 첫 값이 기준
+            'min_tokens': 1024,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 200,
+            'seed': 0,
+        },
+        'deepcache': {
+            'device': device,
+            'precision': 'fp32',
+            'num_items': 30,
+            'intervals': [1, 2, 3, 5],  # 첫 값이 기준 (1 = 매 step full UNet)
+            'branch': 1,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 200,
+            'seed': 0,
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'sds_steps': 30,
+            'sds_guidance_scale': 100,
+        },
+        'early_exit': {
+            'device': device,
+            'precision': 'fp32',
+            'num_items': 32,
+            'batch_size': 8,
+            'tolerances': [None, 1e-3, 3e-3, 1e-2],  # 첫 값이 기준
+            'solver': 'ddim',
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 200,
+            'seed': 0,
+        },
+        'quantization': {
+            'num_threads': 8,
+            'profiles': [None, 'cpu_int8', 'cpu_int8_small'],  # 첫 값이 기준 (fp32)
+            'cache_dir': os.path.join(proj_dir, 'ckpt', 'quantized'),
+            'num_items': 10,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+        },
+        'onnx': {
+            'num_threads': 8,
+            'onnx_dir': os.path.join(proj_dir, 'ckpt', 'onnx'),
+            'shapes': [(1, 1024), (4, 1024), (1, 4096)],  # (batch, mel frames): 10.24s / batch 4 / 40.96s
+            'rel_tol': 1e-3,
+            'repeat': 3,
+            'seed': 0,
+        },
+        'offload': {
+            'device': 'cuda:0',
+            'precision': 'fp16',
+            'modes': ['resident', 'sequential', 'minimal'],
+            'batch_sizes': [1, 8, 16, 32],
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'text': 'A cat meowing',
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+            'repeat': 2,
+        },
+        'vae_tiling': {
+            'device': device,
+            'precision': 'fp32',
+            'shapes': [(1, 1024), (16, 1024), (1, 4096)],  # (batch, mel frames)
+            # name: None (untiled, 기준) 또는 enable_vae_tiling의 (tile_frames, overlap_frames, max_batch, sync_groupnorm)
+            'settings': {
+                'untiled': None,
+                'tile 64 / 16': (64, 16, 8, True),
+                'tile 128 / 32': (128, 32, 8, True),
+                'tile 64 / 16 nosync': (64, 16, 8, False),
+            },
+            'seed': 0,
+            'repeat': 2,
+        },
+        'long_audio': {
+            'device': device,
+            'precision': 'fp32',
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'text': 'A cat meowing',
+            'work_dir': os.path.join(proj_dir, 'ckpt', 'long_audio'),
+            'durations': [30, 60, 120],  # sec
+            'batch_sizes': [1, 4, 8],
+            'overlap': 1.28,  # sec
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+        },
+        'activity': {
+            'device': device,
+            'precision': 'fp32',
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'text': 'A cat meowing',
+            'work_dir': os.path.join(proj_dir, 'ckpt', 'long_audio'),
+            'seconds': 300,
+            'events': [20.0, 130.0, 250.0],  # mixture를 넣을 위치 (sec), 나머지는 무음
+            'thresholds': [None, 1e-3],  # 첫 값이 기준 (None: 모든 window 처리)
+            'batch_size': 8,
+            'transfer_strength': 0.2,
+            'guidance_scale': 2.5,
+            'ddim_steps': 50,
+            'seed': 0,
+        },
+        'sds_timesteps': {
+            'device': device,
+            'precision': 'fp32',
+            'mixture': './a_cat_n_stepping_wood.wav',
+            'text': 'A cat meowing',
+            'timesteps': [1, 2, 4, 8],  # num_timesteps (K)
+            'reference_steps': 8,  # 기준 gradient: K=max를 이만큼 평균
+            'guidance_scale': 100,
+            'repeat': 5,
+            'seed': 0,
+        },
+    }
+
+    BENCHMARKS[name](configs[name])
@@ -213,9 +213,6 @@ class AudioCapsEvaluator:
         print(sisdr, sdri)
 
 
-        for param in aldm.parameters():
-            param.requires_grad = False  # 모든 파라미터를 학습 불가능하게 고정
-
         mel_tar_samples = []
         for ii in tqdm(range(30)):
             mel_sample = aldm.edit_audio_with_ddim(
@@ -495,25 +492,28 @@ class AudioCapsEvaluator:
                     ts = config['transfer_strength']
                     guid = config['guidance_scale']
                     totalstep = config['ddim_steps']
+                    solver = config.get('solver', 'ddim')
+                    seed = config.get('seed')
                     iteration = config['iteration']
                     do_clip = config['do_clip']
                     iSTFT = config['iSTFT']
                     duration = 10.24
 
                     if iSTFT:
-                        current_mel = mel_mix
-                        for iter in range(iteration):
-                            current_mel = aldm.edit_audio_with_ddim(
-                                mel=current_mel,
-                                text=str(f'Nothing but {text[0]}'),
-                                duration=duration,
-                                batch_size=1,
-                                transfer_strength=ts,
-                                guidance_scale=guid,
-                                ddim_steps=totalstep,
-                                clipping = do_clip,
-                                return_type="mel",
-                            )
+                        current_mel = aldm.iterative_edit(
+                            mel=mel_mix,
+                            text=str(f'Nothing but {text[0]}'),
+                            num_iterations=iteration,
+                            transfer_strength=ts,
+                            guidance_scale=guid,
+                            ddim_steps=totalstep,
+                            duration=duration,
+                            clipping = do_clip,
+                            carry="mel",
+                            solver=solver,
+                            seed=seed,
+                            return_type="mel",
+                        )
 
                         wav_sep = processor.inverse_mel_with_phase(
                             masked_mel_spec=current_mel,
@@ -530,23 +530,22 @@ class AudioCapsEvaluator:
                         assert wav_src.shape == wav_mix.shape == wav_sep.shape, f"{wav_src.shape}, {wav_mix.shape}, {wav_sep.shape}"
 
                     else:
-                        current_mel = mel_mix
-                        for iter in range(iteration):
-                            last_waveform = aldm.edit_audio_with_ddim(
-                                mel=current_mel,
-                                text=str(f'Nothing but {text[0]}'),
-                                duration=duration,
-                                batch_size=1,
-                                transfer_strength=ts,
-                                guidance_scale=guid,
-                                ddim_steps=totalstep,
-                                clipping = do_clip,
-                                return_type="np",
-                            )
-                            last_waveform = torch.FloatTensor(last_waveform)
-                            mel, stft, stft_com = processor.wav_feature_extraction(last_waveform)
-                            current_mel = mel
-                        wav_sep = last_waveform
+                        # waveform -> mel 재추출 없이 반복은 메모리에서, vocoding은 마지막에 한 번
+                        wav_sep = aldm.iterative_edit(
+                            mel=mel_mix,
+                            text=str(f'Nothing but {text[0]}'),
+                            num_iterations=iteration,
+                            transfer_strength=ts,
+                            guidance_scale=guid,
+                            ddim_steps=totalstep,
+                            duration=duration,
+                            clipping = do_clip,
+                            carry=config.get('carry', 'mel'),
+                            solver=solver,
+                            seed=seed,
+                            return_type="np",
+                        )
+                        wav_sep = torch.FloatTensor(wav_sep)
 
                     sdr_no_sep = calculate_sdr(ref=wav_src, est=wav_mix)
                     sdr = calculate_sdr(ref=wav_src, est=wav_sep)
@@ -595,13 +594,18 @@ if __name__ == "__main__":
 
     config = {
         'transfer_strength': 0.2,
-        'ddim_steps': 200,
+        'ddim_steps': 200,  # solver가 'dpmpp' / 'unipc'면 10~25 step으로 충분
+        'solver': 'ddim',  # 'ddim' | 'dpmpp' | 'unipc'
+        'carry': 'mel',  # iSTFT=False일 때 반복 사이 상태: 'mel' | 'latent' (VAE decode/encode 생략)
         'guidance_scale': 2.5,
         'iteration': 4,
         'do_clip': False,
         'iSTFT': True,
         'break': 30,
+        'seed': 0,  # None이면 매번 다른 noise (cache 안 함)
+        'cache_dir': './cache/edits',  # seed 고정 결과를 sweep 사이에 재사용 (None이면 메모리만)
     }
+    aldm.enable_edit_cache(cache_dir=config['cache_dir'])
 
     mean_sisdr, mean_sdri = eval((processor, aldm), config)
     
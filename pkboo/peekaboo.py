@@ -11,15 +11,21 @@ import torch
 import torch.nn as nn
 from tqdm import tqdm
 import rp
-import src.audioldm as ldm
+import src.audioldm as audioldm
 from src.utilities.data.dataprocessor import AudioDataProcessor, spectral_normalize_torch
 from pkboo.learnable_textures import (
     LearnableImageFourier,
     LearnableImageRasterSigmoided,
 )
 
-ldm = ldm.AudioLDM('cuda:0')
-device = ldm.device
+device = torch.device('cuda:0')
+_ldm = None
+
+def get_ldm():  # import 시점이 아닌 첫 사용 시점에 AudioLDM 생성 (component도 각각 lazy 로드)
+    global _ldm
+    if _ldm is None:
+        _ldm = audioldm.AudioLDM(device)
+    return _ldm
 
 def make_learnable_image(height, width, num_channels, representation='fourier'):
     image_types = {
@@ -138,12 +144,13 @@ def run_peekaboo(target_text: str,
                  GRAVITY=1e-1/2,      # prompt에 따라 tuning이 제일 필요. (1e-2, 1e-1/2, 1e-1, 1.5*1e-1)
                  NUM_ITER=300,        # 이정도면 충분
                  LEARNING_RATE=1e-5,  # neural neural texture 아니면 키워도 됨.
-                 BATCH_SIZE=1,        # 키우면 vram만 잡아먹음
+                 BATCH_SIZE=1,        # iteration당 SDS timestep 수 (UNet 한 번에 batch로, gradient 평균)
                  GUIDANCE_SCALE=100,  # DreamFusion 참고하여 default값 설정
                  representation='fourier bilateral',
                  min_step=None,
                  max_step=None):
 
+    ldm = get_ldm()
     audioprocessor = AudioDataProcessor(device=device)
     dataset = audioprocessor.making_dataset(audio_file_path)
     dataset2 = audioprocessor.making_dataset("./best_samples/Footsteps_on_a_wooden_floor.wav")
@@ -189,7 +196,7 @@ def run_peekaboo(target_text: str,
         alphas = pkboo.alphas()
         composite_set = pkboo()
         
-        dummy_for_plot = ldm.train_step(composite_set, guidance_scale=GUIDANCE_SCALE)
+        dummy_for_plot = ldm.train_step(composite_set, guidance_scale=GUIDANCE_SCALE, num_timesteps=BATCH_SIZE)
         
         loss = alphas.mean() * GRAVITY
         alphaloss = loss.item()
@@ -1,5 +1,11 @@
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 import os
+import functools
+from contextlib import nullcontext
+import math
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
@@ -11,12 +17,26 @@ from diffusers import (
     UNet2DConditionModel,
     DDIMScheduler,
 )
+from diffusers.models.attention_processor import AttnProcessor, AttnProcessor2_0, SlicedAttnProcessor
 from transformers import (
     ClapTextModelWithProjection,
     RobertaTokenizerFast,
     SpeechT5HifiGan,
     logging,
 )
+from src.samplers import SAMPLERS, select_items
+from src.utilities.ola import chunk_spans, overlap_add, region_weights
+from src.compiled import ShapeBucketCompiler
+from src.edit_cache import EditCache, cache_key, tensor_digest
+from src.shared_weights import has_shared_weights, load_shared_component, empty_component
+from src.tome import apply_token_merging
+from src.deepcache import StepCache
+from src.onnx_backend import load_onnx_runners
+from src.offload import OffloadScheduler
+from src.tiled_vae import GroupNormSync
+from src.quantization import (
+    resolve_quantization, quantize_component, quantized_cache_path, save_quantized, load_quantized,
+)
 
 # Suppress partial model loading warning
 os.environ["HF_HOME"] = os.path.expanduser("~/.cache/huggingface")
@@ -89,38 +109,427 @@ schedular_config = """
 - `_diffusers_version`: "0.15.0.dev0"  # 사용된 diffusers 버전
 """
 
+# ========== Precision policy ==========
+# component별 연산 dtype. 값은 "fp32" / "bf16" / "fp16" 중 하나
+DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16, "fp16": torch.float16}
+PRECISION_POLICIES = {
+    "fp32":     {"vae": "fp32", "unet": "fp32", "text_encoder": "fp32", "vocoder": "fp32"},
+    "fp16":     {"vae": "fp16", "unet": "fp16", "text_encoder": "fp16", "vocoder": "fp16"},
+    "bf16":     {"vae": "bf16", "unet": "bf16", "text_encoder": "bf16", "vocoder": "bf16"},
+    "mixed":    {"vae": "fp32", "unet": "fp16", "text_encoder": "fp16", "vocoder": "fp32"},  # VAE/vocoder는 fp32 유지
+    "cpu_bf16": {"vae": "fp32", "unet": "bf16", "text_encoder": "bf16", "vocoder": "fp32"},  # CPU autocast(bf16) 경로
+}
+
+
+def resolve_precision(precision: Union[str, Dict[str, str]], device: torch.device) -> Dict[str, torch.dtype]:
+    r"""preset 이름 또는 {component: "fp32"|"bf16"|"fp16"} dict -> {component: torch.dtype}.
+    지정하지 않은 component는 fp32.
+    """
+    if isinstance(precision, str):
+        if precision not in PRECISION_POLICIES:
+            raise ValueError(f"Unknown precision policy: {precision} (choose from {list(PRECISION_POLICIES)})")
+        precision = PRECISION_POLICIES[precision]
+    policy = {name: torch.float32 for name in PRECISION_POLICIES["fp32"]}
+    for name, dtype in precision.items():
+        if name not in policy:
+            raise ValueError(f"Unknown component in precision policy: {name}")
+        if dtype not in DTYPES:
+            raise ValueError(f"Invalid dtype for {name}: {dtype} (choose from {list(DTYPES)})")
+        policy[name] = DTYPES[dtype]
+    if device.type == "cpu" and torch.float16 in policy.values():
+        raise ValueError("fp16 is not supported on CPU, use bf16 (e.g. precision='cpu_bf16')")
+    return policy
+
+
+# ========== Components ==========
+# name -> (class, subfolder). tokenizer/scheduler 외에는 첫 사용 시점에 로드 (lazy)
+COMPONENTS = {
+    'vae': AutoencoderKL,
+    'tokenizer': RobertaTokenizerFast,
+    'text_encoder': ClapTextModelWithProjection,
+    'unet': UNet2DConditionModel,
+    'vocoder': SpeechT5HifiGan,
+    'scheduler': DDIMScheduler,
+}
+MODEL_COMPONENTS = ['vae', 'text_encoder', 'unet', 'vocoder']
+
+# UNet attention 계산 방식 (set_attention_backend)
+# - default: QK^T 전체를 materialize (diffusers AttnProcessor)
+# - sdpa: torch scaled_dot_product_attention (flash / memory-efficient kernel)
+# - sliced: batch*head 축을 slice_size개씩 나눠 순차 계산 (peak memory 감소, 느림)
+ATTENTION_BACKENDS = ['default', 'sdpa', 'sliced']
+
+
+def offload_stage(*names, prefetch=None):
+    r"""method 실행 동안 names component를 device에 둠 (AudioLDM.enable_offload). 끝나면 prefetch component를 미리 복사."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            with self._stage(*names, prefetch=prefetch):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class LazyComponent:
+    r"""`aldm.unet` 등 component 접근 시 아직 로드 전이면 그 component만 로드."""
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj.load_component(self.name)
+
 
 class AudioLDM(nn.Module):
-    
-    def __init__(self, device='cuda', repo_id="cvssp/audioldm"):
+    vae = LazyComponent()
+    tokenizer = LazyComponent()
+    text_encoder = LazyComponent()
+    unet = LazyComponent()
+    vocoder = LazyComponent()
+
+    def __init__(
+        self,
+        device='cuda',
+        repo_id="cvssp/audioldm",
+        precision: Union[str, Dict[str, str]] = "fp32",
+        use_safetensors: Optional[bool] = None,  # None: local dir에 *.safetensors가 있으면 사용
+        lazy: bool = True,
+        compile: Union[bool, Dict[str, Any]] = False,  # True 또는 enable_compile kwargs
+        attention_backend: Optional[str] = None,  # "default" | "sdpa" | "sliced" (set_attention_backend)
+        shared_weights: Optional[str] = None,  # export_shared_weights 경로: mmap으로 worker 간 weight 공유
+        quantization: Optional[Union[str, Dict[str, str]]] = None,  # "cpu_int8" 등 profile 또는 {component: mode} (CPU 전용)
+        quantization_cache: Optional[str] = None,  # quantize된 component 저장 dir (다음 시작 때 재사용)
+    ):
         super().__init__()
+        t_init = time.perf_counter()
         self.device = torch.device(device)
-        pipe = AudioLDMPipeline.from_pretrained(repo_id, use_safetensors=False)
-
-        # Setup components and move to device
-        self.pipe = pipe
-        self.components = {
-            'vae': (pipe.vae, AutoencoderKL),
-            'tokenizer': (pipe.tokenizer, RobertaTokenizerFast),
-            'text_encoder': (pipe.text_encoder, ClapTextModelWithProjection),
-            'unet': (pipe.unet, UNet2DConditionModel),
-            'vocoder': (pipe.vocoder, SpeechT5HifiGan),
-            'scheduler': (pipe.scheduler, DDIMScheduler)
-        }
-        
-        # Initialize and validate components
-        for name, (component, expected_type) in self.components.items():
-            if name in ['vae', 'text_encoder', 'unet', 'vocoder']:
-                component = component.to(self.device)
-            assert isinstance(component, expected_type), f"{name} type mismatch: {type(component)}"
-            setattr(self, name, component)
+        self.precision = resolve_precision(precision, self.device)
+        self.quantization = resolve_quantization(quantization)
+        if self.quantization and self.device.type != 'cpu':
+            print(f"Warning: int8 quantization은 CPU 전용 -> {self.device}에서는 무시")
+            self.quantization = {}
+        for name in self.quantization:  # quantized kernel은 fp32 입력 -> 해당 component autocast 끔
+            self.precision[name] = torch.float32
+        self.quantization_cache = quantization_cache
+        self.checkpoint_path = repo_id
+        self.use_safetensors = use_safetensors
+        self.shared_weights = shared_weights
+        self.load_times = {}  # component -> load sec (startup_report 용)
+        self._loaded = {}
+        self._load_lock = threading.RLock()
+
+        # scheduler와 config(json)만 즉시 로드: weight 없이 가벼움
+        self.scheduler = self.load_component('scheduler')
+        vae_config = AutoencoderKL.load_config(repo_id, subfolder='vae')
+        vocoder_config = SpeechT5HifiGan.config_class.from_pretrained(repo_id, subfolder='vocoder')
 
         self.evalmode = True
-        self.checkpoint_path = repo_id
         self.audio_duration = 10.24
-        self.original_waveform_length = int(self.audio_duration * self.vocoder.config.sampling_rate)  # 10.24 * 16000 = 163840
-        self.vae_scale_factor = 2 ** (len(self.vae.config.block_out_channels) - 1)  # 4
-        print(f'[INFO] audioldm.py: loaded AudioLDM!')
+        self.sampling_rate = vocoder_config.sampling_rate  # 16000
+        self.original_waveform_length = int(self.audio_duration * self.sampling_rate)  # 10.24 * 16000 = 163840
+        self.vae_scale_factor = 2 ** (len(vae_config['block_out_channels']) - 1)  # 4
+        self.vae_scaling_factor = vae_config['scaling_factor']  # 0.9228 (decode 시 vae 로드 없이 사용)
+        self.vocoder_hop = int(np.prod(vocoder_config.upsample_rates))  # 160 (mel frame 1개당 sample 수)
+        # mel_to_waveform 기본 chunk 설정: 10.24s (1024 frames) 이하는 한 번에
+        self.vocoder_chunk = dict(chunk_frames=1024, overlap_frames=32, max_batch=8)
+
+        # SDS (train_step) 설정
+        self.num_train_timesteps = self.scheduler.config.num_train_timesteps  # 1000
+        self.min_step = int(self.num_train_timesteps * 0.20)
+        self.max_step = int(self.num_train_timesteps * 0.90)
+        self.alphas_cumprod = self.scheduler.alphas_cumprod.to(self.device)
+
+        # sampler별 timestep/계수 table (stateless, (steps, strength)별 cache)
+        self.samplers = {name: cls.from_scheduler(self.scheduler) for name, cls in SAMPLERS.items()}
+        self.sampler = self.samplers['ddim']
+        self._tokenizer_lock = threading.Lock()  # fast tokenizer는 동시 호출 시 "Already borrowed" 에러
+
+        # seed 고정 edit 결과 cache (enable_edit_cache). model_revision (weight) + 실행 설정 (_cache_revision)이 cache key의 일부
+        self.edit_cache = None
+        # DDIM inversion 끝점 cache: (mixture, steps, strength)별 -> prompt / guidance를 바꿔도 재사용
+        # entry는 host (pinned)에 두고 hit 시에만 device로 -> VRAM 사용 없음
+        self.inversion_cache = EditCache(max_items=64, max_bytes=256 * 2**20, pin_memory=self.device.type == 'cuda')
+        self.model_revision = cache_key(
+            repo_id=repo_id, precision=self.precision, quantization=self.quantization, vae=dict(vae_config),
+            vocoder=vocoder_config.to_dict(), scheduler=dict(self.scheduler.config),
+        )
+
+        # compiled execution (opt-in): component 호출 경로별 ShapeBucketCompiler
+        self.compile_config = None
+        self._compiled = {}
+        if compile:
+            self.enable_compile(**(compile if isinstance(compile, dict) else {}))
+
+        # VAE 시간축 tiling (enable_vae_tiling). None이면 한 번에
+        self.vae_tiling = None
+        # onnxruntime 실행 (enable_onnx): component 이름 -> OnnxRunner
+        self._onnx = {}
+        # stage별 component offload (enable_offload)
+        self.offload = None
+
+        # (backend, slice_size); unet 로드 시 적용. None이면 diffusers가 고른 processor 그대로
+        self.attention_backend = None
+        self.token_merging = None  # set_token_merging
+        self.step_caching = None  # enable_step_caching
+        self._sds_step_cache = None
+        self._sds_t = None
+        if attention_backend is not None:
+            self.set_attention_backend(attention_backend)
+
+        if not lazy:
+            for name in COMPONENTS:
+                self.load_component(name)
+        self.load_times['init'] = time.perf_counter() - t_init
+        print(f'[INFO] audioldm.py: loaded AudioLDM! ({"lazy" if lazy else "eager"}, {self.load_times["init"]:.2f}s)')
+
+    def _safetensors_available(self, name):
+        folder = os.path.join(self.checkpoint_path, name)
+        return os.path.isdir(folder) and any(f.endswith('.safetensors') for f in os.listdir(folder))
+
+    def load_component(self, name):
+        if name in self._loaded:
+            return self._loaded[name]
+        with self._load_lock:  # 여러 thread가 동시에 첫 접근하는 경우 한 번만 로드
+            if name in self._loaded:
+                return self._loaded[name]
+            start = time.perf_counter()
+            cls = COMPONENTS[name]
+            kwargs = {}
+            if name in MODEL_COMPONENTS:
+                use_safetensors = self._safetensors_available(name) if self.use_safetensors is None else self.use_safetensors
+                # safetensors는 mmap으로 읽고, low_cpu_mem_usage로 random init 없이 바로 weight 할당
+                kwargs = dict(use_safetensors=use_safetensors, low_cpu_mem_usage=True)
+            quant_mode = self.quantization.get(name)
+            quant_path = quantized_cache_path(self.quantization_cache, name, quant_mode, self.model_revision) \
+                if quant_mode and self.quantization_cache else None
+            if quant_path is not None and os.path.exists(quant_path):  # fp32 weight 로드 / requantize 생략
+                component, quant_mode = load_quantized(quant_path, empty_component(cls, self.checkpoint_path, name)), None
+            elif name in MODEL_COMPONENTS and has_shared_weights(self.shared_weights, name):
+                component = load_shared_component(cls, self.checkpoint_path, name, self.shared_weights)
+            else:
+                component = cls.from_pretrained(self.checkpoint_path, subfolder=name, **kwargs)
+            assert isinstance(component, cls), f"{name} type mismatch: {type(component)}"
+            if name in MODEL_COMPONENTS:
+                # offload 중이면 host에 두고 scheduler가 stage마다 device로 복사
+                target = self.device if self.offload is None else torch.device('cpu')
+                component = component.to(target, dtype=self._weight_dtype(name, component))
+                component.requires_grad_(False)  # weight는 항상 고정 (SDS gradient는 입력 mel로만)
+                if quant_mode:
+                    component = quantize_component(component, quant_mode)
+                    if quant_path is not None:
+                        save_quantized(component, quant_mode, quant_path)
+                if name == 'unet':
+                    self._apply_unet_processors(component)
+                if self.offload is not None:
+                    self.offload.register(name, component)
+                self._modules[name] = component  # add_module은 hasattr로 LazyComponent를 다시 호출하므로 직접 등록
+            self._loaded[name] = component
+            self.load_times[name] = time.perf_counter() - start
+            return component
+
+    @property
+    def pipe(self):  # 호환용: 모든 component를 로드하여 AudioLDMPipeline 구성
+        return AudioLDMPipeline(**{name: self.load_component(name) for name in COMPONENTS})
+
+    def startup_report(self):
+        print(f"{'component':>12} | {'load (s)':>8}")
+        for name, sec in self.load_times.items():
+            print(f"{name:>12} | {sec:8.2f}")
+        missing = [name for name in COMPONENTS if name not in self._loaded]
+        if missing:
+            print(f"not loaded: {missing}")
+        return dict(self.load_times)
+
+    def _weight_dtype(self, name, component):
+        # fp16 VAE는 force_upcast 설정 시 weight를 fp32로 두고 autocast(fp16) 안에서만 실행
+        #   -> group_norm / softmax / exp(latent_dist) 등은 autocast가 fp32로 upcast
+        dtype = self.precision[name]
+        if name == 'vae' and dtype == torch.float16 and getattr(component.config, 'force_upcast', False):
+            return torch.float32
+        return dtype
+
+    def _autocast(self, name):
+        dtype = self.precision[name]
+        return torch.autocast(device_type=self.device.type, dtype=dtype, enabled=dtype != torch.float32)
+
+    def set_attention_backend(self, backend: str = "sdpa", slice_size: Optional[Union[int, str]] = None):
+        r"""UNet (CrossAttnDownBlock2D / CrossAttnUpBlock2D / mid block) attention processor 선택.
+        - backend: "default" | "sdpa" | "sliced"
+        - slice_size (`int`, optional): sliced에서 한 번에 계산할 batch*head 수. None이면 "auto" (head_dim // 2).
+        unet이 아직 로드되지 않았으면 로드 시점에 적용.
+        """
+        if backend not in ATTENTION_BACKENDS:
+            raise ValueError(f"Unknown attention backend '{backend}'. Choose from {ATTENTION_BACKENDS}")
+        if backend == 'sdpa' and not hasattr(F, 'scaled_dot_product_attention'):
+            raise ValueError("attention backend 'sdpa' requires PyTorch >= 2.0")
+        self.attention_backend = (backend, slice_size)
+        if 'unet' in self._loaded:
+            self._apply_unet_processors(self._loaded['unet'])
+            self._compiled.pop('unet', None)  # 이전 processor로 trace된 graph 폐기
+
+    def set_token_merging(self, ratio: float = 0.5, min_tokens: int = 1024):
+        r"""UNet self-attention에 ToMe (src/tome.py) 적용. editing / SDS 모두 _predict_noise를 거치므로 같이 적용됨.
+        - ratio: attention 전에 합칠 token 비율 (0 ~ 0.5). 0이면 해제.
+        - min_tokens: token 수가 이 이상인 block만 (기본: latent [256,16] 기준 상위 두 해상도)
+        """
+        assert 0 <= ratio <= 0.5, ratio
+        self.token_merging = dict(ratio=ratio, min_tokens=min_tokens) if ratio > 0 else None
+        if 'unet' in self._loaded:
+            self._apply_unet_processors(self._loaded['unet'])
+            self._compiled.pop('unet', None)
+
+    def enable_step_caching(self, interval: int = 3, branch: int = 1, sds: bool = True):
+        r"""DeepCache식 step caching (src/deepcache.py). interval번에 한 번만 UNet 전체를 돌리고,
+        나머지 step은 저장된 deep feature + 얕은 block (down_blocks[:branch] / up_blocks[-branch:])만 계산.
+        - interval (`int`, default=3): full step 주기. 1이면 매 step full (= caching 없음)
+        - branch (`int`, default=1): cached step에서 다시 계산할 얕은 block 쌍 수 (클수록 정확, 느림)
+        - sds (`bool`, default=True): train_step (SDS)에도 적용. interval번의 호출 동안 timestep을 고정하고 feature 재사용.
+        step caching 중에는 UNet을 eager로 실행 (compile bucket 미사용).
+        """
+        self.step_caching = dict(interval=interval, branch=branch)
+        self._sds_step_cache = StepCache(interval, branch) if sds else None
+
+    def disable_step_caching(self):
+        self.step_caching = None
+        self._sds_step_cache = None
+
+    def _apply_unet_processors(self, unet):  # attention backend -> (그 위에) token merging 순서로
+        self._apply_attention_backend(unet)
+        apply_token_merging(unet, **(self.token_merging or dict(ratio=0)))
+
+    def _apply_attention_backend(self, unet):
+        if self.attention_backend is None:
+            return
+        backend, slice_size = self.attention_backend
+        if backend == 'default':
+            unet.set_attn_processor(AttnProcessor())
+        elif backend == 'sdpa':
+            unet.set_attn_processor(AttnProcessor2_0())
+        elif slice_size is None or isinstance(slice_size, str):
+            unet.set_attention_slice(slice_size or "auto")
+        else:
+            unet.set_attn_processor(SlicedAttnProcessor(slice_size))
+
+    def enable_compile(self, components=('unet', 'vae', 'vocoder'), mode="default", max_buckets=4):
+        r"""UNet / VAE / vocoder 호출을 torch.compile. shape bucket별 graph cache, 실패 시 eager.
+        - mode: torch.compile mode ("default", "reduce-overhead", "max-autotune")
+        - max_buckets: 호출 경로별 compile할 shape 수 상한. 넘으면 eager.
+        compile은 각 bucket의 첫 호출에서 일어남 (compile_report로 확인).
+        """
+        self.compile_config = dict(components=set(components), mode=mode, max_buckets=max_buckets)
+        self._compiled = {}
+
+    def disable_compile(self):
+        self.compile_config = None
+        self._compiled = {}
+
+    def _call(self, name, op, fn, *args):  # component 호출: compile mode면 shape bucket별 compiled fn, 아니면 eager
+        if self.compile_config is None or name not in self.compile_config['components']:
+            return fn(*args)
+        runner = self._compiled.get(op)
+        if runner is None:
+            runner = self._compiled.setdefault(op, ShapeBucketCompiler(
+                fn, op, mode=self.compile_config['mode'], max_buckets=self.compile_config['max_buckets']))
+        return runner(*args)
+
+    def enable_vae_tiling(self, tile_frames: int = 64, overlap_frames: int = 16, max_batch: int = 8, sync_groupnorm: bool = True):
+        r"""VAE encode / decode를 시간 축으로 겹치는 tile로 나눠 실행하고 crossfade로 이어붙임.
+        - tile_frames / overlap_frames (`int`): tile 길이 / 겹침 (latent frame, 1 frame = mel 4 frame = 40ms)
+        - max_batch (`int`): VAE 한 번에 넣을 tile 수 (item 경계와 상관없이) -> peak activation memory 상한.
+          tile_frames보다 짧은 입력도 batch를 max_batch 단위로 나눠 실행
+        - sync_groupnorm (`bool`): tile을 두 번 돌려 GroupNorm 통계를 입력 전체 기준으로 맞춤 (src/tiled_vae.py). 연산 2배.
+          끄면 tile마다 정규화가 달라져 오차가 큼. 켜면 tile pass는 eager로 실행 (enable_compile의 'vae' 설정은 적용 안 됨).
+        encode는 posterior mean / std를 tile별로 구해 blend 한 뒤 sampling. VAE mid block attention이 tile 안으로 제한되므로
+        결과는 untiled와 완전히 같지는 않음 (overlap이 클수록 가까움).
+        """
+        assert 0 <= overlap_frames < tile_frames, (overlap_frames, tile_frames)
+        self.vae_tiling = dict(tile_frames=tile_frames, overlap_frames=overlap_frames, max_batch=max_batch,
+                               sync_groupnorm=sync_groupnorm)
+
+    def disable_vae_tiling(self):
+        self.vae_tiling = None
+
+    def _vae_call(self, op, fn, x, scale_in, scale_out):  # x: ts[B, C, T, M] (시간 축 dim 2) -> fn(x) (tiling 가능하면 tile별)
+        cfg = self.vae_tiling
+        if cfg is None:
+            return self._call('vae', op, fn, x)
+        if x.shape[2] // scale_in <= cfg['tile_frames']:  # 짧은 입력: tile 없이 batch만 max_batch 단위로
+            outputs = [self._call('vae', op, fn, batch) for batch in x.split(cfg['max_batch'])]
+            if isinstance(outputs[0], tuple):
+                return tuple(torch.cat(o) for o in zip(*outputs))
+            return torch.cat(outputs)
+        B, total = x.shape[0], x.shape[2] // scale_in  # latent frame 단위
+        spans = chunk_spans(total, cfg['tile_frames'], cfg['overlap_frames'])
+        tiles = torch.cat([x[:, :, s * scale_in:e * scale_in] for s, e in spans])  # ts[n*B, C, L, M] (tile-major)
+        if cfg['sync_groupnorm']:  # 1차: GroupNorm 통계 수집, 2차: 전체 통계로 실행 (GroupNorm hook -> compile 없이 eager)
+            sync = GroupNormSync(self.vae, B, spans, total, tiles.shape[-2:])
+            with sync.record():  # 1st pass: GroupNorm 통계만 수집
+                for start in range(0, tiles.shape[0], cfg['max_batch']):
+                    sync.rows = torch.arange(start, min(start + cfg['max_batch'], tiles.shape[0]))
+                    fn(tiles[start:start + cfg['max_batch']])
+            outputs = []
+            with sync.apply():
+                for start in range(0, tiles.shape[0], cfg['max_batch']):
+                    sync.rows = torch.arange(start, min(start + cfg['max_batch'], tiles.shape[0]))
+                    outputs.append(fn(tiles[start:start + cfg['max_batch']]))
+        else:
+            outputs = [self._call('vae', op, fn, batch) for batch in tiles.split(cfg['max_batch'])]
+        outputs = [torch.cat(o) for o in zip(*outputs)] if isinstance(outputs[0], tuple) else [torch.cat(outputs)]
+        merged = []
+        for out in outputs:  # ts[n*B, C', L', M'] -> 시간 축을 마지막으로 옮겨 overlap_add
+            out = out.reshape(len(spans), B, *out.shape[1:]).transpose(-1, -2)
+            merged.append(overlap_add(out, spans, total, scale=scale_out).transpose(-1, -2))
+        return tuple(merged) if len(merged) > 1 else merged[0]
+
+    def enable_onnx(self, onnx_dir: str, components=('vocoder', 'vae'), num_threads: int = 0):
+        r"""vocoder (mel_to_waveform) / VAE decoder (decode_latents)를 onnxruntime으로 실행.
+        graph는 src/onnx_backend.py로 미리 export (fp32, batch / 시간 축 dynamic). 다른 stage는 그대로 PyTorch.
+        """
+        self._onnx = load_onnx_runners(onnx_dir, components, self.device, num_threads)
+
+    def disable_onnx(self):
+        self._onnx = {}
+
+    def enable_offload(self, mode: str = "sequential"):
+        r"""stage (text encode / VAE encode / UNet / VAE decode / vocoder)마다 필요한 component만 device에 올림 (src/offload.py).
+        - "resident": 전부 device (= disable_offload)
+        - "sequential": 다음 stage의 component를 별도 CUDA stream으로 prefetch. peak = 인접한 두 component
+        - "minimal": prefetch 없음. peak = 가장 큰 component (UNet) 하나
+        남는 device memory만큼 batch를 키울 수 있음. weight를 매번 새로 할당하므로 compile과 같이 쓰면 recompile 될 수 있음.
+        """
+        self.disable_offload()
+        if mode == 'resident':
+            return
+        if self.device.type != 'cuda':
+            print(f"Warning: offload는 CUDA device에서만 의미 있음 -> {self.device}에서는 무시")
+            return
+        self.offload = OffloadScheduler(self.device, mode)
+        for name, component in self._loaded.items():
+            if name in MODEL_COMPONENTS:
+                self.offload.register(name, component)
+
+    def disable_offload(self):
+        if self.offload is not None:
+            self.offload.restore()
+            self.offload = None
+
+    def _stage(self, *names, prefetch=None):  # offload 중이면 names만 device에 두고 실행
+        if self.offload is None:
+            return nullcontext()
+        names = [name for name in names if name not in self._onnx]
+        for name in names:
+            self.load_component(name)
+        if prefetch in self._onnx or prefetch not in self._loaded:  # 아직 로드 안 된 component는 prefetch 안 함
+            prefetch = None
+        return self.offload.stage(*names, prefetch=prefetch)
+
+    def compile_report(self):
+        for op, runner in self._compiled.items():
+            for key, sec in runner.compile_times.items():
+                shapes = [k[0] for k in key if isinstance(k, tuple)]
+                print(f"[INFO] audioldm.py: compiled {op} {shapes} ({sec:.2f}s)")
 
     def eval_(self):
         self.evalmode = True
@@ -141,6 +550,11 @@ class AudioLDM(nn.Module):
                 return_format[key_] = batch[key_]
         return return_format[key]
     
+    def _tokenize(self, *args, **kwargs):
+        with self._tokenizer_lock:
+            return self.tokenizer(*args, **kwargs)
+
+    @offload_stage('text_encoder', prefetch='vae')
     def encode_prompt(self, prompts: Union[str, List[str]], do_cfg=True):  # -> [2*B,512]
         # 1. Batch size 결정
         if prompts is not None and isinstance(prompts, str):
@@ -151,7 +565,7 @@ class AudioLDM(nn.Module):
             raise ValueError(f"Invalid prompts: {prompts}")
         
         # 2. Prompt embedding 생성
-        text_inputs = self.tokenizer(
+        text_inputs = self._tokenize(
             prompts,
             padding="max_length",
             max_length=self.tokenizer.model_max_length,
@@ -161,19 +575,20 @@ class AudioLDM(nn.Module):
         text_input_ids, attention_mask = text_inputs.input_ids.to(self.device), text_inputs.attention_mask.to(self.device)
 
         # Truncation 경고
-        untruncated_ids = self.tokenizer(prompts, padding="longest", return_tensors="pt").input_ids
+        untruncated_ids = self._tokenize(prompts, padding="longest", return_tensors="pt").input_ids
         if untruncated_ids.shape[-1] >= text_input_ids.shape[-1] and not torch.equal(text_input_ids, untruncated_ids):
             removed_text = self.tokenizer.batch_decode(untruncated_ids[:, self.tokenizer.model_max_length - 1 : -1])
             print(f"The following part of your input was truncated because CLAP can only handle sequences up to {self.tokenizer.model_max_length} tokens: {removed_text}")
 
-        # Text embedding 계산 및 정규화
-        prompt_embeds = self.text_encoder(text_input_ids.to(self.device), attention_mask=attention_mask.to(self.device)).text_embeds
+        # Text embedding 계산 및 정규화 (정규화 이후는 fp32 유지, UNet autocast가 필요 시 cast)
+        with self._autocast('text_encoder'):
+            prompt_embeds = self.text_encoder(text_input_ids.to(self.device), attention_mask=attention_mask.to(self.device)).text_embeds
         # additional L_2 normalization over each hidden-state
-        prompt_embeds = F.normalize(prompt_embeds, dim=-1).to(dtype=self.text_encoder.dtype, device=self.device)  # -> ts[1,512]
+        prompt_embeds = F.normalize(prompt_embeds.float(), dim=-1).to(device=self.device)  # -> ts[1,512]
 
         # 3. get unconditional embeddings for classifier free guidance
         if do_cfg:
-            uncond_input = self.tokenizer(
+            uncond_input = self._tokenize(
                 [""] * batch_size,
                 padding="max_length",
                 max_length=prompt_embeds.shape[1],
@@ -181,36 +596,157 @@ class AudioLDM(nn.Module):
                 return_tensors="pt",
             )
             uncond_input_ids, attention_mask = uncond_input.input_ids.to(self.device), uncond_input.attention_mask.to(self.device)
-            uncond_prompt_embeds = self.text_encoder(uncond_input_ids, attention_mask=attention_mask).text_embeds
+            with self._autocast('text_encoder'):
+                uncond_prompt_embeds = self.text_encoder(uncond_input_ids, attention_mask=attention_mask).text_embeds
             # additional L_2 normalization over each hidden-state
-            uncond_prompt_embeds = F.normalize(uncond_prompt_embeds, dim=-1)  # -> ts[1,512]
+            uncond_prompt_embeds = F.normalize(uncond_prompt_embeds.float(), dim=-1)  # -> ts[1,512]
 
             assert (uncond_prompt_embeds == uncond_prompt_embeds[0][None]).all()  # All the same
             prompt_embeds = torch.cat([uncond_prompt_embeds, prompt_embeds])  # 1st [B,512]: uncond, 2nd [B,512] columns: cond
         return prompt_embeds  # ts[2*B,512]
 
-    def encode_audios(self, x):  # ts[B, 1, T:1024, M:64] -> ts[B, C:8, lT:256, lM:16]
-        encoder_posterior = self.vae.encode(x)
-        unscaled_z = encoder_posterior.latent_dist.sample()
-        z = unscaled_z * self.vae.config.scaling_factor  # Normalize z to have std=1 / factor: 0.9227914214134216
+    @offload_stage('vae', prefetch='unet')
+    def encode_audios(self, x, generator=None, sample=True):  # ts[B, 1, T:1024, M:64] -> ts[B, C:8, lT:256, lM:16]
+        vae = self.vae
+
+        def posterior(x):  # posterior (mean, std)만 compile 경로에서 계산, sampling은 밖에서 (= latent_dist.sample())
+            latent_dist = vae.encode(x).latent_dist
+            return latent_dist.mean, latent_dist.std
+
+        with self._autocast('vae'):
+            mean, std = self._vae_call('vae_encode', posterior, x, self.vae_scale_factor, 1)
+            # sample=False: posterior mean (deterministic, DDIM inversion용)
+            unscaled_z = mean + std * self._randn(mean, generator) if sample else mean
+        z = unscaled_z.float() * self.vae_scaling_factor  # Normalize z to have std=1 / factor: 0.9227914214134216
         return z
 
+    @offload_stage('vae', prefetch='vocoder')
     def decode_latents(self, latents):  # ts[B, C:8, lT:256, lM:16] -> ts[B, 1, T:1024, M:64]
-        latents = 1 / self.vae.config.scaling_factor * latents
-        mel_spectrogram = self.vae.decode(latents).sample
-        return mel_spectrogram
+        latents = 1 / self.vae_scaling_factor * latents
+        if 'vae' in self._onnx:
+            return self._onnx['vae'](latents).float()
+        vae = self.vae
+        with self._autocast('vae'):
+            mel_spectrogram = self._vae_call('vae_decode', lambda z: vae.decode(z).sample, latents, 1, self.vae_scale_factor)
+        return mel_spectrogram.float()
 
-    def mel_to_waveform(self, mel_spectrogram):  # ts[B, 1, T:1024, M:64] -> ts[B, N:163872]
+    @offload_stage('vocoder')
+    def mel_to_waveform(  # ts[B, 1, T:1024, M:64] -> ts[B, N:163840]
+        self,
+        mel_spectrogram,
+        chunk_frames: Optional[int] = None,
+        overlap_frames: Optional[int] = None,
+        max_batch: Optional[int] = None,
+        to_host: bool = True,
+    ):
+        r"""HiFi-GAN vocoding. 긴 mel은 겹치는 chunk로 잘라 item들의 chunk를 함께 batch로 돌리고 crossfade로 이어붙임.
+        - chunk_frames / overlap_frames (`int`, optional): chunk 길이 / 겹침 (mel frame). 기본값은 self.vocoder_chunk.
+          T <= chunk_frames면 chunk 없이 한 번에.
+        - max_batch (`int`, optional): vocoder 한 번에 넣을 chunk 수 (peak activation memory 상한).
+        - to_host (`bool`): True (기본)면 결과를 cpu로. False면 device에 유지 (동기 복사 없음, 내부 후처리용).
+        """
         if mel_spectrogram.dim() == 4:
             mel_spectrogram = mel_spectrogram.squeeze(1)
         elif mel_spectrogram.dim() == 2:
             mel_spectrogram = mel_spectrogram.unsqueeze(0)
         assert mel_spectrogram.dim() == 3, mel_spectrogram.dim()
-        waveform = self.vocoder(mel_spectrogram)  # ts[B,163872]
+        chunk_frames = chunk_frames or self.vocoder_chunk['chunk_frames']
+        overlap_frames = overlap_frames if overlap_frames is not None else self.vocoder_chunk['overlap_frames']
+        max_batch = max_batch or self.vocoder_chunk['max_batch']
+
+        B, T, _ = mel_spectrogram.shape
+        spans = chunk_spans(T, chunk_frames, overlap_frames)
+        # ts[n*B, L, M]: chunk-major로 쌓아서 item 경계와 상관없이 batch
+        chunks = torch.cat([mel_spectrogram[:, s:e] for s, e in spans])
+        waveforms, vocoder = [], self.vocoder
+        for batch in chunks.split(max_batch):
+            if 'vocoder' in self._onnx:
+                waveforms.append(self._onnx['vocoder'](batch))
+                continue
+            with self._autocast('vocoder'):
+                waveforms.append(self._call('vocoder', 'vocoder', vocoder, batch.to(self.precision['vocoder'])).float())
         # we always cast to float32 as this does not cause significant overhead and is compatible with bfloat16
-        waveform = waveform[:, :self.original_waveform_length]
-        waveform = waveform.cpu().float()
-        return waveform  # ts[B,163872]
+        waveform = torch.cat(waveforms).reshape(len(spans), B, -1)  # ts[n, B, L*hop]
+        if len(spans) == 1:
+            waveform = waveform[0]
+        else:
+            waveform = overlap_add(waveform, spans, T, scale=self.vocoder_hop)
+        waveform = waveform[:, :T * self.vocoder_hop]
+        if to_host:
+            waveform = waveform.cpu()
+        return waveform  # ts[B,163840]
+
+    def _predict_noise(self, latent_model_input, t, class_labels, cross_attention_kwargs=None, step_cache=None):  # -> fp32 eps
+        unet = self.unet
+        with self._autocast('unet'):
+            if step_cache is not None and cross_attention_kwargs is None:  # deep feature 재사용 (eager)
+                noise_pred = step_cache(unet, latent_model_input, t, class_labels)
+            elif cross_attention_kwargs is not None:  # dict 인자는 compile bucket에 넣지 않음 -> eager
+                noise_pred = unet(
+                    latent_model_input, t,
+                    encoder_hidden_states=None,
+                    class_labels=class_labels,
+                    cross_attention_kwargs=cross_attention_kwargs,
+                ).sample
+            else:
+                noise_pred = self._call(
+                    'unet', 'unet',
+                    lambda x, t, c: unet(x, t, encoder_hidden_states=None, class_labels=c).sample,
+                    latent_model_input, t, class_labels,
+                )
+        return noise_pred.float()  # scheduler 연산은 fp32로
+
+    @offload_stage('vae', 'unet')  # SDS는 매 step VAE + UNet 둘 다 사용
+    def train_step(self, batch: dict, guidance_scale: float = 100, t: Optional[int] = None, num_timesteps: int = 1):  # SDS
+        r"""SDS gradient를 batch의 mel로 backward.
+        - num_timesteps (`int`): K. 같은 latent에 (timestep, noise) K쌍을 뽑아 UNet 한 번 (batch 2*K*B)으로 예측하고
+          K개 gradient를 평균 -> 같은 iteration 수에서 gradient noise가 작음. K=1이면 기존 single-timestep SDS와 같음.
+        - t: 주면 timestep 고정 (scalar 또는 ts[K*B], k-major)
+        """
+        x = self.get_input(batch, 'mel').to(self.device)  # ts[B, 1, T:1024, M:64]
+        x = x.reshape(-1, 1, *x.shape[-2:])
+        text = self.get_input(batch, 'text')
+        prompt_embeds = self.encode_prompt(text, do_cfg=True)
+
+        # Encode mel to latents (with grad) / dtype은 precision policy가 결정
+        latent = self.encode_audios(x)
+        B, K = latent.shape[0], num_timesteps
+
+        step_cache = self._sds_step_cache
+        if t is None and step_cache is not None and not step_cache.refresh_due((2 * K * B,) + latent.shape[1:]):
+            t = self._sds_t  # cached step: deep feature를 만든 full step과 같은 timestep
+        if t is None:
+            t = torch.randint(self.min_step, self.max_step + 1, (K * B,), device=self.device).long()
+        t = torch.as_tensor(t, device=self.device).long().reshape(-1)
+        t = t.expand(K * B) if t.numel() == 1 else t
+        assert t.numel() == K * B, f'expected {K * B} timesteps, got {t.numel()}'
+        self._sds_t = t
+        assert ((0 <= t) & (t < self.num_train_timesteps)).all(), f'invalid timestep t={t}'
+
+        # Predict noise without grad (K개 timestep을 batch 축으로: ts[K*B, ...], k-major)
+        with torch.no_grad():
+            latents = latent.repeat(K, 1, 1, 1)
+            noise = torch.randn_like(latents)
+            alpha_t = self.alphas_cumprod[t].reshape(-1, 1, 1, 1)
+            latents_noisy = alpha_t.sqrt() * latents + (1 - alpha_t).sqrt() * noise  # scheduler.add_noise와 동일 (stateless)
+            uncond_embeds, cond_embeds = prompt_embeds.chunk(2)
+            class_labels = torch.cat([uncond_embeds.repeat(K, 1), cond_embeds.repeat(K, 1)])
+            noise_pred = self._predict_noise(torch.cat([latents_noisy] * 2), torch.cat([t] * 2), class_labels,
+                                             step_cache=step_cache)
+
+        # Guidance . High value from paper
+        noise_pred_uncond, noise_pred_text = noise_pred.chunk(2)
+        noise_pred = noise_pred_uncond + guidance_scale * (noise_pred_text - noise_pred_uncond)
+
+        # Calculate and apply gradients
+        w = (1 - self.alphas_cumprod[t]).reshape(-1, 1, 1, 1)
+        grad = (w * (noise_pred - noise)).reshape(K, B, *latent.shape[1:]).mean(0)  # K개 timestep 평균
+        latent.backward(gradient=grad, retain_graph=True)
+
+        noise_mse = ((noise_pred - noise) ** 2).mean().item()
+        uncond, cond = noise_pred_uncond.abs().mean().item(), noise_pred_text.abs().mean().item()
+        c_minus_unc = (noise_pred_uncond - noise_pred_text).abs().mean().item()
+        return (noise_mse, uncond, cond, c_minus_unc)
 
     @torch.no_grad()
     def ddim_noising(  # ts[B, C:8, lT:256, lM:16] -> ts[B, C:8, lT:256, lM:16]
@@ -218,36 +754,24 @@ class AudioLDM(nn.Module):
         latents: torch.Tensor,
         num_inference_steps: int = 50,
         transfer_strength: int = 1,
+        solver: str = "ddim",
+        generator: Optional[List[torch.Generator]] = None,
     ):
 
-        device = latents.device
-
-        # DDIM 전용 Scheduler로 세팅
-        old_offset = self.scheduler.config.steps_offset
-
-        self.scheduler.config.steps_offset = 0
-        self.scheduler.set_timesteps(num_inference_steps, device=device)  
-        all_timesteps = self.scheduler.timesteps  # ts[980, 960, ..., 0] (length: num_inference_steps)
-        t_enc = int(transfer_strength * num_inference_steps)
-        used_timesteps = all_timesteps[-t_enc:]
-
-        noisy_latents = latents.clone()
+        # scheduler 상태는 건드리지 않고 cache된 table만 사용 (thread-safe)
+        tables = self.get_sampler(solver).tables(num_inference_steps, transfer_strength, latents.device)
 
         # # forward로 t=0 -> t=1 ... -> t=T 방향으로 노이즈 주입
         # for i, t in enumerate(reversed(used_timesteps)):
         #     noise = torch.randn_like(noisy_latents)
         #     noisy_latents = self.scheduler.add_noise(noisy_latents, noise, t)
 
-        self.scheduler.config.steps_offset = old_offset
-        
-        ##
-        noise = torch.randn_like(noisy_latents)
-        noisy_latents = self.scheduler.add_noise(noisy_latents, noise, all_timesteps[-t_enc])
-        ##
-
+        noise = self._randn(latents, generator)
+        noisy_latents = self.get_sampler(solver).add_noise(latents, noise, tables)  # t = used_timesteps[0]
         return noisy_latents
 
     @torch.no_grad()
+    @offload_stage('unet', prefetch='vae')
     def ddim_denoising(  # ts[B, C:8, lT:256, lM:16] -> ts[B, C:8, lT:256, lM:16]
         self,
         latents: torch.Tensor,
@@ -258,60 +782,218 @@ class AudioLDM(nn.Module):
         cross_attention_kwargs: Optional[Dict[str, Any]] = None,
         callback: Optional[Callable[[int, int, torch.Tensor], None]] = None,
         callback_steps: Optional[int] = 1,
+        guidance_interval: Optional[Tuple[int, int]] = None,
+        guidance_every: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+        solver: str = "ddim",
+        early_exit: Optional[float] = None,
+        early_exit_min_steps: int = 2,
     ):
         r"""
         - cross_attention_kwargs (`dict`, optional): cross attention 설정.
         - callback (`Callable`, optional): 특정 step마다 호출할 함수.
         - callback_steps (`int`, default=1): callback 호출 주기.
+        - guidance_interval (`(t_min, t_max)`, optional): 이 timestep 구간 [t_min, t_max]에서만 CFG 적용.
+        - guidance_every (`int`, default=1): k번째 step마다만 CFG 적용. 나머지 step은 cond branch만 실행 (UNet batch 절반).
+        - stats (`dict`, optional): 'unet_evals' (UNet에 들어간 latent 수), step caching 중이면 'cached_evals'도 누적.
+        - solver (`str`, default="ddim"): "ddim" | "dpmpp" (DPM-Solver++ 2M) | "unipc" (UniPC bh2).
+          multistep solver는 10~25 step으로 200 step DDIM과 비슷한 edit. noising 시작점 (transfer_strength)은 동일.
+        - early_exit (`float`, optional): item별 x0 예측의 step간 상대 변화량 ||x0_i - x0_{i-1}|| / ||x0_{i-1}||가
+          이 값보다 작아지면 그 item은 x0 예측으로 바로 마지막 step까지 건너뛰고 batch에서 빠짐 (남은 item만 UNet).
+          stats에 'early_exit_items', 'skipped_evals' 누적.
+        - early_exit_min_steps (`int`, default=2): 이 step 수 이전에는 멈추지 않음.
         Returns:
         - `torch.Tensor`: Denoised latents.
         """
 
-        device = latents.device
         do_cfg = guidance_scale > 1.0
-        old_offset = self.scheduler.config.steps_offset
+        sampler = self.get_sampler(solver)
+        tables = sampler.tables(num_inference_steps, transfer_strength, latents.device)
+        guided = self._guidance_schedule(tables, do_cfg, guidance_interval, guidance_every)
+        cond_embeds = prompt_embeds.chunk(2)[1] if do_cfg else prompt_embeds
 
-        self.scheduler.config.steps_offset = 0
-        self.scheduler.set_timesteps(num_inference_steps, device=device)  
-        all_timesteps = self.scheduler.timesteps
-        t_enc = int(transfer_strength * num_inference_steps)
-        used_timesteps = all_timesteps[-t_enc:]
-        
-        extra_step_kwargs = self.pipe.prepare_extra_step_kwargs(generator=None, eta=0.0)  # DDIM eta 설정
+        # step caching: 호출마다 새 cache (이전 edit의 feature는 다른 latent)
+        step_cache = StepCache(**self.step_caching) if self.step_caching else None
 
-        num_warmup_steps = len(used_timesteps) - t_enc * self.scheduler.order
+        # early exit: output = 전체 batch 결과, active = 아직 denoising 중인 item index
+        output, active, prev_x0 = (latents.clone(), torch.arange(latents.shape[0], device=latents.device), None) \
+            if early_exit is not None else (None, None, None)
 
-        for i, t in enumerate(used_timesteps):
+        state = None  # multistep solver의 이전 step 정보
+        for i in range(len(tables)):
+            t = tables.timesteps[i]  # 0-dim device tensor (host sync 없음)
             # expand latents if classifier free guidance
-            latent_model_input = (torch.cat([latents] * 2) if do_cfg else latents)
-            latent_model_input = self.scheduler.scale_model_input(latent_model_input, t)
+            latent_model_input = (torch.cat([latents] * 2) if guided[i] else latents)
 
             # predict noise
-            noise_pred = self.unet(
-                latent_model_input, t,
-                encoder_hidden_states=None,
-                class_labels=prompt_embeds,
-                cross_attention_kwargs=cross_attention_kwargs,
-            ).sample
+            class_labels = prompt_embeds if guided[i] else cond_embeds
+            if active is not None and len(active) < output.shape[0]:  # 끝난 item의 prompt 제외
+                class_labels = torch.cat([c[active] for c in class_labels.chunk(2)]) if guided[i] else class_labels[active]
+            cached = step_cache is not None and cross_attention_kwargs is None \
+                and not step_cache.refresh_due(latent_model_input.shape)  # cross_attention_kwargs가 있으면 full UNet
+            noise_pred = self._predict_noise(latent_model_input, t, class_labels, cross_attention_kwargs, step_cache)
+            if stats is not None:
+                stats['unet_evals'] = stats.get('unet_evals', 0) + latent_model_input.shape[0]
+                if cached:
+                    stats['cached_evals'] = stats.get('cached_evals', 0) + latent_model_input.shape[0]
 
             # guidance
-            if do_cfg:
+            if guided[i]:
                 noise_pred_uncond, noise_pred_text = noise_pred.chunk(2)
-                noise_pred = noise_pred_uncond + guidance_scale * (noise_pred_text - noise_pred_uncond)
+                noise_pred = torch.lerp(noise_pred_uncond, noise_pred_text, guidance_scale)
 
-            # DDIMScheduler의 step
-            latents = self.scheduler.step(noise_pred, t, latents, **extra_step_kwargs).prev_sample
+            # early exit: x0 예측이 수렴한 item은 마지막 step으로 jump하고 batch에서 제외
+            if early_exit is not None and i < len(tables) - 1:
+                x0 = sampler.predict_x0(noise_pred, i, latents, tables)
+                if prev_x0 is not None and i + 1 >= early_exit_min_steps:
+                    change = (x0 - prev_x0).flatten(1).norm(dim=1) / prev_x0.flatten(1).norm(dim=1).clamp(min=1e-8)
+                    done = change < early_exit
+                    if done.any():  # host sync는 early exit 모드에서만
+                        output[active[done]] = sampler.jump_to_final(noise_pred[done], i, latents[done], tables)
+                        keep = ~done
+                        if stats is not None:
+                            stats['early_exit_items'] = stats.get('early_exit_items', 0) + int(done.sum())
+                            stats['skipped_evals'] = stats.get('skipped_evals', 0) \
+                                + int(done.sum()) * sum(1 + g for g in guided[i + 1:])
+                        active, latents, noise_pred, x0 = active[keep], latents[keep], noise_pred[keep], x0[keep]
+                        state = select_items(state, keep)
+                        if len(active) == 0:
+                            break
+                prev_x0 = x0
+
+            # solver step: x_t -> x_{t_next}
+            latents, state = sampler.step(noise_pred, i, latents, tables, state)
 
             # callback
-            if i == len(used_timesteps) - 1 or ((i + 1) > num_warmup_steps and (i + 1) % self.scheduler.order == 0):
-                if callback is not None and i % callback_steps == 0:
-                    step_idx = i // getattr(self.scheduler, "order", 1)
-                    callback(step_idx, t, latents)
+            if callback is not None and i % callback_steps == 0:
+                if active is not None:
+                    output[active] = latents
+                callback(i, t, latents if active is None else output)
+
+        if active is not None:
+            output[active] = latents
+            return output
+        return latents
+
+    def make_generators(self, seed, batch_size):  # -> list[torch.Generator] (item별) or None
+        r"""seed: None | int (모든 item에 같은 seed) | list[int] (item별).
+        item의 noise는 자기 seed로만 결정 -> batch 구성과 상관없이 같은 (입력, seed)면 같은 결과.
+        """
+        if seed is None:
+            return None
+        seeds = [seed] * batch_size if isinstance(seed, int) else list(seed)
+        assert len(seeds) == batch_size, (len(seeds), batch_size)
+        return [torch.Generator(device=self.device).manual_seed(int(s)) for s in seeds]
+
+    @staticmethod
+    def _randn(like, generator=None):  # generator (item별 list)가 있으면 item마다 따로 sampling
+        if generator is None:
+            return torch.randn_like(like)
+        assert len(generator) == like.shape[0], (len(generator), like.shape[0])
+        return torch.cat([
+            torch.randn((1,) + like.shape[1:], generator=g, device=g.device, dtype=like.dtype)
+            for g in generator
+        ]).to(like.device)
+
+    def enable_edit_cache(self, max_items: int = 1024, cache_dir: Optional[str] = None):
+        self.edit_cache = EditCache(max_items=max_items, cache_dir=cache_dir)
+        return self.edit_cache
+
+    def disable_edit_cache(self):
+        self.edit_cache = None
 
-            self.scheduler.config.steps_offset = old_offset
+    def _cache_revision(self):  # 결과를 바꾸는 실행 설정까지 포함한 key. 조회 시점마다 계산 (설정이 바뀌면 key도 바뀜)
+        return cache_key(
+            model=self.model_revision, attention_backend=self.attention_backend, token_merging=self.token_merging,
+            step_caching=self.step_caching, vae_tiling=self.vae_tiling, onnx=sorted(self._onnx),
+        )
+
+    def _cached_edit(self, mel, text, seed, return_type, params, compute):  # -> mel/wav
+        r"""item 단위로 cache 조회, miss인 item만 compute(mel, prompts, seeds)로 한 batch에 계산.
+        compute는 return_type="mel"이면 mel (device), 아니면 waveform을 반환.
+        결과 위치는 cache를 안 거칠 때와 같음: "mel"은 device, "ts"는 cpu, "np"는 numpy.
+        """
+        B = mel.shape[0]
+        prompts = [text] * B if isinstance(text, str) else list(text)
+        seeds = [seed] * B if isinstance(seed, int) else list(seed)
+        kind = "mel" if return_type == "mel" else "wav"
+        revision = self._cache_revision()
+        keys = [
+            cache_key(mel=tensor_digest(mel[i]), prompt=prompts[i], seed=int(seeds[i]), kind=kind,
+                      model=revision, **params)
+            for i in range(B)
+        ]
+        outputs = [self.edit_cache.get(key) for key in keys]
+        misses = [i for i, out in enumerate(outputs) if out is None]
+        if misses:
+            computed = compute(mel[misses], [prompts[i] for i in misses], [seeds[i] for i in misses])
+            for i, out in zip(misses, computed):
+                self.edit_cache.put(keys[i], out)
+                outputs[i] = out.detach().cpu()
+        output = torch.stack(outputs)
+        if return_type == "np":
+            return output.numpy()
+        return output.to(self.device) if return_type == "mel" else output
 
+    @torch.no_grad()
+    @offload_stage('unet')
+    def ddim_inversion(  # ts[B, C:8, lT:256, lM:16] -> ts[B, C:8, lT:256, lM:16]
+        self,
+        latents: torch.Tensor,
+        num_inference_steps: int = 50,
+        transfer_strength: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+    ):
+        r"""deterministic DDIM inversion: 깨끗한 latent에서 ddim_noising과 같은 timestep (used_timesteps[0])까지
+        unconditional eps로 DDIM step을 거꾸로 밟음. random noise 대신 mixture 자체에서 나온 noise.
+        """
+        tables = self.sampler.tables(num_inference_steps, transfer_strength, latents.device)
+        uncond_embeds = self.encode_prompt(prompts=[""] * latents.shape[0], do_cfg=False)
+        for i in reversed(range(len(tables))):  # t: 작은 쪽 -> used_timesteps[0]
+            noise_pred = self._predict_noise(latents, tables.timesteps[i], uncond_embeds)
+            if stats is not None:
+                stats['unet_evals'] = stats.get('unet_evals', 0) + latents.shape[0]
+            latents = self.sampler.invert_step(noise_pred, i, latents, tables)
         return latents
 
+    def invert_mixture(  # ts[B, 1, T:1024, M:64] -> ts[B, C:8, lT:256, lM:16]
+        self,
+        mel: torch.Tensor,
+        ddim_steps: int,
+        transfer_strength: float,
+        stats: Optional[Dict[str, int]] = None,
+    ):
+        r"""mixture별 DDIM inversion 끝점 (cache). item 단위로 (mel hash, steps, t_enc, model + 실행 설정)을 key로 조회,
+        miss인 item만 한 batch로 encode (posterior mean) + inversion. cache entry는 host에 있고 hit 시 device로 복사.
+        """
+        t_enc = self.sampler.num_used_steps(ddim_steps, transfer_strength)
+        revision = self._cache_revision()
+        keys = [cache_key(mel=tensor_digest(mel[i]), ddim_steps=ddim_steps, t_enc=t_enc,
+                          model=revision, op="ddim_inversion") for i in range(mel.shape[0])]
+        outputs = [self.inversion_cache.get(key) for key in keys]
+        misses = [i for i, out in enumerate(outputs) if out is None]
+        if misses:
+            latents = self.encode_audios(mel[misses], sample=False)
+            if torch.max(torch.abs(latents)) > 1e2:
+                latents = torch.clamp(latents, min=-10.0, max=10.0)  # clipping
+            inverted = self.ddim_inversion(latents, ddim_steps, transfer_strength, stats=stats)
+            for i, out in zip(misses, inverted):
+                self.inversion_cache.put(keys[i], out)
+                outputs[i] = out
+        return torch.stack([out.to(self.device, non_blocking=True) for out in outputs])
+
+    def get_sampler(self, solver: str):
+        if solver not in self.samplers:
+            raise ValueError(f"Unknown solver '{solver}'. Choose from {list(self.samplers)}")
+        return self.samplers[solver]
+
+    @staticmethod
+    def _guidance_schedule(tables, do_cfg, guidance_interval=None, guidance_every=1):  # -> list[bool] (step별 CFG 여부)
+        if not do_cfg:
+            return [False] * len(tables)
+        t_min, t_max = guidance_interval if guidance_interval is not None else (-1, float('inf'))
+        return [(t_min <= t <= t_max) and (i % guidance_every == 0) for i, t in enumerate(tables.timestep_list)]
+
     def edit_audio_with_ddim(  # ts[B, 1, T:1024, M:64] -> mel/wav
         self,
         mel: torch.Tensor,
@@ -323,10 +1005,33 @@ class AudioLDM(nn.Module):
         ddim_steps: int,
         return_type: str = "ts",  # "ts" or "np" or "mel"
         clipping = False,
+        guidance_interval: Optional[Tuple[int, int]] = None,
+        guidance_every: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+        solver: str = "ddim",
+        seed: Optional[Union[int, List[int]]] = None,  # item별 seed (torch.Generator). 주어지면 결과 재현 + cache 가능
+        use_cache: bool = True,
+        inversion: bool = False,  # True: random noising 대신 cache된 deterministic DDIM inversion에서 시작
+        early_exit: Optional[float] = None,  # ddim_denoising 참고 (item별 adaptive early exit tolerance)
     ):
         
         assert self.evalmode, "Let mode be eval"
 
+        # seed 고정 요청은 content-addressed cache에서 먼저 조회
+        if use_cache and self.edit_cache is not None and seed is not None:
+            params = dict(duration=duration, transfer_strength=transfer_strength, guidance_scale=guidance_scale,
+                          ddim_steps=ddim_steps, clipping=clipping, guidance_interval=guidance_interval,
+                          guidance_every=guidance_every, solver=solver, inversion=inversion, op="edit")
+            if early_exit is not None:  # 기존 cache key 유지
+                params['early_exit'] = early_exit
+            return self._cached_edit(mel, text, seed, return_type, params, lambda m, p, s: self.edit_audio_with_ddim(
+                mel=m, text=p, duration=duration, batch_size=len(p), transfer_strength=transfer_strength,
+                guidance_scale=guidance_scale, ddim_steps=ddim_steps, return_type="mel" if return_type == "mel" else "ts",
+                clipping=clipping, guidance_interval=guidance_interval, guidance_every=guidance_every,
+                stats=stats, solver=solver, seed=s, use_cache=False, inversion=inversion, early_exit=early_exit,
+            ))
+        generator = self.make_generators(seed, mel.shape[0])
+
         # ========== 사전 setting ==========
         # assert get_bit_depth(original_audio_file_path) == 16, \
         #     f"원본 오디오 {original_audio_file_path}의 bit depth는 16이어야 함"
@@ -341,21 +1046,27 @@ class AudioLDM(nn.Module):
 
         # ========== mel -> latents ==========
         assert mel.dim() == 4, mel.dim()
-        init_latent_x = self.encode_audios(mel)
-        
-        if torch.max(torch.abs(init_latent_x)) > 1e2:
-            init_latent_x = torch.clamp(init_latent_x, min=-10.0, max=10.0)  # clipping
-
-        # ========== DDIM Inversion (noising) ==========
         prompt_embeds = self.encode_prompt(prompts=text, do_cfg=True)
         uncond_embeds, cond_embeds = prompt_embeds.chunk(2)
 
-        # t_enc step으로 ddim noising
-        noisy_latents = self.ddim_noising(
-            latents=init_latent_x,
-            num_inference_steps=ddim_steps,
-            transfer_strength=transfer_strength,
-        )
+        if inversion:
+            # ========== DDIM Inversion (deterministic, mixture별 cache) ==========
+            noisy_latents = self.invert_mixture(mel, ddim_steps, transfer_strength, stats=stats)
+        else:
+            init_latent_x = self.encode_audios(mel, generator=generator)
+            
+            if torch.max(torch.abs(init_latent_x)) > 1e2:
+                init_latent_x = torch.clamp(init_latent_x, min=-10.0, max=10.0)  # clipping
+
+            # ========== DDIM Inversion (noising) ==========
+            # t_enc step으로 ddim noising
+            noisy_latents = self.ddim_noising(
+                latents=init_latent_x,
+                num_inference_steps=ddim_steps,
+                transfer_strength=transfer_strength,
+                solver=solver,
+                generator=generator,
+            )
         
         # ========== DDIM Denoising (editing) ==========
         edited_latents = self.ddim_denoising(
@@ -364,11 +1075,19 @@ class AudioLDM(nn.Module):
             num_inference_steps=ddim_steps,
             transfer_strength=transfer_strength,
             guidance_scale=guidance_scale,
+            guidance_interval=guidance_interval,
+            guidance_every=guidance_every,
+            stats=stats,
+            solver=solver,
+            early_exit=early_exit,
         )
 
         # ========== latent -> waveform ==========
+        return self.latents_to_output(edited_latents, mel, duration, return_type, clipping)
+
+    def latents_to_output(self, latents, mel=None, duration=None, return_type="ts", clipping=False, to_host=True):  # -> mel/wav
         # mel spectrogram 복원
-        mel_spectrogram = self.decode_latents(edited_latents)
+        mel_spectrogram = self.decode_latents(latents)
         
         # mel clipping은 선택
         if clipping:
@@ -379,10 +1098,10 @@ class AudioLDM(nn.Module):
             return mel_spectrogram
 
         # waveform 변환
-        edited_waveform = self.mel_to_waveform(mel_spectrogram)
+        edited_waveform = self.mel_to_waveform(mel_spectrogram, to_host=to_host and return_type == "ts")
 
         # duration보다 긴 경우 자르기
-        expected_length = int(duration * self.vocoder.config.sampling_rate)  # 원본 samples 수
+        expected_length = int((duration or self.audio_duration) * self.sampling_rate)  # 원본 samples 수
         assert edited_waveform.ndim == 2, edited_waveform.ndim
         edited_waveform = edited_waveform[:, :expected_length]
         
@@ -394,9 +1113,281 @@ class AudioLDM(nn.Module):
         
         return edited_waveform
 
+    def iterative_edit(  # ts[B, 1, T:1024, M:64] -> mel/wav
+        self,
+        mel: torch.Tensor,
+        text: Union[str, List[str]],
+        num_iterations: int,
+        transfer_strength: float,
+        guidance_scale: float,
+        ddim_steps: int,
+        duration: float = 10.24,
+        return_type: str = "ts",  # "ts" or "np" or "mel" or "latent"
+        clipping = False,
+        carry: str = "latent",  # "latent" or "mel"
+        snapshot_every: Optional[int] = None,
+        snapshot_fn: Optional[Callable[[int, Any], None]] = None,
+        snapshot_type: str = "np",
+        guidance_interval: Optional[Tuple[int, int]] = None,
+        guidance_every: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+        solver: str = "ddim",
+        seed: Optional[Union[int, List[int]]] = None,
+        use_cache: bool = True,
+        early_exit: Optional[float] = None,
+    ):
+        r"""edit_audio_with_ddim을 num_iterations번 반복. 중간 결과는 파일/waveform을 거치지 않고 메모리에 유지.
+        - carry (`str`): 반복 사이에 유지할 상태.
+            "latent": denoised latent를 그대로 다음 반복의 입력으로 (VAE decode/encode 생략).
+            "mel": 매 반복 decode -> (clipping) -> encode. 기존 return_type="mel" 반복과 같은 결과.
+        - snapshot_every / snapshot_fn: k번째 반복마다 snapshot_fn(iteration, output)을 호출.
+          decode/vocode는 device에서 enqueue만 하고, host 복사와 snapshot_fn은 background thread에서 실행.
+        - snapshot_type (`str`): snapshot output의 return_type ("np" / "mel" / "latent" 등).
+        - seed: item별 seed. 주어지면 edit cache 사용 (snapshot_fn이 없고 return_type != "latent"일 때).
+        Returns:
+        - 마지막 반복의 결과 (return_type), "latent"면 latents 그대로.
+        """
+        assert self.evalmode, "Let mode be eval"
+        assert carry in ("latent", "mel"), carry
+        assert mel.dim() == 4, mel.dim()
+
+        if (use_cache and self.edit_cache is not None and seed is not None
+                and snapshot_fn is None and return_type != "latent"):
+            params = dict(num_iterations=num_iterations, duration=duration, transfer_strength=transfer_strength,
+                          guidance_scale=guidance_scale, ddim_steps=ddim_steps, clipping=clipping, carry=carry,
+                          guidance_interval=guidance_interval, guidance_every=guidance_every, solver=solver,
+                          op="iterative_edit")
+            if early_exit is not None:
+                params['early_exit'] = early_exit
+            return self._cached_edit(mel, text, seed, return_type, params, lambda m, p, s: self.iterative_edit(
+                mel=m, text=p, num_iterations=num_iterations, transfer_strength=transfer_strength,
+                guidance_scale=guidance_scale, ddim_steps=ddim_steps, duration=duration,
+                return_type="mel" if return_type == "mel" else "ts", clipping=clipping, carry=carry,
+                guidance_interval=guidance_interval, guidance_every=guidance_every, stats=stats,
+                solver=solver, seed=s, use_cache=False, early_exit=early_exit,
+            ))
+        generator = self.make_generators(seed, mel.shape[0])
+
+        # prompt embedding은 반복마다 동일 -> 한 번만
+        prompt_embeds = self.encode_prompt(prompts=text, do_cfg=True)
+        edit_kwargs = dict(num_inference_steps=ddim_steps, transfer_strength=transfer_strength, solver=solver)
+
+        latents = self.encode_audios(mel, generator=generator)
+        if torch.max(torch.abs(latents)) > 1e2:
+            latents = torch.clamp(latents, min=-10.0, max=10.0)  # clipping
+
+        executor = ThreadPoolExecutor(max_workers=1) if snapshot_fn is not None else None
+        pending = []
+        current_mel = mel
+        try:
+            for it in range(1, num_iterations + 1):
+                noisy_latents = self.ddim_noising(latents=latents, generator=generator, **edit_kwargs)
+                latents = self.ddim_denoising(
+                    latents=noisy_latents,
+                    prompt_embeds=prompt_embeds,
+                    guidance_scale=guidance_scale,
+                    guidance_interval=guidance_interval,
+                    guidance_every=guidance_every,
+                    stats=stats,
+                    early_exit=early_exit,
+                    **edit_kwargs,
+                )
+
+                if carry == "mel" and it < num_iterations:
+                    next_mel = self.decode_latents(latents)
+                    if clipping:
+                        next_mel = torch.maximum(torch.minimum(next_mel, current_mel), current_mel)
+                    current_mel = next_mel
+                    latents = self.encode_audios(current_mel, generator=generator)
+                    if torch.max(torch.abs(latents)) > 1e2:
+                        latents = torch.clamp(latents, min=-10.0, max=10.0)
+
+                if executor is not None and snapshot_every and it % snapshot_every == 0:
+                    snapshot = self._output(latents, current_mel, duration, snapshot_type, clipping, to_host=False)
+                    pending.append(executor.submit(self._deliver_snapshot, snapshot_fn, it, snapshot, snapshot_type))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+        for future in pending:
+            future.result()  # snapshot_fn 에러 전달
+
+        return self._output(latents, current_mel, duration, return_type, clipping)
+
+    def separate_queries(  # ts[1, 1, T:1024, M:64] + Q prompts -> list of Q mel/wav
+        self,
+        mel: torch.Tensor,
+        texts: List[str],
+        transfer_strength: float,
+        guidance_scale: float,
+        ddim_steps: int,
+        duration: float = 10.24,
+        return_type: str = "ts",  # "ts" or "np" or "mel"
+        num_iterations: int = 1,
+        guidance_interval: Optional[Tuple[int, int]] = None,
+        guidance_every: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+        solver: str = "ddim",
+        seed: Optional[Union[int, List[int]]] = None,  # int면 모든 query가 같은 noise, list면 query별
+        inversion: bool = False,  # True: 첫 반복은 cache된 DDIM inversion 끝점에서 시작 (query 모두 공유)
+        early_exit: Optional[float] = None,  # ddim_denoising 참고
+    ):
+        r"""한 mixture에서 여러 query (stem)를 한 번에 분리.
+        mixture는 VAE로 한 번만 encode, Q개 prompt는 text encoder / UNet / VAE decode / vocoder를 한 batch로 통과.
+        seed가 int면 query 하나씩 edit_audio_with_ddim(seed=seed)을 부르는 것과 같은 결과.
+        list면 posterior sample은 첫 seed로 한 번, noising은 query별 seed.
+        inversion이면 encode + inversion도 mixture당 한 번 (invert_mixture), Q개 query가 끝점을 공유.
+        Returns:
+        - list (길이 Q): query별 결과 (batch 축 없음)
+        """
+        assert self.evalmode, "Let mode be eval"
+        assert mel.dim() == 4 and mel.shape[0] == 1, mel.shape
+        Q = len(texts)
+
+        generator = self.make_generators(seed, Q)
+        if inversion:
+            # encode (posterior mean) + inversion은 mixture 한 번 (cache) -> query 수만큼 복제
+            # 첫 반복의 입력을 끝점이 대신하므로 posterior sample은 필요 없음
+            latents = self.invert_mixture(mel, ddim_steps, transfer_strength, stats=stats)
+        else:
+            # mixture encode는 한 번 (posterior sample도 한 번) -> query 수만큼 복제
+            latents = self.encode_audios(mel, generator=generator[:1] if generator else None)
+            if generator and isinstance(seed, int):  # 나머지 query generator도 posterior sample 이후 상태로
+                for g in generator[1:]:
+                    g.set_state(generator[0].get_state())
+            if torch.max(torch.abs(latents)) > 1e2:
+                latents = torch.clamp(latents, min=-10.0, max=10.0)  # clipping
+        latents = latents.expand(Q, -1, -1, -1).contiguous()
+
+        prompt_embeds = self.encode_prompt(prompts=list(texts), do_cfg=True)  # ts[2Q, 512]
+        edit_kwargs = dict(num_inference_steps=ddim_steps, transfer_strength=transfer_strength, solver=solver)
+        for it in range(num_iterations):
+            if inversion and it == 0:
+                noisy_latents = latents
+            else:
+                noisy_latents = self.ddim_noising(latents=latents, generator=generator, **edit_kwargs)
+            latents = self.ddim_denoising(
+                latents=noisy_latents,
+                prompt_embeds=prompt_embeds,
+                guidance_scale=guidance_scale,
+                guidance_interval=guidance_interval,
+                guidance_every=guidance_every,
+                stats=stats,
+                early_exit=early_exit,
+                **edit_kwargs,
+            )
+
+        output = self.latents_to_output(latents, mel, duration, return_type)
+        return list(output)
+
+    def edit_region(  # ts[B, 1, T:1024, M:64] -> mel / 구간 wav
+        self,
+        mel: torch.Tensor,
+        text: Union[str, List[str]],
+        start: float,
+        end: float,
+        transfer_strength: float,
+        guidance_scale: float,
+        ddim_steps: int,
+        margin: float = 0.32,
+        waveform: Optional[torch.Tensor] = None,
+        return_type: str = "ts",  # "ts" or "np" or "mel"
+        guidance_interval: Optional[Tuple[int, int]] = None,
+        guidance_every: int = 1,
+        stats: Optional[Dict[str, int]] = None,
+        solver: str = "ddim",
+        seed: Optional[Union[int, List[int]]] = None,
+    ):
+        r"""[start, end] (sec) 구간만 편집. VAE / UNet / vocoder 모두 구간 + context margin window에서만 실행.
+        - margin (`float`): 양쪽 context (sec). 편집 결과는 margin 안에서 원본과 linear crossfade.
+        - waveform (`ts[B, N]`, optional): 원본 waveform. 주면 vocoding한 window를 crossfade로 끼워 넣은 전체 waveform 반환.
+        Returns:
+        - "mel": 편집 구간이 섞인 전체 mel ts[B, 1, T, M]
+        - "ts" / "np": waveform이 있으면 전체 waveform ts[B, N], 없으면 [start, end] 구간 waveform
+        """
+        assert self.evalmode, "Let mode be eval"
+        assert mel.dim() == 4, mel.dim()
+        assert 0 <= start < end, (start, end)
+        B, _, T, _ = mel.shape
+        frames_per_sec = self.sampling_rate / self.vocoder_hop  # mel 100 frames/s
+        f = self.vae_scale_factor  # mel frame 4개 = latent frame 1개 (25 frames/s)
+        num_latent = T // f
+
+        # ========== latent window: [start - margin, end + margin] ==========
+        a = max(0, math.floor((start - margin) * frames_per_sec / f))
+        b = min(num_latent, math.ceil((end + margin) * frames_per_sec / f))
+        # UNet down block 수만큼 2배씩 줄어듦 -> lT는 8의 배수 (넓힌 만큼 양쪽으로, 끝에 닿으면 반대쪽으로)
+        multiple = 2 ** (len(self.unet.config.block_out_channels) - 1)
+        length = min(num_latent, math.ceil((b - a) / multiple) * multiple)
+        a = max(0, a - (length - (b - a)) // 2)
+        b = min(num_latent, a + length)
+        a = b - length
+        mel_window = mel[:, :, a * f:b * f]  # ts[B, 1, lW*4, M]
+
+        # ========== window만 edit ==========
+        generator = self.make_generators(seed, B)
+        latents = self.encode_audios(mel_window, generator=generator)  # ts[B, 8, lW, 16]
+        if torch.max(torch.abs(latents)) > 1e2:
+            latents = torch.clamp(latents, min=-10.0, max=10.0)  # clipping
+        prompt_embeds = self.encode_prompt(prompts=text, do_cfg=True)
+        edit_kwargs = dict(num_inference_steps=ddim_steps, transfer_strength=transfer_strength, solver=solver)
+        noisy_latents = self.ddim_noising(latents=latents, generator=generator, **edit_kwargs)
+        latents = self.ddim_denoising(
+            latents=noisy_latents,
+            prompt_embeds=prompt_embeds,
+            guidance_scale=guidance_scale,
+            guidance_interval=guidance_interval,
+            guidance_every=guidance_every,
+            stats=stats,
+            **edit_kwargs,
+        )
+        edited_window = self.decode_latents(latents)
+
+        # ========== 원본 mel과 blend (구간 안은 편집 결과, margin은 crossfade) ==========
+        offset = a * f
+        inner = (start * frames_per_sec - offset, end * frames_per_sec - offset)
+        weights = region_weights(mel_window.shape[2], *inner, device=mel.device)  # ts[W]
+        blended_window = torch.lerp(mel_window.float(), edited_window, weights[:, None])
+        if return_type == "mel":
+            mel_out = mel.float().clone()
+            mel_out[:, :, a * f:b * f] = blended_window
+            return mel_out
+
+        # ========== window만 vocoding ==========
+        hop = self.vocoder_hop
+        wav_window = self.mel_to_waveform(blended_window, to_host=False)  # ts[B, W*hop] (device에서 blend)
+        if waveform is not None:
+            wav_out = waveform.to(wav_window.device, torch.float32).clone()
+            wav_weights = weights.repeat_interleave(hop).to(wav_window.device)
+            segment = wav_out[:, offset * hop:offset * hop + wav_window.shape[1]]
+            wav_out[:, offset * hop:offset * hop + segment.shape[1]] = torch.lerp(
+                segment, wav_window[:, :segment.shape[1]], wav_weights[:segment.shape[1]])
+        else:
+            s0 = round(start * self.sampling_rate) - offset * hop
+            wav_out = wav_window[:, max(s0, 0):s0 + round((end - start) * self.sampling_rate)]
+
+        if return_type == "np":
+            return wav_out.cpu().numpy()
+        assert return_type == "ts"
+        return wav_out.cpu()
+
+    def _output(self, latents, mel, duration, return_type, clipping, to_host=True):
+        if return_type == "latent":
+            return latents
+        if return_type == "np" and not to_host:  # host 복사는 호출자(snapshot thread)가
+            return self.latents_to_output(latents, mel, duration, "ts", clipping, to_host=False)
+        return self.latents_to_output(latents, mel, duration, return_type, clipping, to_host=to_host)
+
+    @staticmethod
+    def _deliver_snapshot(snapshot_fn, iteration, snapshot, snapshot_type):
+        if snapshot_type in ("np", "ts"):  # 최종 결과와 같은 위치로 (host 복사는 이 thread에서)
+            snapshot = snapshot.cpu()
+        if snapshot_type == "np":
+            snapshot = snapshot.numpy()
+        snapshot_fn(iteration, snapshot)
 
 if __name__ == '__main__':
     audioldm = AudioLDM(device='cpu')
+    audioldm.startup_report()
     mel = torch.randn(size=(3,8,256,16))
     # wav = audioldm.encode_audios(mel)
     wav = audioldm.ddim_noising(mel)
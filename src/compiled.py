@@ -0,0 +1,60 @@
+import time
+import threading
+from typing import Callable, Dict, Tuple
+
+import torch
+
+
+def shape_bucket(args) -> Tuple:  # tensor는 (shape, dtype, device), 나머지는 값 그대로
+    key = []
+    for arg in args:
+        if isinstance(arg, torch.Tensor):
+            key.append((tuple(arg.shape), arg.dtype, arg.device.type))
+        else:
+            key.append(arg)
+    return tuple(key)
+
+
+class ShapeBucketCompiler:
+    r"""함수 하나를 입력 shape bucket별로 torch.compile 해서 cache.
+    - 각 bucket은 static shape (dynamic=False)로 compile -> [B,8,256,16] 같이 고정된 shape에서 재compile 없음.
+    - bucket 수가 max_buckets를 넘으면 새 shape는 eager로 실행 (재compile 폭주 방지).
+    - compile (첫 호출)이 실패하면 그 bucket은 eager로 고정하고 경고만 출력.
+    """
+
+    def __init__(self, fn: Callable, name: str, mode: str = "default", max_buckets: int = 4):
+        self.fn = fn
+        self.name = name
+        self.mode = mode
+        self.max_buckets = max_buckets
+        self.compile_times: Dict[Tuple, float] = {}  # bucket -> 첫 호출 (compile 포함) sec
+        self._compiled: Dict[Tuple, Callable] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, *args):
+        key = shape_bucket(args)
+        fn = self._compiled.get(key)
+        if fn is not None:
+            return fn(*args)
+
+        with self._lock:  # 같은 bucket을 여러 thread가 동시에 compile 하지 않도록
+            fn = self._compiled.get(key)
+            if fn is not None:
+                return fn(*args)
+            if len(self._compiled) >= self.max_buckets:
+                return self.fn(*args)
+
+            start = time.perf_counter()
+            compiled = torch.compile(self.fn, mode=self.mode, dynamic=False)
+            try:
+                out = compiled(*args)
+            except Exception as e:  # backend 미지원 등 -> eager fallback
+                print(f"[WARN] compiled.py: compile failed for {self.name} {key}, falling back to eager ({type(e).__name__}: {e})")
+                compiled, out = self.fn, self.fn(*args)
+            self.compile_times[key] = time.perf_counter() - start
+            self._compiled[key] = compiled
+            return out
+
+    @property
+    def buckets(self):
+        return list(self._compiled)
@@ -0,0 +1,112 @@
+r"""DeepCache-style feature caching for the AudioLDM UNet.
+
+인접한 timestep의 UNet 깊은 (저해상도) feature는 거의 같음.
+full step: down -> mid -> up 전체를 돌리고, 얕은 up block (up_blocks[-branch:])에 들어가는 feature를 저장.
+cached step: conv_in + 얕은 down block (down_blocks[:branch])만 돌려 skip connection을 만들고,
+             저장된 deep feature에서 바로 얕은 up block -> conv_out. (branch=1이면 최상위 해상도만 계산)
+"""
+
+from typing import Dict, Optional, Tuple
+
+import torch
+
+
+def _time_class_embedding(unet, sample, timestep, class_labels):  # UNet2DConditionModel.forward의 embedding 부분
+    timesteps = torch.as_tensor(timestep, device=sample.device)
+    if timesteps.dim() == 0:
+        timesteps = timesteps[None]
+    timesteps = timesteps.expand(sample.shape[0])
+    emb = unet.time_embedding(unet.time_proj(timesteps).to(dtype=sample.dtype))
+
+    if unet.class_embedding is not None:
+        if unet.config.class_embed_type == "timestep":
+            class_labels = unet.time_proj(class_labels).to(dtype=sample.dtype)
+        class_emb = unet.class_embedding(class_labels).to(dtype=sample.dtype)
+        emb = torch.cat([emb, class_emb], dim=-1) if unet.config.class_embeddings_concat else emb + class_emb
+    if getattr(unet, 'time_embed_act', None) is not None:
+        emb = unet.time_embed_act(emb)
+    return emb
+
+
+def _run_block(block, sample, emb, **kwargs):
+    if getattr(block, 'has_cross_attention', False):  # AudioLDM: encoder_hidden_states=None (self-attention만)
+        return block(hidden_states=sample, temb=emb, encoder_hidden_states=None, **kwargs)
+    return block(hidden_states=sample, temb=emb, **kwargs)
+
+
+def deepcache_forward(unet, sample, timestep, class_labels, branch: int = 1, deep_feature: Optional[torch.Tensor] = None):
+    r"""-> (eps, deep_feature). deep_feature가 주어지면 cached step (깊은 block 생략)."""
+    emb = _time_class_embedding(unet, sample, timestep, class_labels)
+    num_upsamplers = len(unet.up_blocks) - 1
+    forward_upsample_size = any(s % (2 ** num_upsamplers) != 0 for s in sample.shape[-2:])
+
+    sample = unet.conv_in(sample)
+    res_samples = (sample,)
+    down_blocks = unet.down_blocks if deep_feature is None else unet.down_blocks[:branch]
+    for block in down_blocks:
+        sample, res = _run_block(block, sample, emb)
+        res_samples += res
+
+    up_blocks = list(unet.up_blocks)
+    shallow_up = up_blocks[-branch:]
+    if deep_feature is None:
+        sample = _run_block(unet.mid_block, sample, emb) if unet.mid_block is not None else sample
+        for i, block in enumerate(up_blocks[:-branch]):
+            res = res_samples[-len(block.resnets):]
+            res_samples = res_samples[:-len(block.resnets)]
+            upsample_size = res_samples[-1].shape[2:] if forward_upsample_size else None
+            sample = _run_block(block, sample, emb, res_hidden_states_tuple=res, upsample_size=upsample_size)
+        deep_feature = sample
+    else:
+        # 얕은 up block이 쓰는 skip connection = conv_in + down_blocks[:branch] 출력의 앞부분
+        res_samples = res_samples[:sum(len(block.resnets) for block in shallow_up)]
+        sample = deep_feature
+
+    for i, block in enumerate(shallow_up):
+        res = res_samples[-len(block.resnets):]
+        res_samples = res_samples[:-len(block.resnets)]
+        is_final = i == len(shallow_up) - 1
+        upsample_size = res_samples[-1].shape[2:] if forward_upsample_size and not is_final else None
+        sample = _run_block(block, sample, emb, res_hidden_states_tuple=res, upsample_size=upsample_size)
+
+    if unet.conv_norm_out is not None:
+        sample = unet.conv_act(unet.conv_norm_out(sample))
+    return unet.conv_out(sample), deep_feature
+
+
+class StepCache:
+    r"""연속된 UNet 호출 사이의 deep feature cache.
+    - interval: k번에 한 번 full step (나머지 k-1번은 cached step)
+    - branch: cached step에서 다시 계산할 얕은 down/up block 쌍 수
+    입력 shape별로 따로 관리 (CFG batch [2B]와 cond-only batch [B]가 섞여도 됨).
+    """
+
+    def __init__(self, interval: int = 3, branch: int = 1):
+        assert interval >= 1 and branch >= 1, (interval, branch)
+        self.interval = interval
+        self.branch = branch
+        self._features: Dict[Tuple, torch.Tensor] = {}
+        self._counts: Dict[Tuple, int] = {}
+        self.full_steps = 0
+        self.cached_steps = 0
+
+    def reset(self):
+        self._features.clear()
+        self._counts.clear()
+
+    def refresh_due(self, shape) -> bool:  # 이 shape의 다음 호출이 full step인지
+        key = tuple(shape)
+        return key not in self._features or self._counts[key] % self.interval == 0
+
+    def __call__(self, unet, sample, timestep, class_labels):
+        key = tuple(sample.shape)
+        count = self._counts.get(key, 0)
+        feature = self._features.get(key)
+        if self.refresh_due(key):
+            out, self._features[key] = deepcache_forward(unet, sample, timestep, class_labels, self.branch)
+            self.full_steps += 1
+        else:
+            out, _ = deepcache_forward(unet, sample, timestep, class_labels, self.branch, deep_feature=feature)
+            self.cached_steps += 1
+        self._counts[key] = count + 1
+        return out
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import torch
+
+
+def tensor_digest(x: torch.Tensor) -> str:  # 내용 기반 hash (shape / dtype 포함)
+    array = x.detach().to('cpu', torch.float32).contiguous().numpy()
+    h = hashlib.sha256()
+    h.update(str((tuple(array.shape), 'float32')).encode())
+    h.update(array.tobytes())
+    return h.hexdigest()
+
+
+def cache_key(**fields) -> str:  # 모든 field를 정렬된 json으로 -> sha256
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class EditCache:
+    r"""content-addressed edit 결과 cache (item 단위).
+    key = (입력 mel hash, prompt, sampler/edit parameter 전부, seed, model revision).
+    seed가 고정된 요청만 저장 (seed 없는 요청은 결과가 매번 달라서 cache 불가).
+    - max_items: 메모리 LRU 크기
+    - max_bytes: 주면 메모리 LRU의 총 byte 상한도 같이 적용
+    - cache_dir: 주면 `<cache_dir>/<key>.pt`로도 저장 -> process / sweep 사이에 공유
+    - pin_memory: host entry를 pinned memory에 -> hit 시 device 복사를 non_blocking으로
+    entry는 항상 host (CPU)에 저장 (device memory를 차지하지 않음).
+    """
+
+    def __init__(self, max_items: int = 1024, cache_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None, pin_memory: bool = False):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.pin_memory = pin_memory and torch.cuda.is_available()
+        self._items: "OrderedDict[str, torch.Tensor]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pt')
+
+    def get(self, key: str) -> Optional[torch.Tensor]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return value
+        if self.cache_dir is not None and os.path.exists(self._path(key)):
+            value = torch.load(self._path(key), map_location='cpu', weights_only=True)  # tensor만 (pickle 실행 없음)
+            value = self._put(key, value)
+            with self._lock:
+                self.hits += 1
+            return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value: torch.Tensor):
+        value = self._put(key, value.detach().cpu())
+        if self.cache_dir is not None:
+            tmp = self._path(key) + f'.{os.getpid()}.tmp'
+            torch.save(value, tmp)
+            os.replace(tmp, self._path(key))  # 여러 worker가 같은 key를 써도 깨진 파일 없음
+
+    def _put(self, key, value):  # -> 저장된 host tensor
+        if self.pin_memory:
+            value = value.pin_memory()
+        with self._lock:
+            if key in self._items:
+                self._bytes -= _nbytes(self._items[key])
+            self._items[key] = value
+            self._items.move_to_end(key)
+            self._bytes += _nbytes(value)
+            while len(self._items) > self.max_items or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes and len(self._items) > 1):
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= _nbytes(evicted)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {'items': len(self._items), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+def _nbytes(x: torch.Tensor) -> int:
+    return x.numel() * x.element_size()
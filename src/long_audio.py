@@ -0,0 +1,203 @@
+r"""10.24s보다 긴 오디오의 sliding-window separation.
+
+AudioDataProcessor는 입력을 10.24s로 자르거나 padding -> 긴 파일은 뒤가 잘림.
+1. 파일을 16kHz 기준 10.24s window (겹침 overlap)로 나눔 (chunk_spans, 마지막 window는 파일 끝에 맞춤)
+2. window batch_size개씩 읽어서 (resample + 파일 전체 기준 normalize) separate_fn 한 번에 처리
+3. 결과 waveform을 crossfade overlap-add로 이어붙이며 확정된 구간부터 바로 내보냄 (StreamingOverlapAdd)
+파일 전체를 memory에 올리지 않음 -> 사용 memory는 window batch 하나 분량 (파일 길이와 무관).
+silence_threshold: activity index (frame RMS) 기준 무음 window는 읽지도 / 모델에 넣지도 않고 무음으로 채움.
+separate_fn(waveforms ts[b, N:163840], indices) -> ts[b, N:163840]: window별 분리 결과 (edit_separator 또는 임의의 separator)
+"""
+
+import os
+import sys
+import math
+from typing import Callable, Dict, Iterator, List, Optional
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import numpy as np
+import torch
+import torchaudio
+import soundfile as sf
+
+from src.utilities.ola import chunk_spans, StreamingOverlapAdd
+from src.utilities.data.activity import ActivityIndex
+
+
+class LongAudioReader:
+    r"""긴 오디오 파일을 window 단위로 읽음 (필요한 구간만 disk에서).
+    - processor: AudioDataProcessor (sampling_rate / duration 사용)
+    - overlap (`float`): window 간 겹침 (sec)
+    - activity (`ActivityIndex`, optional): 무음 window 판정용
+    normalize는 read_wav_file과 같은 방식 (centering, peak 0.5)이지만 window별이 아닌 파일 전체 기준
+    -> window마다 gain이 달라지지 않음. 통계는 block 단위로 한 번 훑어서 계산.
+    """
+
+    def __init__(self, path, processor, overlap: float = 1.28, activity: Optional[ActivityIndex] = None,
+                 block_frames: int = 2 ** 18):
+        self.path = path
+        self.activity = activity
+        self.sampling_rate = processor.sampling_rate
+        self.window = int(processor.sampling_rate * processor.duration)  # N: 163840
+        info = sf.info(path)
+        self.original_sr = info.samplerate
+        self.num_frames = info.frames
+        self.num_samples = int(round(info.frames * self.sampling_rate / info.samplerate))  # 16kHz 기준 길이
+        self.spans = chunk_spans(self.num_samples, self.window, int(round(overlap * self.sampling_rate)))
+
+        # 파일 전체 mean / centered peak (one pass)
+        total, peak_max, peak_min = 0.0, -np.inf, np.inf
+        for block in sf.blocks(path, blocksize=block_frames, dtype='float32', always_2d=True):
+            block = block.mean(axis=1)
+            total += float(block.sum(dtype=np.float64))
+            peak_max, peak_min = max(peak_max, float(block.max())), min(peak_min, float(block.min()))
+        self.mean = total / max(self.num_frames, 1)
+        self.gain = 0.5 / (max(peak_max - self.mean, self.mean - peak_min) + 1e-8)
+
+    def __len__(self):
+        return len(self.spans)
+
+    def is_silent(self, k, threshold: float) -> bool:  # window의 최대 frame RMS (normalize 후 진폭) < threshold
+        start, end = self.spans[k]
+        ratio = self.original_sr / self.sampling_rate
+        rms = self.activity.segment_rms(int(start * ratio), int(np.ceil(end * ratio)))
+        return rms * self.gain < threshold
+
+    def read(self, k) -> np.ndarray:  # -> np[N:163840] (16kHz, normalized, 짧으면 뒤를 0으로 padding)
+        start, end = self.spans[k]
+        ratio = self.original_sr / self.sampling_rate
+        # 읽기 시작점은 16kHz sample 위치와 정확히 맞는 원본 frame (resample 결과가 sample 격자에 맞도록)
+        step = self.original_sr // math.gcd(self.original_sr, self.sampling_rate)  # 원본 step frame = 16kHz 정수 sample
+        margin = int(np.ceil(64 * ratio))  # resample filter 가장자리 효과를 window 밖으로
+        o_start = max((int(np.floor(start * ratio)) - margin) // step * step, 0)
+        o_end = min(int(np.ceil(end * ratio)) + margin, self.num_frames)
+        block, _ = sf.read(self.path, start=o_start, stop=o_end, dtype='float32', always_2d=True)
+        waveform = torch.from_numpy(block.mean(axis=1))
+        if self.original_sr != self.sampling_rate:
+            waveform = torchaudio.functional.resample(waveform, self.original_sr, self.sampling_rate)
+        offset = int(round(start - o_start / ratio))
+        waveform = ((waveform[offset:offset + end - start] - self.mean) * self.gain).numpy()
+        out = np.zeros(self.window, dtype=np.float32)
+        out[:waveform.shape[0]] = waveform
+        return out
+
+
+def iter_separated(
+        reader: LongAudioReader,
+        separate_fn: Callable,
+        batch_size: int = 8,
+        silence_threshold: Optional[float] = None,
+        stats: Optional[Dict[str, int]] = None,
+        ) -> Iterator[torch.Tensor]:
+    r"""window batch를 separate_fn으로 처리하고 확정된 waveform 구간 ts[n]을 순서대로 yield (합치면 길이 reader.num_samples).
+    silence_threshold가 있으면 (reader.activity 필요) 무음 window는 건너뛰고 0으로 채움 -> batch는 소리가 있는 window로만 채움.
+    stats: 주면 'windows' / 'skipped_windows'를 누적.
+    """
+    num_windows = len(reader)
+    if silence_threshold is None:
+        active = list(range(num_windows))
+    else:
+        assert reader.activity is not None, "silence_threshold requires reader.activity"
+        active = [k for k in range(num_windows) if not reader.is_silent(k, silence_threshold)]
+    if stats is not None:
+        stats['windows'] = stats.get('windows', 0) + num_windows
+        stats['skipped_windows'] = stats.get('skipped_windows', 0) + num_windows - len(active)
+
+    ola = StreamingOverlapAdd(reader.spans)
+    done = 0  # 다음에 ola로 넣을 window
+    for first in range(0, len(active), batch_size):
+        indices = active[first:first + batch_size]
+        waveforms = torch.from_numpy(np.stack([reader.read(k) for k in indices]))  # ts[b, N]
+        separated = dict(zip(indices, separate_fn(waveforms, indices).float().cpu()))  # k -> ts[N]
+        for k in range(done, indices[-1] + 1):  # 사이의 무음 window 포함, 순서대로
+            start, end = reader.spans[k]
+            yield ola.push(separated[k][:end - start] if k in separated else torch.zeros(end - start))
+        done = indices[-1] + 1
+    for k in range(done, num_windows):  # 끝부분 무음 window
+        start, end = reader.spans[k]
+        yield ola.push(torch.zeros(end - start))
+
+
+def separate_long_audio(
+        path,
+        separate_fn: Callable,
+        processor,
+        output_path: Optional[str] = None,
+        overlap: float = 1.28,
+        batch_size: int = 8,
+        silence_threshold: Optional[float] = 1e-3,
+        activity_cache_dir: Optional[str] = None,
+        stats: Optional[Dict[str, int]] = None,
+        ):
+    r"""긴 오디오 파일 분리.
+    - silence_threshold (`float`, optional): window 최대 frame RMS가 이보다 작으면 (normalize 후, peak 0.5 기준) 건너뜀.
+      None이면 모든 window 처리. activity index는 파일 옆 (또는 activity_cache_dir)에 cache.
+    - output_path가 있으면 16kHz wav로 streaming 저장 (memory 일정) 후 저장한 sample 수 반환
+    - 없으면 전체 waveform np[num_samples] 반환 (출력은 memory에 모임)
+    """
+    activity = None if silence_threshold is None else ActivityIndex.load(path, cache_dir=activity_cache_dir)
+    reader = LongAudioReader(path, processor, overlap=overlap, activity=activity)
+    chunks = iter_separated(reader, separate_fn, batch_size=batch_size, silence_threshold=silence_threshold, stats=stats)
+    if output_path is None:
+        return torch.cat(list(chunks)).numpy()
+    written = 0
+    with sf.SoundFile(output_path, 'w', samplerate=reader.sampling_rate, channels=1) as f:
+        for chunk in chunks:
+            f.write(chunk.numpy())
+            written += chunk.shape[0]
+    return written
+
+
+def edit_separator(
+        aldm, processor,
+        text: str,
+        transfer_strength: float = 0.2,
+        guidance_scale: float = 2.5,
+        ddim_steps: int = 50,
+        solver: str = "ddim",
+        seed: Optional[int] = None,
+        **edit_kwargs,
+        ):
+    r"""edit_audio_with_ddim 기반 separate_fn. window batch를 한 번의 edit 호출로 처리.
+    seed를 주면 window k는 seed + k -> batch_size와 상관없이 같은 결과.
+    """
+    def separate(waveforms: torch.Tensor, indices: List[int]) -> torch.Tensor:
+        mels = torch.cat([processor.wav_feature_extraction(w[None].numpy())[0] for w in waveforms])  # ts[b, 1, T, M]
+        return aldm.edit_audio_with_ddim(
+            mel=mels, text=[text] * len(indices), duration=processor.duration, batch_size=len(indices),
+            transfer_strength=transfer_strength, guidance_scale=guidance_scale, ddim_steps=ddim_steps,
+            solver=solver, seed=None if seed is None else [seed + k for k in indices], return_type="ts",
+            **edit_kwargs,
+        )
+    return separate
+
+
+if __name__ == "__main__":
+    from src.audioldm import AudioLDM as ldm
+    from src.utilities.data.dataprocessor import AudioDataProcessor as prcssr
+
+    config = {
+        'input': './long_mixture.wav',
+        'output': './long_separated.wav',
+        'text': 'A cat meowing',
+        'overlap': 1.28,  # sec
+        'batch_size': 8,
+        'silence_threshold': 1e-3,  # None이면 무음 window도 처리
+        'transfer_strength': 0.2,
+        'guidance_scale': 2.5,
+        'ddim_steps': 50,
+        'seed': 0,
+    }
+
+    aldm = ldm('cuda:0' if torch.cuda.is_available() else 'cpu')
+    processor = prcssr(device=aldm.device)
+    separate_fn = edit_separator(aldm, processor, config['text'], transfer_strength=config['transfer_strength'],
+                                 guidance_scale=config['guidance_scale'], ddim_steps=config['ddim_steps'], seed=config['seed'])
+    stats = {}
+    written = separate_long_audio(config['input'], separate_fn, processor, output_path=config['output'],
+                                  overlap=config['overlap'], batch_size=config['batch_size'],
+                                  silence_threshold=config['silence_threshold'], stats=stats)
+    print(f"[INFO] long_audio.py: {written / processor.sampling_rate:.2f}s -> {config['output']} "
+          f"(skipped {stats['skipped_windows']} / {stats['windows']} silent windows)")
@@ -0,0 +1,111 @@
+r"""AudioLDM component offload scheduler.
+
+edit_audio_with_ddim의 각 stage는 component 하나만 사용 (text_encoder -> vae encode -> unet -> vae decode -> vocoder).
+stage에 들어갈 때 필요한 component만 device에 올리고, 나머지는 pinned host memory로 내림.
+- "resident": offload 없음 (전부 device)
+- "sequential": stage가 끝나면 다음 stage의 component를 별도 CUDA stream에서 미리 복사 (prefetch)
+                -> 복사가 현재 stage의 남은 GPU 연산과 겹침. peak = 인접한 두 component
+- "minimal": prefetch 없이 stage 진입 시 다른 component를 모두 내린 뒤 동기 복사. peak = 가장 큰 component 하나
+host 쪽 weight (pinned)는 한 벌만 유지하고 device 쪽은 매번 새로 할당 -> 내릴 때는 device tensor만 버림 (inference 전용).
+"""
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Set, Tuple
+
+import torch
+import torch.nn as nn
+
+OFFLOAD_MODES = ['resident', 'sequential', 'minimal']
+
+
+class OffloadScheduler:
+    def __init__(self, device, mode: str = "sequential"):
+        if mode not in OFFLOAD_MODES:
+            raise ValueError(f"Unknown offload mode '{mode}'. Choose from {OFFLOAD_MODES}")
+        self.device = torch.device(device)
+        self.mode = mode
+        self._host: Dict[str, List[Tuple[torch.Tensor, torch.Tensor]]] = {}  # name -> [(param/buffer, pinned host data)]
+        self._on_device: Set[str] = set()
+        self._events: Dict[str, torch.cuda.Event] = {}  # prefetch 완료 event
+        self._active: List[Set[str]] = []  # 실행 중인 stage (nested) -> 내리지 않음
+        use_cuda = self.device.type == 'cuda'
+        self._stream = torch.cuda.Stream(self.device) if use_cuda and mode == 'sequential' else None
+        self._pin = use_cuda
+        self.transfers = 0  # host -> device 복사 횟수 (benchmark 용)
+
+    def register(self, name: str, module: nn.Module):
+        r"""module weight를 host (pinned)로 옮기고 관리 시작. 이후 device 복사는 stage()에서."""
+        tensors = list(module.parameters()) + list(module.buffers())
+        host = []
+        for t in tensors:
+            data = t.data.cpu()
+            host.append((t, data.pin_memory() if self._pin else data))
+        self._host[name] = host
+        self._evict(name, force=True)
+
+    def restore(self):  # 전부 device로 (offload 해제)
+        for name in self._host:
+            self._ensure(name)
+        self._host.clear()
+        self._on_device.clear()
+
+    # ---------------------------------------------------------------------------------------- #
+
+    def _evict(self, name, force=False):
+        if name not in self._on_device and not force:
+            return
+        for t, data in self._host[name]:
+            t.data = data  # device tensor는 참조가 없어지면 allocator로 반환
+        self._on_device.discard(name)
+        self._events.pop(name, None)
+
+    def _copy_to_device(self, name):
+        for t, data in self._host[name]:
+            t.data = data.to(self.device, non_blocking=self._pin)
+        self._on_device.add(name)
+        self.transfers += 1
+
+    def _ensure(self, name):
+        if name not in self._on_device:
+            self._copy_to_device(name)
+            return
+        event = self._events.pop(name, None)
+        if event is not None:  # prefetch stream에서 할당 / 복사된 tensor -> 현재 stream에서 사용
+            current = torch.cuda.current_stream(self.device)
+            current.wait_event(event)
+            for t, _ in self._host[name]:
+                t.data.record_stream(current)
+
+    def _prefetch(self, name):
+        if name in self._on_device or name not in self._host:
+            return
+        event = torch.cuda.Event()
+        # host weight는 read-only -> main stream을 기다릴 필요 없음 (현재 stage의 남은 연산과 겹침)
+        with torch.cuda.stream(self._stream):
+            self._copy_to_device(name)
+            event.record(self._stream)
+        self._events[name] = event
+
+    @contextmanager
+    def stage(self, *names: str, prefetch: Optional[str] = None):
+        r"""names의 component를 device에 두고 실행. 끝나면 (sequential) prefetch component를 미리 복사 시작."""
+        if self.mode == 'resident':
+            yield
+            return
+        names = [name for name in names if name in self._host]
+        keep = set(names).union(*self._active)
+        for name in list(self._on_device):
+            if name not in keep:  # 직전 stage + (예측이 빗나간) prefetch
+                self._evict(name)
+        for name in names:
+            self._ensure(name)
+        self._active.append(set(names))
+        try:
+            yield
+        finally:
+            self._active.pop()
+            if prefetch is not None and self._stream is not None:
+                self._prefetch(prefetch)
+
+    def resident(self) -> List[str]:
+        return sorted(self._on_device)
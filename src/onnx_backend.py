@@ -0,0 +1,143 @@
+r"""HiFi-GAN vocoder / VAE decoder ONNX export + onnxruntime 실행 backend.
+
+두 stage 모두 순수 feed-forward -> batch / 시간 축을 dynamic axis로 export하면 길이가 다른 입력도 graph 하나로 처리.
+- vocoder.onnx:      mel ts[B, T, M:64] -> waveform ts[B, T * 160]
+- vae_decoder.onnx:  latent ts[B, C:8, lT, lM:16] (scaling_factor로 나눈 값) -> mel ts[B, 1, lT * 4, M:64]
+export: python src/onnx_backend.py (config 참고). 사용: aldm.enable_onnx(onnx_dir)
+onnx / onnxruntime은 optional dependency (export / 실행 시점에만 import).
+"""
+
+import os
+import sys
+import copy
+from typing import Dict, Sequence
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+ONNX_COMPONENTS = {  # AudioLDM component 이름 -> graph 파일 이름
+    'vocoder': 'vocoder.onnx',
+    'vae': 'vae_decoder.onnx',
+}
+
+
+def onnx_path(onnx_dir, name):
+    return os.path.join(onnx_dir, ONNX_COMPONENTS[name])
+
+
+class VAEDecoder(nn.Module):  # export용: vae.decode(z).sample
+    def __init__(self, vae):
+        super().__init__()
+        self.vae = vae
+
+    def forward(self, latents):
+        return self.vae.decode(latents).sample
+
+
+def export_vocoder(vocoder, path, opset: int = 17):  # -> export한 fp32 cpu 사본 (원본 component는 그대로)
+    vocoder = copy.deepcopy(vocoder).float().cpu().eval()
+    mel = torch.randn(1, 1024, 64)  # ts[B, T, M]
+    torch.onnx.export(
+        vocoder, (mel,), path,
+        input_names=['mel'], output_names=['waveform'],
+        dynamic_axes={'mel': {0: 'batch', 1: 'frames'}, 'waveform': {0: 'batch', 1: 'samples'}},
+        opset_version=opset,
+    )
+    return vocoder
+
+
+def export_vae_decoder(vae, path, opset: int = 17):  # -> export한 fp32 cpu 사본 (VAEDecoder)
+    decoder = VAEDecoder(copy.deepcopy(vae).float().cpu().eval())
+    latents = torch.randn(1, vae.config.latent_channels, 256, 16)  # ts[B, C, lT, lM]
+    torch.onnx.export(
+        decoder, (latents,), path,
+        input_names=['latents'], output_names=['mel'],
+        dynamic_axes={'latents': {0: 'batch', 2: 'time'}, 'mel': {0: 'batch', 2: 'frames'}},
+        opset_version=opset,
+    )
+    return decoder
+
+
+def parity_inputs(name, module):  # export shape와 다른 batch / 길이 -> dynamic axis까지 확인
+    if name == 'vocoder':
+        return torch.randn(2, 300, 64)
+    return torch.randn(2, module.vae.config.latent_channels, 72, 16)
+
+
+def check_parity(module, path, x, rel_tol: float = 1e-3) -> float:
+    r"""같은 입력에 대한 PyTorch (fp32 cpu) / onnxruntime 출력의 relative error. rel_tol을 넘으면 AssertionError."""
+    with torch.no_grad():
+        expected = module(x)
+    out = OnnxRunner(path)(x)
+    assert out.shape == expected.shape, (path, out.shape, expected.shape)
+    rel = ((out - expected).norm() / expected.norm().clamp(min=1e-8)).item()
+    assert rel < rel_tol, f"ONNX parity check failed for {path}: rel error {rel:.2e} >= {rel_tol:.0e}"
+    return rel
+
+
+def export_onnx(aldm, onnx_dir, components: Sequence[str] = ('vocoder', 'vae'), opset: int = 17, check: bool = True,
+                rel_tol: float = 1e-3):
+    r"""component의 fp32 / cpu 사본을 export (aldm의 component는 device / dtype 그대로).
+    check: onnx checker + onnxruntime 출력이 PyTorch와 rel_tol 안인지 확인 (실패 시 AssertionError).
+    """
+    os.makedirs(onnx_dir, exist_ok=True)
+    exporters = {'vocoder': export_vocoder, 'vae': export_vae_decoder}
+    for name in components:
+        path = onnx_path(onnx_dir, name)
+        with torch.no_grad():
+            module = exporters[name](aldm.load_component(name), path, opset=opset)
+        if check:
+            import onnx
+            onnx.checker.check_model(path)
+            rel = check_parity(module, path, parity_inputs(name, module), rel_tol)
+            print(f"[INFO] onnx_backend.py: {name} parity rel error {rel:.1e}")
+        print(f"[INFO] onnx_backend.py: exported {name} -> {path}")
+
+
+class OnnxRunner:
+    r"""onnxruntime InferenceSession 하나. torch tensor in / out (입력 device로 결과를 돌려줌)."""
+
+    def __init__(self, path, device='cpu', num_threads: int = 0):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("onnx backend requires `onnxruntime` (pip install onnxruntime)") from e
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        providers = ['CPUExecutionProvider']
+        if torch.device(device).type == 'cuda' and 'CUDAExecutionProvider' in ort.get_available_providers():
+            providers.insert(0, 'CUDAExecutionProvider')
+        self.session = ort.InferenceSession(path, sess_options=options, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        self.path = path
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        inputs = {self.input_name: np.ascontiguousarray(x.detach().float().cpu().numpy())}
+        out = self.session.run(None, inputs)[0]
+        return torch.from_numpy(out).to(x.device)
+
+
+def load_onnx_runners(onnx_dir, components: Sequence[str], device='cpu', num_threads: int = 0) -> Dict[str, OnnxRunner]:
+    missing = [onnx_path(onnx_dir, name) for name in components if not os.path.exists(onnx_path(onnx_dir, name))]
+    if missing:
+        raise FileNotFoundError(f"ONNX graph not found: {missing} (python src/onnx_backend.py로 export)")
+    return {name: OnnxRunner(onnx_path(onnx_dir, name), device, num_threads) for name in components}
+
+
+if __name__ == "__main__":
+    from src.audioldm import AudioLDM as ldm
+
+    config = {
+        'onnx_dir': os.path.join(proj_dir, 'ckpt', 'onnx'),
+        'components': ['vocoder', 'vae'],
+        'opset': 17,
+    }
+
+    aldm = ldm('cpu', precision='fp32')
+    export_onnx(aldm, config['onnx_dir'], config['components'], opset=config['opset'])
@@ -0,0 +1,147 @@
+r"""CPU inference용 int8 quantization profile.
+
+component별 mode:
+- "dynamic": nn.Linear -> dynamic int8 (weight int8, activation은 호출마다 int8로 quantize, int8 GEMM)
+- "weight_only": nn.Linear / Conv / ConvTranspose weight를 int8 (channel별 scale)로 저장, forward 때 fp32로 복원 (메모리만 절약)
+- "int8": Linear는 dynamic, conv는 weight_only
+dynamic int8 kernel (fbgemm / x86 / qnnpack)은 CPU 전용. quantize한 state_dict는 disk에 저장해서 다음 시작 때 재사용.
+nn.Linear / Conv의 subclass (diffusers LoRACompatibleLinear / LoRACompatibleConv 등)도 LoRA가 붙어 있지 않으면 quantize.
+"""
+
+import os
+from itertools import chain
+from typing import Dict, Optional, Union
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+QUANTIZATION_MODES = ['dynamic', 'weight_only', 'int8']
+QUANTIZATION_PROFILES = {
+    # UNet / CLAP의 Linear (attention, FF)만 int8 GEMM, HiFi-GAN conv는 weight만 int8
+    "cpu_int8": {"text_encoder": "dynamic", "unet": "dynamic", "vocoder": "weight_only"},
+    # 메모리 우선: UNet conv까지 int8 저장 (forward마다 dequantize -> 느려질 수 있음)
+    "cpu_int8_small": {"text_encoder": "dynamic", "unet": "int8", "vocoder": "weight_only", "vae": "weight_only"},
+}
+WEIGHT_ONLY_TYPES = (nn.Conv1d, nn.Conv2d, nn.ConvTranspose1d, nn.ConvTranspose2d)
+
+
+def resolve_quantization(quantization: Optional[Union[str, Dict[str, str]]]) -> Dict[str, str]:
+    r"""profile 이름 또는 {component: mode} dict -> {component: mode}. None이면 {} (quantization 없음)."""
+    if quantization is None:
+        return {}
+    if isinstance(quantization, str):
+        if quantization not in QUANTIZATION_PROFILES:
+            raise ValueError(f"Unknown quantization profile '{quantization}'. Choose from {list(QUANTIZATION_PROFILES)}")
+        quantization = QUANTIZATION_PROFILES[quantization]
+    unknown = {mode for mode in quantization.values() if mode not in QUANTIZATION_MODES}
+    if unknown:
+        raise ValueError(f"Unknown quantization mode {sorted(unknown)}. Choose from {QUANTIZATION_MODES}")
+    return dict(quantization)
+
+
+class Int8WeightOnly(nn.Module):
+    r"""module의 weight를 int8 + scale (dim 0 기준 channel별)로 보관하고 forward 직전에만 fp32 weight를 만듦."""
+
+    def __init__(self, module: nn.Module):
+        super().__init__()
+        weight = module.weight.detach().float()
+        scale = weight.abs().flatten(1).amax(dim=1).clamp(min=1e-8) / 127
+        scale = scale.reshape(-1, *([1] * (weight.dim() - 1)))
+        self.register_buffer('qweight', torch.round(weight / scale).clamp(-127, 127).to(torch.int8))
+        self.register_buffer('scale', scale)
+        del module._parameters['weight']
+        module.weight = None  # weight는 forward의 local tensor로만 존재
+        self.module = module
+
+    def forward(self, input):
+        # module 상태를 바꾸지 않음 -> 여러 thread가 같은 module을 동시에 호출해도 안전
+        weight = self.qweight.float() * self.scale
+        m = self.module
+        if isinstance(m, nn.Linear):
+            return F.linear(input, weight, m.bias)
+        if isinstance(m, (nn.Conv1d, nn.Conv2d)):
+            return m._conv_forward(input, weight, m.bias)  # padding_mode 포함
+        conv_transpose = F.conv_transpose1d if isinstance(m, nn.ConvTranspose1d) else F.conv_transpose2d
+        return conv_transpose(input, weight, m.bias, m.stride, m.padding, m.output_padding, m.groups, m.dilation)
+
+
+def _is_plain(module: nn.Module, types) -> bool:  # types의 subclass 포함, LoRA branch가 붙은 module은 제외 (forward가 다름)
+    return isinstance(module, types) and getattr(module, 'lora_layer', None) is None
+
+
+def _apply_weight_only(module: nn.Module, types):
+    for name, child in module.named_children():
+        if _is_plain(child, types) and isinstance(getattr(child, 'weight', None), nn.Parameter):
+            setattr(module, name, Int8WeightOnly(child))
+        elif not isinstance(child, Int8WeightOnly):
+            _apply_weight_only(child, types)
+    return module
+
+
+def _to_base_linear(module: nn.Module):  # quantize_dynamic은 type이 정확히 nn.Linear인 것만 바꿈 -> subclass를 nn.Linear로 (weight 공유)
+    for name, child in module.named_children():
+        if type(child) is not nn.Linear and _is_plain(child, nn.Linear):
+            linear = nn.Linear(child.in_features, child.out_features, bias=child.bias is not None, device='meta')
+            linear.weight, linear.bias = child.weight, child.bias
+            setattr(module, name, linear)
+        else:
+            _to_base_linear(child)
+    return module
+
+
+def quantize_component(module: nn.Module, mode: str) -> nn.Module:
+    r"""fp32 CPU module을 in-place로 quantize."""
+    assert mode in QUANTIZATION_MODES, mode
+    module = module.float().eval()
+    if mode in ('dynamic', 'int8'):
+        module = torch.ao.quantization.quantize_dynamic(_to_base_linear(module), {nn.Linear}, dtype=torch.qint8, inplace=True)
+    if mode == 'int8':
+        module = _apply_weight_only(module, WEIGHT_ONLY_TYPES)
+    elif mode == 'weight_only':
+        module = _apply_weight_only(module, WEIGHT_ONLY_TYPES + (nn.Linear,))
+    for p in module.parameters():
+        p.requires_grad_(False)
+    return module
+
+
+def quantized_cache_path(cache_dir, name, mode, revision):
+    return os.path.join(cache_dir, f'{name}-{mode}-{revision[:16]}.state.pt')
+
+
+def save_quantized(module: nn.Module, mode: str, path):
+    r"""quantize된 state_dict (packed int8 weight 포함) + mode + non-persistent buffer 저장 (tensor만, pickle된 class 없음)."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    state_dict = module.state_dict()
+    buffers = {name: b for name, b in module.named_buffers() if name not in state_dict}
+    tmp = f'{path}.{os.getpid()}.tmp'
+    torch.save({'mode': mode, 'state_dict': state_dict, 'buffers': buffers}, tmp)
+    os.replace(tmp, path)
+
+
+def load_quantized(path, module: nn.Module) -> nn.Module:
+    r"""module: 같은 config로 만든 빈 fp32 module (meta device 가능, shared_weights.empty_component).
+    저장된 mode로 같은 구조를 만든 뒤 int8 weight를 load -> fp32 weight 로드 / requantize 없음.
+    weights_only=True: cache 파일에서 tensor 외의 객체를 unpickle하지 않음.
+    """
+    saved = torch.load(path, map_location='cpu', weights_only=True)
+    module = module.to_empty(device='cpu')
+    for p in module.parameters():
+        p.data.zero_()  # quantize할 자리만 채움 (아래 load_state_dict가 덮어씀)
+    module = quantize_component(module, saved['mode'])
+    module.load_state_dict(saved['state_dict'])
+    for name, tensor in saved['buffers'].items():
+        prefix, _, leaf = name.rpartition('.')
+        (module.get_submodule(prefix) if prefix else module)._buffers[leaf] = tensor
+    return module.eval()
+
+
+def module_size_mb(module: nn.Module) -> float:
+    r"""state_dict tensor 크기 합 (packed dynamic Linear의 int8 weight 포함)."""
+    def nbytes(value):
+        if isinstance(value, torch.Tensor):
+            return value.numel() * value.element_size()
+        if isinstance(value, (tuple, list)):
+            return sum(nbytes(v) for v in value)
+        return 0
+    return sum(nbytes(v) for v in module.state_dict().values()) / 2 ** 20
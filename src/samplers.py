@@ -0,0 +1,272 @@
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import torch
+
+
+@dataclass(frozen=True)
+class SamplerTables:
+    r"""(num_inference_steps, transfer_strength) 하나에 대한 sampler 상수 table.
+    모든 tensor는 device 위에 있고 생성 이후 수정되지 않음 (여러 thread에서 공유 가능).
+    """
+    timesteps: torch.Tensor        # ts[S] long, denoising 순서 (980, 960, ..., 0 중 마지막 S개)
+    timestep_list: Tuple[int, ...]  # 같은 값의 python int (host 분기용, .item() sync 없음)
+    alphas: torch.Tensor           # ts[S] alpha_cumprod(t)
+    noise_x: torch.Tensor          # ts[] noisy = noise_x * x0 + noise_eps * noise (첫 timestep 기준)
+    noise_eps: torch.Tensor        # ts[]
+    coefs: Dict[str, torch.Tensor] = field(default_factory=dict)  # sampler별 update 계수, 각 ts[S]
+    orders: Tuple[int, ...] = ()   # multistep solver의 step별 order
+
+    def __len__(self):
+        return len(self.timestep_list)
+
+
+class TableSampler:
+    r"""Stateless sampler 공통 부분 ("leading" spacing, steps_offset=0, epsilon prediction).
+
+    scheduler 상태를 바꾸지 않고 (num_inference_steps, t_enc, device)별 table을 한 번만 계산해서 cache 함.
+    반복 사이에 필요한 값(multistep의 이전 x0 예측 등)은 `state`로 호출자가 들고 다니므로
+    하나의 sampler를 여러 thread가 공유해도 서로 간섭하지 않음.
+
+    transfer_strength 의미는 모든 solver가 같음: 전체 grid의 마지막 int(strength * steps)개 timestep만
+    사용하고, 그 첫 timestep까지 noising 한 뒤 final alpha(t=-1)까지 denoising.
+    """
+
+    def __init__(self, alphas_cumprod: torch.Tensor, final_alpha_cumprod: float, num_train_timesteps: int = 1000):
+        self.alphas_cumprod = alphas_cumprod.detach().double().cpu()
+        self.final_alpha_cumprod = float(final_alpha_cumprod)
+        self.num_train_timesteps = num_train_timesteps
+        self._tables = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_scheduler(cls, scheduler):
+        return cls(
+            alphas_cumprod=scheduler.alphas_cumprod,
+            final_alpha_cumprod=float(scheduler.final_alpha_cumprod),
+            num_train_timesteps=scheduler.config.num_train_timesteps,
+        )
+
+    @staticmethod
+    def num_used_steps(num_inference_steps, transfer_strength):  # t_enc
+        return int(transfer_strength * num_inference_steps)
+
+    def tables(self, num_inference_steps: int, transfer_strength: float, device) -> SamplerTables:
+        t_enc = self.num_used_steps(num_inference_steps, transfer_strength)
+        key = (num_inference_steps, t_enc, str(torch.device(device)))
+        tables = self._tables.get(key)
+        if tables is None:
+            with self._lock:
+                tables = self._tables.get(key)
+                if tables is None:
+                    tables = self._build(num_inference_steps, t_enc, torch.device(device))
+                    self._tables[key] = tables
+        return tables
+
+    def _build(self, num_inference_steps, t_enc, device):
+        step_ratio = self.num_train_timesteps // num_inference_steps
+        all_timesteps = (torch.arange(num_inference_steps) * step_ratio).flip(0)  # [980, 960, ..., 0]
+        used = self._timesteps(all_timesteps[-t_enc:])  # ddim_noising/ddim_denoising과 동일한 slicing
+
+        # a[k]: used[k]의 alpha_cumprod, a[k+1]: 다음 (더 작은) timestep, 마지막은 final alpha
+        alphas = self.alphas_cumprod[used]
+        alphas_next = torch.cat([alphas[1:], torch.tensor([self.final_alpha_cumprod], dtype=alphas.dtype)])
+        coefs, orders = self._coefs(alphas, alphas_next)
+
+        to = dict(device=device, dtype=torch.float32)
+        return SamplerTables(
+            timesteps=used.to(device),
+            timestep_list=tuple(int(t) for t in used),
+            alphas=alphas.to(**to),
+            noise_x=alphas[0].sqrt().to(**to),
+            noise_eps=(1 - alphas[0]).sqrt().to(**to),
+            coefs={name: coef.to(**to) for name, coef in coefs.items()},
+            orders=orders,
+        )
+
+    def _timesteps(self, used):  # step 위치 조정 hook (첫 timestep = noising 위치는 유지해야 함)
+        return used
+
+    def _coefs(self, alphas, alphas_next):  # float64 ts[S] -> ({name: ts[S]}, orders)
+        raise NotImplementedError
+
+    # ---------------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def add_noise(latents, noise, tables: SamplerTables):  # q(x_t | x_0) at tables.timesteps[0]
+        return torch.addcmul(latents * tables.noise_x, noise, tables.noise_eps)
+
+    @staticmethod
+    def predict_x0(noise_pred, i, latents, tables: SamplerTables):
+        alpha = tables.alphas[i]
+        return (latents - (1 - alpha).sqrt() * noise_pred) / alpha.sqrt()
+
+    def step(self, noise_pred, i, latents, tables: SamplerTables, state=None):  # -> (x_{i+1}, state)
+        raise NotImplementedError
+
+    def jump_to_final(self, noise_pred, i, latents, tables: SamplerTables):  # x_t -> 마지막 step 결과 (final alpha)
+        r"""x0 예측으로 남은 step을 한 번에 건너뜀 (DDIM으로 t -> final alpha). early exit 용."""
+        x0 = self.predict_x0(noise_pred, i, latents, tables)
+        alpha = self.final_alpha_cumprod
+        return x0 * alpha ** 0.5 + noise_pred * (1 - alpha) ** 0.5
+
+
+def select_items(state, index):  # multistep state (tensor / tuple / None)에서 batch 일부만
+    if state is None:
+        return None
+    if isinstance(state, tuple):
+        return tuple(select_items(s, index) for s in state)
+    return state[index]
+
+
+class DDIMSampler(TableSampler):
+    r"""DDIM (eta=0). `DDIMScheduler.set_timesteps`/`step`과 같은 값."""
+
+    def _coefs(self, alphas, alphas_next):
+        # x0 = (x - sqrt(1-a_t) eps) / sqrt(a_t),  x_prev = sqrt(a_prev) x0 + sqrt(1-a_prev) eps
+        c_x = (alphas_next / alphas).sqrt()
+        c_eps = (1 - alphas_next).sqrt() - (alphas_next * (1 - alphas) / alphas).sqrt()
+        return {'x': c_x, 'eps': c_eps}, (1,) * len(alphas)
+
+    def step(self, noise_pred, i, latents, tables, state=None):  # x_t -> x_{t-1}
+        return torch.addcmul(latents * tables.coefs['x'][i], noise_pred, tables.coefs['eps'][i]), None
+
+    @staticmethod
+    def invert_step(noise_pred, i, latents, tables):  # step(i)의 역: x_{t_next} -> x_t (deterministic inversion)
+        return (latents - tables.coefs['eps'][i] * noise_pred) / tables.coefs['x'][i]
+
+
+def _vp_terms(alphas_cumprod):  # -> alpha_t, sigma_t, lambda_t (float64)
+    alpha, sigma = alphas_cumprod.sqrt(), (1 - alphas_cumprod).sqrt()
+    return alpha, sigma, alpha.log() - sigma.log()
+
+
+class MultistepSampler(TableSampler):
+    r"""multistep solver 공통: 같은 시작 timestep / 같은 step 수에서 중간 timestep을 log-SNR(lambda) 균등 간격으로 재배치.
+    leading grid는 t=0 근처의 lambda 변화가 커서 2차 외삽이 불안정하고, 마지막 step(0 -> final alpha)은 길이 0.
+    """
+
+    def _timesteps(self, used):
+        num_steps = len(used)
+        if num_steps < 2 or int(used[0]) < num_steps:
+            return used
+        _, _, lam = _vp_terms(self.alphas_cumprod)  # t가 커질수록 감소
+        # 끝점: final alpha (= alpha_cumprod[0]) -> 마지막 step도 길이 > 0
+        lam_grid = torch.linspace(float(lam[used[0]]), float(lam[0]), num_steps + 1, dtype=torch.float64)[:-1]
+        timesteps = (lam[None, :] - lam_grid[:, None]).abs().argmin(dim=1).tolist()
+        # t=0 근처는 정수 timestep이 겹침 -> 마지막 eval >= 1, strictly decreasing 이 되도록 밀어냄
+        timesteps[0] = int(used[0])
+        for k in range(1, num_steps):
+            timesteps[k] = min(max(timesteps[k], num_steps - k), timesteps[k - 1] - 1)
+        return torch.tensor(timesteps, dtype=used.dtype)
+
+
+class DPMSolverPPSampler(MultistepSampler):
+    r"""DPM-Solver++(2M), data prediction (`DPMSolverMultistepScheduler` algorithm_type="dpmsolver++", order 2).
+    state: 직전 step의 x0 예측.
+    """
+
+    def _coefs(self, alphas, alphas_next):
+        alpha_s, sigma_s, lambda_s = _vp_terms(alphas)
+        alpha_t, sigma_t, lambda_t = _vp_terms(alphas_next)
+        h = lambda_t - lambda_s
+        num_steps = len(alphas)
+
+        c_x = sigma_t / sigma_s
+        c_m = -alpha_t * torch.expm1(-h)  # first order: x_t = c_x * x - alpha_t (e^{-h} - 1) m
+        c_cur, c_prev, orders = c_m.clone(), torch.zeros_like(c_m), []
+        for i in range(num_steps):
+            # lower_order_final: step 수가 적으면 마지막 step은 1차
+            order = 1 if i == 0 or (i == num_steps - 1 and num_steps < 15) else 2
+            if order == 2:
+                r = h[i - 1] / h[i]
+                c_cur[i] = c_m[i] * (1 + 0.5 / r)
+                c_prev[i] = -c_m[i] * (0.5 / r)
+            orders.append(order)
+        return {'x': c_x, 'cur': c_cur, 'prev': c_prev}, tuple(orders)
+
+    def step(self, noise_pred, i, latents, tables, state=None):
+        m_cur = self.predict_x0(noise_pred, i, latents, tables)
+        x = torch.addcmul(latents * tables.coefs['x'][i], m_cur, tables.coefs['cur'][i])
+        if tables.orders[i] == 2:
+            x = torch.addcmul(x, state, tables.coefs['prev'][i])
+        return x, m_cur
+
+
+class UniPCSampler(MultistepSampler):
+    r"""UniPC (bh2, order 2) predictor UniP + corrector UniC, data prediction (`UniPCMultistepScheduler`와 같은 update).
+    corrector는 다음 step의 model output을 재사용하므로 추가 UNet 호출 없음.
+    state: (직전 step의 corrected sample, 직전 x0 예측, 그 이전 x0 예측)
+    """
+
+    def _coefs(self, alphas, alphas_next):
+        alpha_s, sigma_s, lambda_s = _vp_terms(alphas)
+        alpha_t, sigma_t, lambda_t = _vp_terms(alphas_next)
+        num_steps = len(alphas)
+        zeros = lambda: torch.zeros(num_steps, dtype=torch.float64)
+        p_cur, p_prev, c_cur, c_prev, c_new = zeros(), zeros(), zeros(), zeros(), zeros()
+        orders = []
+        for i in range(num_steps):
+            order = min(2, i + 1, num_steps - i)  # lower_order_final
+            h = float(lambda_t[i] - lambda_s[i])
+            hh = -h
+            h_phi_1 = math.expm1(hh)
+            B_h = math.expm1(hh)  # bh2
+            a_t = float(alpha_t[i])
+
+            # x_t_ = sigma_t/sigma_s * x - alpha_t * h_phi_1 * m0
+            base_cur = -a_t * h_phi_1
+            if order == 1:
+                p_cur[i] = base_cur
+                rhos_c = [0.5]
+                rk = None
+            else:
+                rk = float(lambda_s[i - 1] - lambda_s[i]) / h
+                # predictor: - alpha_t * B_h * 0.5 * D1,  D1 = (m_prev - m0) / rk
+                p_cur[i] = base_cur + a_t * B_h * 0.5 / rk
+                p_prev[i] = -a_t * B_h * 0.5 / rk
+                # corrector: R rhos_c = b
+                h_phi_k = h_phi_1 / hh - 1
+                b1 = h_phi_k / B_h
+                h_phi_k = h_phi_k / hh - 0.5
+                b2 = h_phi_k * 2 / B_h
+                det = 1 * 1 - 1 * rk  # R = [[1, 1], [rk, 1]]
+                rhos_c = [(b1 - b2) / det, (b2 - rk * b1) / det]
+
+            # corrector: x_t = x_t_ - alpha_t * B_h * (rho_0 * D1 + rho_last * (m_t - m0))
+            rho_last = rhos_c[-1]
+            c_new[i] = -a_t * B_h * rho_last
+            c_cur[i] = base_cur + a_t * B_h * rho_last
+            if order == 2:
+                c_cur[i] += a_t * B_h * rhos_c[0] / rk
+                c_prev[i] = -a_t * B_h * rhos_c[0] / rk
+            orders.append(order)
+        coefs = {'x': sigma_t / sigma_s, 'p_cur': p_cur, 'p_prev': p_prev, 'c_cur': c_cur, 'c_prev': c_prev, 'c_new': c_new}
+        return coefs, tuple(orders)
+
+    def step(self, noise_pred, i, latents, tables, state=None):
+        coefs = tables.coefs
+        m_cur = self.predict_x0(noise_pred, i, latents, tables)
+        m_prev = None
+        if state is not None:
+            # UniC: 직전 step (i-1)의 결과를 현재 model output으로 보정
+            x_last, m_prev, m_prevprev = state
+            j = i - 1
+            latents = torch.addcmul(x_last * coefs['x'][j], m_prev, coefs['c_cur'][j])
+            latents = torch.addcmul(latents, m_cur, coefs['c_new'][j])
+            if tables.orders[j] == 2:
+                latents = torch.addcmul(latents, m_prevprev, coefs['c_prev'][j])
+        # UniP
+        x = torch.addcmul(latents * coefs['x'][i], m_cur, coefs['p_cur'][i])
+        if tables.orders[i] == 2:
+            x = torch.addcmul(x, m_prev, coefs['p_prev'][i])
+        return x, (latents, m_cur, m_prev)
+
+
+SAMPLERS = {
+    'ddim': DDIMSampler,
+    'dpmpp': DPMSolverPPSampler,
+    'unipc': UniPCSampler,
+}
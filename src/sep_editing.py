@@ -18,34 +18,70 @@ def iterative_audio_transform(
         guidance_scale,
         ddim_steps,
         num_iterations=5,
+        solver="ddim",
+        save_every=1,
+        carry="latent",
         ):
-    current_audio = initial_audio  # 첫 번째 입력 오디오
-    for i in range(1, num_iterations + 1):
+    # 파일은 처음 한 번만 읽고, 반복 사이 상태는 메모리(latent/mel)에 유지
+    mel, _, _, _, _ = processor.read_audio_file(initial_audio)
+
+    def save_snapshot(i, waveform):  # background thread에서 호출
+        # 변환된 오디오 저장
         output_audio = f"./att{i}.wav"
-        
-        mel, _, _, _, _ = processor.read_audio_file(current_audio)
-        # AudioLDM을 사용하여 스타일 변환 수행
-        waveform = ldm.edit_audio_with_ddim(
-            mel=mel,      ###
-            text=target_text,
-            duration=10.24,
-            batch_size=1,
-            transfer_strength=transfer_strength,
-            guidance_scale=guidance_scale,
-            ddim_steps=ddim_steps,
-            clipping = False,
-        )
-        if i % 1 == 0:
-            # 변환된 오디오 저장       ###
-
-            waveform = waveform.detach().cpu().numpy().squeeze(0)
-            sf.write(output_audio, waveform, 16000)
-            print(f"Generated: {output_audio}")
-
-        
-        
-        # 다음 단계의 입력 오디오를 현재 출력으로 설정
-        current_audio = output_audio
+        sf.write(output_audio, waveform.squeeze(0), 16000)
+        print(f"Generated: {output_audio}")
+
+    # AudioLDM을 사용하여 스타일 변환 수행
+    waveform = ldm.iterative_edit(
+        mel=mel,
+        text=target_text,
+        num_iterations=num_iterations,
+        transfer_strength=transfer_strength,
+        guidance_scale=guidance_scale,
+        ddim_steps=ddim_steps,
+        duration=10.24,
+        clipping=False,
+        carry=carry,
+        snapshot_every=save_every,
+        snapshot_fn=save_snapshot if save_every else None,
+        solver=solver,
+    )
+    return waveform
+
+def multi_query_separation(
+        ldm, processor,
+        mixture_audio,
+        queries,
+        transfer_strength,
+        guidance_scale,
+        ddim_steps,
+        num_iterations=1,
+        solver="ddim",
+        seed=None,
+        inversion=False,
+        early_exit=None,
+        output_dir="./",
+        ):
+    # mixture는 한 번만 읽고 encode, query들은 한 batch로 분리
+    mel, _, _, _, _ = processor.read_audio_file(mixture_audio)
+    waveforms = ldm.separate_queries(
+        mel=mel,
+        texts=queries,
+        transfer_strength=transfer_strength,
+        guidance_scale=guidance_scale,
+        ddim_steps=ddim_steps,
+        num_iterations=num_iterations,
+        solver=solver,
+        seed=seed,
+        inversion=inversion,
+        early_exit=early_exit,
+        return_type="np",
+    )
+    for query, waveform in zip(queries, waveforms):
+        output_audio = os.path.join(output_dir, f"{query.replace(' ', '_')}.wav")
+        sf.write(output_audio, waveform, 16000)
+        print(f"Generated: {output_audio}")
+    return waveforms
 
 if __name__ == "__main__":
 
@@ -0,0 +1,360 @@
+r"""text-query separation serving layer.
+
+SeparationServer: warm AudioLDM 하나를 공유하는 asyncio dynamic batcher.
+- (ddim_steps, transfer_strength, guidance_scale, solver, mel shape, 출력 종류)가 같은 요청끼리 batch로 묶음
+- 한 group의 첫 요청 이후 max_wait_ms가 지나거나 max_batch가 차면 실행
+- 모델 실행은 전용 thread 하나에서 (GPU 연산 직렬화), event loop는 계속 요청을 받음
+- 요청마다 asyncio.Future -> 결과 / 에러 전달
+- seed를 주면 batch 구성과 상관없이 결과가 같음 (item별 torch.Generator)
+
+front end: unix socket JSON-lines (한 줄 = 요청 하나, 한 줄 = 응답 하나)
+    {"op": "separate", "mixture": "mix.wav", "text": "A cat meowing", "output": "out.wav",
+     "ddim_steps": 50, "transfer_strength": 0.2, "guidance_scale": 2.5, "solver": "ddim", "seed": 0}
+    {"op": "metrics"}
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import numpy as np
+import torch
+import soundfile as sf
+
+
+EDIT_DEFAULTS = dict(ddim_steps=50, transfer_strength=0.2, guidance_scale=2.5, solver="ddim", return_type="np")
+
+
+@dataclass
+class SeparationRequest:
+    mel: torch.Tensor  # ts[1, 1, T:1024, M:64]
+    text: str
+    params: Dict[str, Any]
+    seed: Optional[int]
+    future: asyncio.Future
+    t_submit: float = field(default_factory=time.perf_counter)
+
+    @property
+    def group_key(self):  # 같은 batch로 묶을 수 있는 조건
+        p = self.params
+        return (p['ddim_steps'], p['transfer_strength'], p['guidance_scale'], p['solver'],
+                p['return_type'], tuple(self.mel.shape[1:]))
+
+
+class ServingMetrics:
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.latencies: List[float] = []    # submit -> 결과 (sec)
+        self.queue_waits: List[float] = []  # submit -> batch dispatch (sec)
+        self.batch_sizes: List[int] = []
+        self.completed = 0
+        self.failed = 0
+        self.t_start = time.perf_counter()
+
+    def _push(self, values, value):
+        values.append(value)
+        del values[:-self.window]
+
+    def record_batch(self, requests, t_run):
+        self._push(self.batch_sizes, len(requests))
+        for r in requests:
+            self._push(self.queue_waits, t_run - r.t_submit)
+
+    def record_done(self, request, ok=True):
+        if ok:
+            self.completed += 1
+            self._push(self.latencies, time.perf_counter() - request.t_submit)
+        else:
+            self.failed += 1
+
+    def summary(self) -> Dict[str, float]:
+        def pct(values, q):
+            return float(np.percentile(values, q)) if values else float('nan')
+        elapsed = time.perf_counter() - self.t_start
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'throughput': self.completed / elapsed if elapsed > 0 else 0.0,  # items/s
+            'latency_p50': pct(self.latencies, 50),
+            'latency_p95': pct(self.latencies, 95),
+            'queue_wait_p50': pct(self.queue_waits, 50),
+            'mean_batch': float(np.mean(self.batch_sizes)) if self.batch_sizes else float('nan'),
+        }
+
+
+class SeparationServer:
+    def __init__(self, aldm, max_batch: int = 8, max_wait_ms: float = 20.0):
+        self.aldm = aldm
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = ServingMetrics()
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Dict[tuple, List[SeparationRequest]] = {}
+        self._deadlines: Dict[tuple, float] = {}
+        self._model_executor = ThreadPoolExecutor(max_workers=1)  # 모델 호출은 한 thread에서 순서대로
+        self._batcher: Optional[asyncio.Task] = None
+        self._running: set = set()
+        self._closed = False
+
+    # ---------------------------------------------------------------------------------------- #
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._batch_loop())
+
+    async def stop(self):
+        self._closed = True  # 이후 separate는 바로 에러
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        while self._queue is not None and not self._queue.empty():  # batcher가 아직 꺼내지 않은 요청
+            request = self._queue.get_nowait()
+            key = request.group_key
+            self._pending.setdefault(key, []).append(request)
+            if len(self._pending[key]) >= self.max_batch:
+                self._dispatch(key)
+        for key in list(self._pending):  # 남은 요청도 처리
+            self._dispatch(key)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+        self._model_executor.shutdown(wait=True)
+
+    async def separate(self, mel: torch.Tensor, text: str, seed: Optional[int] = None, **params):
+        r"""mel: ts[1, 1, T, M] (또는 [1, T, M]). 결과: return_type에 따른 np / ts (batch 축 없음)."""
+        if self._closed or self._queue is None:
+            raise RuntimeError("SeparationServer is not running")
+        if mel.dim() == 3:
+            mel = mel.unsqueeze(0)
+        assert mel.dim() == 4 and mel.shape[0] == 1, mel.shape
+        unknown = set(params) - set(EDIT_DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown edit params {sorted(unknown)}")
+        request = SeparationRequest(
+            mel=mel, text=text, params={**EDIT_DEFAULTS, **params}, seed=seed,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        await self._queue.put(request)
+        return await request.future
+
+    # ---------------------------------------------------------------------------------------- #
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                timeout = None
+                if self._deadlines:
+                    timeout = max(0.0, min(self._deadlines.values()) - loop.time())
+                try:
+                    request = await asyncio.wait_for(self._queue.get(), timeout)
+                    key = request.group_key
+                    self._pending.setdefault(key, []).append(request)
+                    self._deadlines.setdefault(key, loop.time() + self.max_wait)
+                    if len(self._pending[key]) >= self.max_batch:
+                        self._dispatch(key)
+                except asyncio.TimeoutError:
+                    pass
+                now = loop.time()
+                for key in [k for k, d in self._deadlines.items() if d <= now]:
+                    self._dispatch(key)
+        finally:
+            if not self._closed:  # stop()이 아닌 이유로 batcher가 끝남 -> 모으던 요청이 영영 끝나지 않으므로 실패 처리
+                self._closed = True
+                self._fail_pending(RuntimeError("SeparationServer batcher stopped"))
+
+    def _fail_pending(self, error):
+        requests = [r for group in self._pending.values() for r in group]
+        while not self._queue.empty():
+            requests.append(self._queue.get_nowait())
+        self._pending.clear()
+        self._deadlines.clear()
+        for r in requests:
+            self.metrics.record_done(r, ok=False)
+            if not r.future.done():
+                r.future.set_exception(error)
+
+    def _dispatch(self, key):
+        requests = self._pending.pop(key)
+        self._deadlines.pop(key, None)
+        task = asyncio.get_running_loop().create_task(self._run_batch(requests))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, requests: List[SeparationRequest]):
+        self.metrics.record_batch(requests, time.perf_counter())
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(self._model_executor, self._edit_batch, requests)
+        except Exception as e:
+            for r in requests:
+                self.metrics.record_done(r, ok=False)
+                if not r.future.done():
+                    r.future.set_exception(e)
+            return
+        for r, out in zip(requests, outputs):
+            self.metrics.record_done(r)
+            if not r.future.done():  # client가 취소했을 수 있음
+                r.future.set_result(out)
+
+    def _edit_batch(self, requests: List[SeparationRequest]):  # model thread
+        params = requests[0].params
+        # seed 없는 요청은 random seed -> seed 있는 요청의 결과는 batch 구성과 무관
+        seeds = [r.seed if r.seed is not None else int(torch.randint(2**31 - 1, ())) for r in requests]
+        mel = torch.cat([r.mel for r in requests]).to(self.aldm.device)
+        with torch.no_grad():
+            out = self.aldm.edit_audio_with_ddim(
+                mel=mel,
+                text=[r.text for r in requests],
+                duration=self.aldm.audio_duration,
+                batch_size=len(requests),
+                transfer_strength=params['transfer_strength'],
+                guidance_scale=params['guidance_scale'],
+                ddim_steps=params['ddim_steps'],
+                solver=params['solver'],
+                return_type=params['return_type'],
+                seed=seeds,
+            )
+        return list(out)
+
+
+# --------------------------------------------------------------------------------------------- #
+
+class UnixSocketFrontend:
+    r"""JSON-lines over unix socket. 오디오는 경로로 주고받음 (같은 머신의 client script 용)."""
+
+    def __init__(self, server: SeparationServer, processor, socket_path: str):
+        self.server = server
+        self.processor = processor
+        self.socket_path = socket_path
+        self._io_executor = ThreadPoolExecutor(max_workers=4)  # 파일 read / write
+
+    async def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        await self.server.start()
+        unix_server = await asyncio.start_unix_server(self._handle_client, path=self.socket_path)
+        print(f"[INFO] serving.py: listening on {self.socket_path}")
+        try:
+            async with unix_server:
+                await unix_server.serve_forever()
+        finally:
+            await self.server.stop()
+            self._io_executor.shutdown(wait=False)
+
+    async def _handle_client(self, reader, writer):
+        tasks = set()
+        lock = asyncio.Lock()
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError("request must be a JSON object")
+                except ValueError as e:  # JSONDecodeError 포함: 에러만 응답하고 연결은 유지
+                    await self._write(writer, lock, {'error': f"{type(e).__name__}: {e}", 'id': None})
+                    continue
+                # 한 연결에서 여러 요청을 pipelining 가능 -> 요청마다 task, 응답은 "id"로 매칭
+                task = asyncio.create_task(self._respond(message, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+    async def _respond(self, message, writer, lock):
+        request_id = message.get('id')  # _handle이 message를 소비하므로 먼저
+        try:
+            response = await self._handle(message)
+        except Exception as e:  # 필드 누락 (KeyError) 등 -> 에러 응답
+            response = {'error': f"{type(e).__name__}: {e}"}
+        response['id'] = request_id
+        await self._write(writer, lock, response)
+
+    @staticmethod
+    async def _write(writer, lock, response):
+        async with lock:
+            writer.write((json.dumps(response) + '\n').encode())
+            await writer.drain()
+
+    async def _handle(self, message):
+        op = message.pop('op', 'separate')
+        if op == 'metrics':
+            return self.server.metrics.summary()
+        if op != 'separate':
+            raise ValueError(f"Unknown op '{op}'")
+
+        missing = [name for name in ('mixture', 'output', 'text') if name not in message]
+        if missing:
+            raise KeyError(f"missing fields {missing}")
+        loop = asyncio.get_running_loop()
+        t_start = time.perf_counter()
+        mixture, output = message.pop('mixture'), message.pop('output')
+        text, seed = message.pop('text'), message.pop('seed', None)
+        message.pop('id', None)
+        if 'return_type' in message:  # 결과는 항상 wav 파일로 씀
+            raise ValueError("return_type is not supported for socket requests")
+        mel = await loop.run_in_executor(self._io_executor, lambda: self.processor.read_audio_file(mixture)[0])
+        wav = await self.server.separate(mel.cpu(), text, seed=seed, return_type="np", **message)
+        await loop.run_in_executor(self._io_executor, sf.write, output, np.asarray(wav).squeeze(), self.server.aldm.sampling_rate)
+        return {'output': output, 'latency': time.perf_counter() - t_start}
+
+
+class SeparationClient:
+    r"""동기 client. 같은 warm 모델을 여러 script에서 재사용."""
+
+    def __init__(self, socket_path: str):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile('rwb')
+        self._next_id = 0
+
+    def _call(self, message):
+        self._next_id += 1
+        message = {**message, 'id': self._next_id}
+        self.file.write((json.dumps(message) + '\n').encode())
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    def separate(self, mixture: str, text: str, output: str, **params):
+        return self._call({'op': 'separate', 'mixture': mixture, 'text': text, 'output': output, **params})
+
+    def metrics(self):
+        return self._call({'op': 'metrics'})
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+if __name__ == "__main__":
+    from src.audioldm import AudioLDM as ldm
+    from src.utilities.data.dataprocessor import AudioDataProcessor as prcssr
+
+    config = {
+        'device': 'cuda:0' if torch.cuda.is_available() else 'cpu',
+        'precision': 'fp32',
+        'socket_path': '/tmp/audioldm_separation.sock',
+        'max_batch': 8,
+        'max_wait_ms': 20,
+    }
+
+    aldm = ldm(config['device'], precision=config['precision'], lazy=False)
+    processor = prcssr(device=aldm.device)
+    server = SeparationServer(aldm, max_batch=config['max_batch'], max_wait_ms=config['max_wait_ms'])
+    asyncio.run(UnixSocketFrontend(server, processor, config['socket_path']).serve_forever())
@@ -0,0 +1,88 @@
+r"""여러 worker process가 한 머신에서 AudioLDM weight의 물리 메모리 한 벌을 공유하도록 하는 loader.
+
+1. export_shared_weights(aldm, dir): component별 weight (parameter + buffer, weight dtype 그대로)를 <dir>/<name>.pt로 저장
+2. 각 worker: AudioLDM(..., shared_weights=dir)
+   -> config로 meta device 위에 module을 만들고, torch.load(mmap=True)한 tensor를 그대로 할당 (복사 없음)
+   -> 같은 파일의 page cache를 모든 process가 read-only로 map -> RSS에는 잡히지만 PSS는 1/N
+device가 cpu가 아니거나 dtype 변환이 필요하면 .to()에서 복사가 일어나므로 공유 효과는 host 쪽 load 시점까지만.
+"""
+
+import os
+from itertools import chain
+from typing import Dict, Optional
+
+import torch
+import torch.nn as nn
+
+
+def shared_weights_path(weights_dir, name):
+    return os.path.join(weights_dir, f'{name}.pt')
+
+
+def has_shared_weights(weights_dir, name):
+    return weights_dir is not None and os.path.exists(shared_weights_path(weights_dir, name))
+
+
+def module_tensors(module: nn.Module) -> Dict[str, torch.Tensor]:  # tied weight도 이름별로 (storage는 공유)
+    named = chain(module.named_parameters(remove_duplicate=False), module.named_buffers(remove_duplicate=False))
+    return {name: tensor.detach().cpu() for name, tensor in named}
+
+
+def export_shared_weights(aldm, weights_dir, components=('vae', 'text_encoder', 'unet', 'vocoder')):
+    os.makedirs(weights_dir, exist_ok=True)
+    for name in components:
+        path = shared_weights_path(weights_dir, name)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        torch.save(module_tensors(aldm.load_component(name)), tmp)
+        os.replace(tmp, path)
+        print(f"[INFO] shared_weights.py: exported {name} -> {path}")
+
+
+def assign_tensors(module: nn.Module, tensors: Dict[str, torch.Tensor]):  # meta module에 tensor를 복사 없이 할당
+    for full_name, tensor in tensors.items():
+        prefix, _, leaf = full_name.rpartition('.')
+        owner = module.get_submodule(prefix) if prefix else module
+        if leaf in owner._parameters:
+            # weight는 read-only mmap -> grad 불필요 (SDS는 latent에만 gradient)
+            owner._parameters[leaf] = nn.Parameter(tensor, requires_grad=False)
+        elif leaf in owner._buffers:
+            owner._buffers[leaf] = tensor
+        else:
+            raise KeyError(f"{full_name} not found in {type(module).__name__}")
+    missing = [n for n, t in chain(module.named_parameters(), module.named_buffers()) if t.is_meta]
+    if missing:
+        raise RuntimeError(f"{type(module).__name__}: shared weights missing {missing[:5]} ...")
+    return module
+
+
+def empty_component(cls, checkpoint_path, name):  # config만 읽어서 meta device 위에 module 생성 (weight 할당 없음)
+    if hasattr(cls, 'load_config'):  # diffusers
+        config = cls.load_config(checkpoint_path, subfolder=name)
+        with torch.device('meta'):
+            return cls.from_config(config)
+    config = cls.config_class.from_pretrained(checkpoint_path, subfolder=name)  # transformers
+    with torch.device('meta'):
+        return cls(config)
+
+
+def load_shared_component(cls, checkpoint_path, name, weights_dir):
+    r"""config로 meta device에 module 생성 후 mmap된 weight 할당."""
+    module = empty_component(cls, checkpoint_path, name)
+    tensors = torch.load(shared_weights_path(weights_dir, name), map_location='cpu', mmap=True, weights_only=True)
+    return assign_tensors(module, tensors).eval()
+
+
+def memory_usage(pid: Optional[int] = None) -> Dict[str, float]:  # MB, /proc/<pid>/smaps_rollup (linux)
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    fields = {}
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                fields[parts[0][:-1]] = int(parts[1]) / 1024  # kB -> MB
+    return {
+        'rss': fields.get('Rss', 0.0),
+        'pss': fields.get('Pss', 0.0),
+        'shared': fields.get('Shared_Clean', 0.0) + fields.get('Shared_Dirty', 0.0),
+        'private': fields.get('Private_Clean', 0.0) + fields.get('Private_Dirty', 0.0),
+    }
@@ -0,0 +1,139 @@
+r"""tiled VAE의 GroupNorm 통계 동기화.
+
+VAE의 GroupNorm은 (group, 시간, 주파수) 전체에서 mean / var를 구함 -> tile별로 돌리면 tile마다 정규화가 달라져 seam / drift 발생.
+1. record: tile들을 한 번 돌리며 GroupNorm 입력의 시간 위치별 (sum, sum of squares)를 원래 시간축에 모음
+   (겹치는 구간은 tile 평균 -> 한 번만 셈)
+2. apply: 모은 통계 (= 원래 입력 전체의 통계 근사)로 GroupNorm을 계산하며 다시 실행
+통계는 ts[B, G, T'] 크기라 memory는 tile batch 하나 분량 그대로, 연산은 (passes + 1)배.
+GroupNorm에는 hook만 걸고 (호출 중에만, reference count), 어떤 통계를 쓸지는 thread-local로 찾음
+-> 같은 VAE를 다른 thread가 동시에 써도 (tiled / untiled 모두) 서로의 통계 / row를 보지 않음.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+import torch
+import torch.nn as nn
+
+
+def _as_time_freq(x, tile_frames):  # GroupNorm 입력 -> ts[b, C, T', M'] (attention은 [b, C, T'*M'] 형태)
+    if x.dim() == 4:
+        return x
+    # 시간 / 주파수 축 비율은 입력 tile과 같음 (같은 배율로 downsample)
+    b, c, hw = x.shape
+    T = round((hw * tile_frames[0] / tile_frames[1]) ** 0.5)
+    return x.reshape(b, c, T, hw // T)
+
+
+_local = threading.local()  # .sync: 현재 thread에서 실행 중인 GroupNormSync
+_hooks_lock = threading.Lock()
+_hooks: Dict[int, list] = {}  # id(module) -> [사용 중인 sync 수, hook handles]
+
+
+def _pre_hook(norm, inputs):
+    sync = getattr(_local, 'sync', None)
+    if sync is not None and 'record' in sync._modes and norm in sync._norm_set:
+        sync._accumulate(norm, inputs[0])
+
+
+def _hook(norm, inputs, output):
+    sync = getattr(_local, 'sync', None)
+    if sync is not None and 'apply' in sync._modes and norm in sync._stats:
+        return sync._forward(norm, inputs[0])  # 출력을 전체 통계 기준 GroupNorm으로 교체
+    return None
+
+
+class GroupNormSync:
+    r"""
+    - module: GroupNorm을 찾을 module (vae)
+    - spans: tile 구간 (chunk_spans, 시간 단위 frame), total: 전체 frame 수
+    - tile_shape: tile 입력의 (시간, 주파수) 크기
+    tile 순서는 tile-major (row = k * num_items + b). 실행 전에 현재 batch의 row index를 self.rows에 넣음.
+    호출 하나에서만 쓰는 객체 (record / apply는 그 context를 연 thread의 forward에만 적용).
+    """
+
+    def __init__(self, module: nn.Module, num_items: int, spans: List[Tuple[int, int]], total: int, tile_shape):
+        self.module = module
+        self.norms = [m for m in module.modules() if isinstance(m, nn.GroupNorm)]
+        self._norm_set = set(self.norms)
+        self._modes = set()
+        self.num_items = num_items
+        self.spans = spans
+        self.total = total
+        self.tile_shape = tile_shape
+        self.rows = None
+        self._acc: Dict[nn.GroupNorm, List[torch.Tensor]] = {}  # [sum, sumsq, coverage, elements per position]
+        self._stats: Dict[nn.GroupNorm, Tuple[torch.Tensor, torch.Tensor]] = {}
+
+    def _accumulate(self, norm, x):
+        x = _as_time_freq(x, self.tile_shape).float()
+        b, c, T, M = x.shape
+        scale = T / (self.spans[0][1] - self.spans[0][0])  # tile frame 1개당 activation 시간 위치 수
+        grouped = x.reshape(b, norm.num_groups, c // norm.num_groups, T, M)
+        sums = torch.stack([grouped.sum((2, 4)), grouped.square().sum((2, 4))])  # ts[2, b, G, T]
+        if norm not in self._acc:
+            length = round(self.total * scale)
+            self._acc[norm] = [x.new_zeros(2, self.num_items, norm.num_groups, length), x.new_zeros(length),
+                               (c // norm.num_groups) * M]
+        acc, coverage, _ = self._acc[norm]
+        for j, row in enumerate(self.rows.tolist()):
+            k, item = divmod(row, self.num_items)
+            start = round(self.spans[k][0] * scale)
+            acc[:, item, :, start:start + T] += sums[:, j]
+            if item == 0:
+                coverage[start:start + T] += 1
+
+    def _finalize(self):
+        for norm, (acc, coverage, elements) in self._acc.items():
+            per_position = acc / coverage.clamp(min=1)  # 겹친 구간은 tile 평균
+            count = elements * acc.shape[-1]
+            mean = per_position[0].sum(-1) / count  # ts[B, G]
+            var = (per_position[1].sum(-1) / count - mean.square()).clamp(min=0)
+            self._stats[norm] = (mean, var)
+        self._acc = {}
+
+    def _forward(self, norm, x):
+        mean, var = (s[self.rows % self.num_items] for s in self._stats[norm])  # ts[b, G]
+        y = x.float().reshape(x.shape[0], norm.num_groups, -1)
+        y = ((y - mean[..., None]) * torch.rsqrt(var[..., None] + norm.eps)).reshape(x.shape)
+        if norm.affine:
+            shape = (1, -1) + (1,) * (x.dim() - 2)
+            y = y * norm.weight.float().reshape(shape) + norm.bias.float().reshape(shape)
+        return y.to(x.dtype)
+
+    @contextmanager
+    def _active(self, mode):
+        key = id(self.module)
+        with _hooks_lock:  # hook은 처음 쓰는 호출이 걸고 마지막 호출이 뗌
+            if key not in _hooks:
+                handles = [h for m in self.norms
+                           for h in (m.register_forward_pre_hook(_pre_hook), m.register_forward_hook(_hook))]
+                _hooks[key] = [0, handles]
+            _hooks[key][0] += 1
+        previous = getattr(_local, 'sync', None)
+        _local.sync = self
+        self._modes.add(mode)
+        try:
+            yield
+        finally:
+            self._modes.discard(mode)
+            _local.sync = previous
+            with _hooks_lock:
+                _hooks[key][0] -= 1
+                if _hooks[key][0] == 0:
+                    for h in _hooks.pop(key)[1]:
+                        h.remove()
+
+    @contextmanager
+    def record(self):
+        r"""이 안의 forward에서 통계 수집 (apply 안에서 다시 record하면 통계를 한 단계 더 정확하게)."""
+        with self._active('record'):
+            yield
+        self._finalize()
+
+    @contextmanager
+    def apply(self):
+        r"""이 안의 forward는 record로 모은 통계로 GroupNorm 계산."""
+        with self._active('apply'):
+            yield
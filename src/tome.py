@@ -0,0 +1,85 @@
+r"""ToMe (token merging) for the AudioLDM UNet self-attention.
+
+audio latent은 무음 / stationary noise 구간이 길어서 비슷한 token이 많음.
+attention 전에 서로 비슷한 token r개를 짝지어 평균으로 합치고 (N -> N - r), attention 결과를 원래 위치로 되돌림.
+attention 비용은 O(N^2) -> O((N - r)^2). AudioLDM은 encoder_hidden_states=None이라 attn1 / attn2 모두 self-attention.
+"""
+
+from typing import Callable, Tuple
+
+import torch
+
+
+def bipartite_soft_matching(x: torch.Tensor, r: int) -> Tuple[Callable, Callable]:
+    r"""x: ts[B, N, C]. token을 짝수 (src) / 홀수 (dst)로 나누고, src 중 dst와 cosine 유사도가 가장 높은 r개를 dst에 합침.
+    Returns:
+    - merge: ts[B, N, C] -> ts[B, N - r, C]
+    - unmerge: ts[B, N - r, C'] -> ts[B, N, C'] (합쳐진 token은 dst의 값을 복사)
+    """
+    B, N, _ = x.shape
+    r = min(r, N // 2)
+    if r <= 0:
+        return (lambda t: t), (lambda t: t)
+
+    with torch.no_grad():
+        metric = x / x.norm(dim=-1, keepdim=True).clamp(min=1e-6)
+        a, b = metric[:, ::2], metric[:, 1::2]
+        scores = a @ b.transpose(-1, -2)  # ts[B, Na, Nb]
+        node_max, node_idx = scores.max(dim=-1)  # src별 가장 비슷한 dst
+        edge_idx = node_max.argsort(dim=-1, descending=True)[..., None]
+        unm_idx = edge_idx[:, r:]  # 남길 src
+        src_idx = edge_idx[:, :r]  # 합칠 src
+        dst_idx = node_idx[..., None].gather(dim=1, index=src_idx)
+
+    def merge(t):
+        src, dst = t[:, ::2], t[:, 1::2]
+        c = t.shape[-1]
+        unm = src.gather(dim=1, index=unm_idx.expand(-1, -1, c))
+        src = src.gather(dim=1, index=src_idx.expand(-1, -1, c))
+        dst = dst.scatter_reduce(1, dst_idx.expand(-1, -1, c), src, reduce="mean")
+        return torch.cat([unm, dst], dim=1)
+
+    def unmerge(t):
+        num_unm, c = unm_idx.shape[1], t.shape[-1]
+        unm, dst = t[:, :num_unm], t[:, num_unm:]
+        src = dst.gather(dim=1, index=dst_idx.expand(-1, -1, c))
+        out = t.new_zeros(B, N, c)
+        out[:, 1::2] = dst
+        out.scatter_(dim=1, index=(2 * unm_idx).expand(-1, -1, c), src=unm)
+        out.scatter_(dim=1, index=(2 * src_idx).expand(-1, -1, c), src=src)
+        return out
+
+    return merge, unmerge
+
+
+class ToMeAttnProcessor:
+    r"""기존 attention processor (AttnProcessor / AttnProcessor2_0 / Sliced...)를 감싸서 self-attention 전에 token merging.
+    - ratio: 없앨 token 비율 (최대 0.5)
+    - min_tokens: token 수가 이보다 적은 (낮은 해상도) block은 그대로
+    """
+
+    def __init__(self, processor, ratio: float = 0.5, min_tokens: int = 1024):
+        self.processor = processor
+        self.ratio = ratio
+        self.min_tokens = min_tokens
+
+    def __call__(self, attn, hidden_states, encoder_hidden_states=None, attention_mask=None, **kwargs):
+        if (self.ratio <= 0 or encoder_hidden_states is not None or attention_mask is not None
+                or hidden_states.ndim != 3 or hidden_states.shape[1] < self.min_tokens
+                or attn.residual_connection or attn.group_norm is not None or attn.spatial_norm is not None):
+            return self.processor(attn, hidden_states, encoder_hidden_states=encoder_hidden_states,
+                                  attention_mask=attention_mask, **kwargs)
+        merge, unmerge = bipartite_soft_matching(hidden_states, int(hidden_states.shape[1] * self.ratio))
+        return unmerge(self.processor(attn, merge(hidden_states), **kwargs))
+
+
+def apply_token_merging(unet, ratio: float = 0.5, min_tokens: int = 1024):
+    r"""transformer block의 attn1 / attn2 processor를 ToMeAttnProcessor로 감쌈 (이미 감싸져 있으면 교체). ratio=0이면 해제."""
+    processors = {}
+    for name, processor in unet.attn_processors.items():
+        if isinstance(processor, ToMeAttnProcessor):
+            processor = processor.processor
+        if ratio > 0 and (name.endswith('attn1.processor') or name.endswith('attn2.processor')):
+            processor = ToMeAttnProcessor(processor, ratio=ratio, min_tokens=min_tokens)
+        processors[name] = processor
+    unet.set_attn_processor(processors)
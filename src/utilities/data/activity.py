@@ -0,0 +1,141 @@
+r"""파일별 activity index: 짧은 frame마다 peak / RMS를 한 번 계산해서 파일 옆에 cache.
+
+무음 탐색 (random_segment_wav의 재시도, trim_wav_의 chunk scan, 긴 오디오의 무음 window)을 매번 waveform에서 다시 하지 않고
+frame 통계 np[F]만 보고 결정. 통계는 원본 sampling rate / mono (channel 평균), normalize 전 진폭 기준.
+cache: `<audio>.activity.npz` (또는 cache_dir 아래) + (파일 크기, mtime, frame 길이)가 같을 때만 재사용.
+"""
+
+import os
+import hashlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+
+class ActivityIndex:
+    r"""
+    - peak / rms: np[F] frame별 max |x| / RMS (frame = frame_length sample, 마지막 frame은 짧을 수 있음)
+    - num_samples / sampling_rate: 원본 파일 기준
+    """
+
+    VERSION = 1
+
+    def __init__(self, peak: np.ndarray, rms: np.ndarray, frame_length: int, num_samples: int, sampling_rate: int):
+        self.peak = peak
+        self.rms = rms
+        self.frame_length = frame_length
+        self.num_samples = num_samples
+        self.sampling_rate = sampling_rate
+
+    @staticmethod
+    def _frame_stats(waveform, frame_length):  # np[N] -> frame별 (peak, sum of squares, sample 수)
+        num_frames = -(-waveform.shape[0] // frame_length)
+        frames = np.zeros(num_frames * frame_length, dtype=np.float32)
+        frames[:waveform.shape[0]] = waveform
+        frames = frames.reshape(num_frames, frame_length)
+        lengths = np.minimum(frame_length, waveform.shape[0] - np.arange(num_frames) * frame_length)
+        return np.abs(frames).max(1), np.square(frames, dtype=np.float64).sum(1), lengths
+
+    @classmethod
+    def from_waveform(cls, waveform: np.ndarray, sampling_rate: int, frame_seconds: float = 0.0625):
+        waveform = np.asarray(waveform, dtype=np.float32).reshape(-1)
+        frame_length = max(int(round(sampling_rate * frame_seconds)), 1)
+        peak, squares, lengths = cls._frame_stats(waveform, frame_length)
+        return cls(peak, np.sqrt(squares / lengths).astype(np.float32), frame_length, waveform.shape[0], sampling_rate)
+
+    @classmethod
+    def from_file(cls, path, frame_seconds: float = 0.0625, block_frames: int = 2 ** 18):  # block 단위로 읽음 (memory 일정)
+        sr = sf.info(path).samplerate
+        frame_length = max(int(round(sr * frame_seconds)), 1)
+        block_frames = max(block_frames // frame_length, 1) * frame_length  # block 경계 = frame 경계
+        stats = [cls._frame_stats(block.mean(axis=1), frame_length)
+                 for block in sf.blocks(path, blocksize=block_frames, dtype='float32', always_2d=True)]
+        peak, squares, lengths = (np.concatenate(s) for s in zip(*stats))
+        return cls(peak, np.sqrt(squares / lengths).astype(np.float32), frame_length, int(lengths.sum()), sr)
+
+    # ---------------------------------------------------------------------------------------- #
+
+    @staticmethod
+    def cache_path(path, cache_dir: Optional[str] = None):
+        if cache_dir is None:
+            return f'{path}.activity.npz'
+        name = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+        return os.path.join(cache_dir, f'{name}.activity.npz')
+
+    @staticmethod
+    def _signature(path, frame_seconds):
+        st = os.stat(path)
+        return np.array([ActivityIndex.VERSION, st.st_size, st.st_mtime_ns, frame_seconds], dtype=np.float64)
+
+    def save(self, cache_path, signature):
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        tmp = f'{cache_path}.{os.getpid()}.tmp.npz'
+        np.savez(tmp, peak=self.peak, rms=self.rms, signature=signature,
+                 meta=np.array([self.frame_length, self.num_samples, self.sampling_rate], dtype=np.int64))
+        os.replace(tmp, cache_path)
+
+    @classmethod
+    def load(cls, path, frame_seconds: float = 0.0625, cache_dir: Optional[str] = None):
+        r"""cache가 있고 파일이 그대로면 읽고, 아니면 계산 후 저장 (저장 실패는 warning만)."""
+        cache_path = cls.cache_path(path, cache_dir)
+        signature = cls._signature(path, frame_seconds)
+        if os.path.exists(cache_path):
+            with np.load(cache_path) as data:
+                if np.array_equal(data['signature'], signature):
+                    frame_length, num_samples, sr = (int(v) for v in data['meta'])
+                    return cls(data['peak'], data['rms'], frame_length, num_samples, sr)
+        index = cls.from_file(path, frame_seconds)
+        try:
+            index.save(cache_path, signature)
+        except OSError as e:
+            print(f"Warning: activity index cache not written ({cache_path}): {e}")
+        return index
+
+    # ---------------------------------------------------------------------------------------- #
+
+    def _frames(self, start, end):  # sample 구간 [start, end) -> 겹치는 frame 구간
+        return start // self.frame_length, -(-end // self.frame_length)
+
+    def segment_peak(self, start: int = 0, end: Optional[int] = None) -> float:
+        f0, f1 = self._frames(start, self.num_samples if end is None else end)
+        return float(self.peak[f0:f1].max()) if f1 > f0 else 0.0
+
+    def segment_rms(self, start: int = 0, end: Optional[int] = None) -> float:  # 구간 안 frame RMS 최댓값
+        f0, f1 = self._frames(start, self.num_samples if end is None else end)
+        return float(self.rms[f0:f1].max()) if f1 > f0 else 0.0
+
+    def active_starts(self, length: int, threshold: float) -> List[Tuple[int, int]]:
+        r"""길이 length 구간 중 peak > threshold인 frame을 통째로 포함하는 구간의 시작 위치 범위 [(lo, hi), ...] (hi 제외, 정렬됨).
+        frame을 통째로 포함 -> 구간 안에 threshold를 넘는 sample이 반드시 있음 (length >= frame_length일 때).
+        """
+        h, last = self.frame_length, self.num_samples - length + 1
+        active = np.flatnonzero(self.peak > threshold)
+        if len(active) == 0 or last <= 0:
+            return []
+        lo = np.maximum(np.minimum((active + 1) * h, self.num_samples) - length, 0)
+        hi = np.minimum(active * h + 1, last)
+        gaps = np.flatnonzero(lo[1:] > hi[:-1])  # active가 정렬돼 있으므로 lo / hi도 단조 증가
+        lo, hi = np.concatenate([lo[:1], lo[gaps + 1]]), np.concatenate([hi[gaps], hi[-1:]])
+        return [(int(a), int(b)) for a, b in zip(lo, hi) if b > a]
+
+    def sample_active_start(self, length: int, threshold: float, u: float) -> Optional[int]:
+        r"""active_starts 안에서 균등하게 시작 위치 하나 (u: [0, 1) 난수). 없으면 None."""
+        ranges = self.active_starts(length, threshold)
+        if not ranges:
+            return None
+        sizes = np.array([hi - lo for lo, hi in ranges])
+        offset = min(int(u * sizes.sum()), int(sizes.sum()) - 1)
+        k = int(np.searchsorted(np.cumsum(sizes), offset, side='right'))
+        return ranges[k][0] + offset - int(sizes[:k].sum())
+
+    def sound_bounds(self, threshold: float, start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        r"""[start, end) 안에서 peak >= threshold인 첫 frame 시작 ~ 마지막 frame 끝 (start 기준 상대 위치). 전부 무음이면 None."""
+        end = self.num_samples if end is None else end
+        f0, f1 = self._frames(start, end)
+        active = np.flatnonzero(self.peak[f0:f1] >= threshold)
+        if len(active) == 0:
+            return None
+        first = max((f0 + active[0]) * self.frame_length, start)
+        last = min((f0 + active[-1] + 1) * self.frame_length, end)
+        return first - start, last - start
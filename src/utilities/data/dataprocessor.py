@@ -4,6 +4,8 @@ import torch
 import torchaudio
 from librosa.filters import mel as librosa_mel_fn
 
+from src.utilities.data.activity import ActivityIndex
+
 # import src_audioldm.utilities.audio as Audio
 """
 self.STFT = Audio.stft.TacotronSTFT(
@@ -27,6 +29,8 @@ class AudioDataProcessor():
         self.do_trim_wav = False
         self.waveform_only = False
         self.do_random_segment = False
+        self.use_activity_index = False  # random segment / trim에 파일별 activity index 사용 (src/utilities/data/activity.py)
+        self.activity_cache_dir = None  # None이면 오디오 파일 옆에 cache
 
         self.sampling_rate = 16000
         self.duration = 10.24
@@ -51,12 +55,17 @@ class AudioDataProcessor():
 
     # --------------------------------------------------------------------------------------------- #
 
-    def random_segment_wav(self, waveform, target_length):  # target sample 길이에 맞게 random 추출
+    def random_segment_wav(self, waveform, target_length, activity=None):  # target sample 길이에 맞게 random 추출
         waveform_length = waveform.shape[-1]
         assert waveform_length > 100, f"Waveform is too short, {waveform_length}"
         # Too short
         if waveform_length <= target_length:
             return waveform, 0
+        # activity index가 있으면 소리가 있는 segment 중에서 한 번에 선택
+        if activity is not None:
+            random_start = activity.sample_active_start(target_length, 1e-4, self.random_uniform(0, 1))
+            if random_start is not None:
+                return waveform[:, random_start:random_start + target_length], random_start
         # 10번 시도에도 적절한 세그먼트 못찾은 경우, 마지막 시도 반환
         for _ in range(10):
             random_start = int(self.random_uniform(0, waveform_length - target_length))
@@ -72,7 +81,9 @@ class AudioDataProcessor():
         normalized = centered / (np.max(np.abs(centered)) + EPSILON)  # in [-1,1] 
         return normalized * MAX_AMPLITUDE    # in [-0.5,0.5]
 
-    def trim_wav_(self, waveform, threshold=0.0001, chunk_size=1000):  # wav 시작&끝의 무음 구간을 제거하는(trim) 함수
+    def trim_wav_(self, waveform, threshold=0.0001, chunk_size=1000, bounds=None):  # wav 시작&끝의 무음 구간을 제거하는(trim) 함수
+        if bounds is not None:  # activity index로 미리 구한 (start, end)
+            return waveform[bounds[0]:bounds[1]]
         if np.max(np.abs(waveform)) < threshold:
             return waveform
         def find_sound_boundary(samples, reverse=False):
@@ -114,17 +125,28 @@ class AudioDataProcessor():
         waveform, original_sr = torchaudio.load(filename, normalize=True)  # ts[C,original_samples]
         waveform = waveform.mean(dim=0) if waveform.shape[0] > 1 else waveform  # mono 변환 / ts[B,N]
         target_samples = int(original_sr * self.duration)  # original samples 길이
+        activity = None
+        if self.use_activity_index and (self.do_random_segment or self.do_trim_wav):
+            activity = ActivityIndex.load(filename, cache_dir=self.activity_cache_dir)
         # 2. random segment 추출 (target samples를 충족하는 선에서)
         random_start = None
+        segment_start, segment_length = 0, waveform.shape[-1]
         if self.do_random_segment:
-            waveform, random_start = self.random_segment_wav(waveform, target_samples)
+            waveform, random_start = self.random_segment_wav(waveform, target_samples, activity=activity)
+            segment_start, segment_length = random_start, waveform.shape[-1]
         # 3. resampling (설정한 sr에 맞게 변환)
         waveform = torchaudio.functional.resample(waveform, original_sr, self.sampling_rate)  # ts[1,target_samples]
         # 4. 전처리 단계
         waveform = waveform.numpy()[0, ...]  # numpy 변환 & 1st channel 선택 / np[target_samples,]
+        gain = 0.5 / (np.max(np.abs(waveform - np.mean(waveform))) + 1e-8)  # normalize_wav의 배율
         waveform = self.normalize_wav(waveform)  # centering & Norm [-0.5,0.5]
         if self.do_trim_wav:
-            waveform = self.trim_wav_(waveform)  # 무음 구간 제거
+            bounds = None
+            if activity is not None:  # index는 normalize 전 원본 sr 기준 -> threshold / 위치 환산 (frame 단위 근사)
+                bounds = activity.sound_bounds(0.0001 / gain, segment_start, segment_start + segment_length)
+                ratio = self.sampling_rate / original_sr
+                bounds = (0, waveform.shape[0]) if bounds is None else (int(bounds[0] * ratio), int(round(bounds[1] * ratio)))
+            waveform = self.trim_wav_(waveform, bounds=bounds)  # 무음 구간 제거
         # 5. 최종 형태로 변환
         waveform = waveform[None, ...]  # channel dim 추가 / np[1,target_samples]
         target_length = int(self.sampling_rate * self.duration)  # 최종 target samples 길이
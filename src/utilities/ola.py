@@ -0,0 +1,101 @@
+import math
+from typing import List, Tuple
+
+import torch
+
+
+def chunk_spans(total: int, chunk: int, overlap: int) -> List[Tuple[int, int]]:
+    r"""길이 total을 길이 chunk, 겹침 overlap 이상인 구간 [(start, end), ...]으로 나눔.
+    모든 구간 길이가 같도록(batch 가능) 마지막 구간은 끝에 맞춤 -> 직전 구간과 더 많이 겹칠 수 있음.
+    """
+    if total <= chunk:
+        return [(0, total)]
+    assert 0 <= overlap < chunk, (overlap, chunk)
+    hop = chunk - overlap
+    num_chunks = math.ceil((total - overlap) / hop)
+    starts = [min(i * hop, total - chunk) for i in range(num_chunks)]
+    return [(s, s + chunk) for s in starts]
+
+
+def crossfade_weights(length, fade_in, fade_out, device=None, dtype=torch.float32):  # -> ts[length]
+    r"""양 끝에 linear fade가 있는 weight. fade 값은 0이 아님 (weight 합으로 나눌 때 안전)."""
+    weights = torch.ones(length, device=device, dtype=dtype)
+    if fade_in > 0:
+        weights[:fade_in] = torch.linspace(0, 1, fade_in + 2, device=device, dtype=dtype)[1:-1]
+    if fade_out > 0:
+        weights[length - fade_out:] = torch.linspace(1, 0, fade_out + 2, device=device, dtype=dtype)[1:-1]
+    return weights
+
+
+def overlap_add(chunks: torch.Tensor, spans: List[Tuple[int, int]], total: int, scale: int = 1):
+    r"""chunk_spans로 자른 구간들의 출력을 crossfade overlap-add로 이어붙임.
+    - chunks: ts[n, ..., L * scale] (n = len(spans), 마지막 축이 시간)
+    - scale: 입력 frame 1개당 출력 sample 수 (vocoder hop 등)
+    Returns:
+    - ts[..., total * scale]
+    """
+    assert chunks.shape[0] == len(spans), (chunks.shape, len(spans))
+    out_len = total * scale
+    out = chunks.new_zeros(chunks.shape[1:-1] + (out_len,))
+    norm = chunks.new_zeros(out_len)
+    for k, (start, end) in enumerate(spans):
+        s, e = start * scale, end * scale
+        # 이웃 구간과 겹치는 부분만 fade
+        fade_in = (spans[k - 1][1] - start) * scale if k > 0 else 0
+        fade_out = (end - spans[k + 1][0]) * scale if k + 1 < len(spans) else 0
+        w = crossfade_weights(e - s, max(fade_in, 0), max(fade_out, 0), device=chunks.device, dtype=chunks.dtype)
+        out[..., s:e] += chunks[k][..., :e - s] * w
+        norm[s:e] += w
+    return out / norm.clamp(min=1e-8)
+
+
+class StreamingOverlapAdd:
+    r"""overlap_add의 streaming 버전: chunk를 순서대로 넣으면 더 이상 바뀌지 않는 구간을 바로 내보냄.
+    결과는 overlap_add와 같고, 보관하는 것은 아직 다음 chunk와 겹치는 구간 (chunk 하나 길이 이하) 뿐.
+    - spans: chunk_spans 결과 (시간 단위), scale: overlap_add 참고
+    사용: for chunk in chunks: out = ola.push(chunk) (ts[..., L * scale]) -> 확정된 ts[..., n] (n은 0일 수 있음)
+    """
+
+    def __init__(self, spans: List[Tuple[int, int]], scale: int = 1):
+        self.spans = spans
+        self.scale = scale
+        self.index = 0  # 다음에 들어올 chunk 번호
+        self.emitted = 0  # 내보낸 출력 sample 수
+        self._out = None  # ts[..., pending] (출력 위치 emitted부터)
+        self._norm = None
+
+    def push(self, chunk: torch.Tensor) -> torch.Tensor:
+        k, spans, scale = self.index, self.spans, self.scale
+        assert k < len(spans), "all chunks already pushed"
+        start, end = spans[k]
+        s, e = start * scale, end * scale
+        fade_in = (spans[k - 1][1] - start) * scale if k > 0 else 0
+        fade_out = (end - spans[k + 1][0]) * scale if k + 1 < len(spans) else 0
+        w = crossfade_weights(e - s, max(fade_in, 0), max(fade_out, 0), device=chunk.device, dtype=chunk.dtype)
+
+        # pending buffer를 이번 chunk 끝까지 늘림
+        pending = e - self.emitted
+        out = chunk.new_zeros(chunk.shape[:-1] + (pending,))
+        norm = chunk.new_zeros(pending)
+        if self._out is not None:
+            out[..., :self._out.shape[-1]] = self._out
+            norm[:self._norm.shape[-1]] = self._norm
+        out[..., s - self.emitted:] += chunk[..., :e - s] * w
+        norm[s - self.emitted:] += w
+        self.index += 1
+
+        # 다음 chunk 시작 전까지는 확정
+        done = (spans[k + 1][0] * scale if k + 1 < len(spans) else e) - self.emitted
+        self._out, self._norm = out[..., done:], norm[done:]
+        self.emitted += done
+        return out[..., :done] / norm[:done].clamp(min=1e-8)
+
+
+def region_weights(length, start, end, device=None, dtype=torch.float32):  # -> ts[length]
+    r"""window [0, length) 안의 편집 구간 [start, end)는 1, 바깥 margin은 window 끝에서 0으로 linear.
+    편집 결과를 원본에 섞을 때 (lerp) seam 없이 이어지도록.
+    """
+    pos = torch.arange(length, device=device, dtype=dtype) + 0.5
+    ramp_in = pos / max(start, 1e-8) if start > 0 else torch.ones_like(pos)
+    ramp_out = (length - pos) / max(length - end, 1e-8) if end < length else torch.ones_like(pos)
+    return torch.minimum(ramp_in, ramp_out).clamp(0, 1)
@@ -0,0 +1,46 @@
+import os
+import sys
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import pytest
+import torch
+
+diffusers = pytest.importorskip("diffusers")
+from src.deepcache import deepcache_forward, StepCache
+
+
+@pytest.fixture(scope="module")
+def unet():  # AudioLDM UNet과 같은 구조 (class embedding concat, encoder_hidden_states=None)의 작은 random UNet
+    torch.manual_seed(0)
+    return diffusers.UNet2DConditionModel(
+        sample_size=None, in_channels=8, out_channels=8,
+        down_block_types=("DownBlock2D", "CrossAttnDownBlock2D", "CrossAttnDownBlock2D", "CrossAttnDownBlock2D"),
+        up_block_types=("CrossAttnUpBlock2D", "CrossAttnUpBlock2D", "CrossAttnUpBlock2D", "UpBlock2D"),
+        block_out_channels=(32, 64, 64, 64), layers_per_block=2, cross_attention_dim=64, attention_head_dim=8,
+        class_embed_type="simple_projection", projection_class_embeddings_input_dim=16, class_embeddings_concat=True,
+        norm_num_groups=16,
+    ).eval()
+
+
+@pytest.mark.parametrize("branch", [1, 2, 3])
+@pytest.mark.parametrize("shape", [(2, 8, 64, 16), (1, 8, 36, 12)])  # 8로 나눠지지 않는 길이 -> upsample_size 경로
+def test_full_step_matches_unet_forward(unet, branch, shape):
+    x, c, t = torch.randn(shape), torch.randn(shape[0], 16), torch.tensor(500)
+    with torch.no_grad():
+        expected = unet(x, t, encoder_hidden_states=None, class_labels=c).sample
+        out, feature = deepcache_forward(unet, x, t, c, branch=branch)
+        cached, _ = deepcache_forward(unet, x, t, c, branch=branch, deep_feature=feature)
+    torch.testing.assert_close(out, expected, atol=1e-5, rtol=1e-5)
+    torch.testing.assert_close(cached, expected, atol=1e-5, rtol=1e-5)  # 같은 입력이면 cached step도 같음
+
+
+def test_step_cache_interval(unet):
+    cache = StepCache(interval=3, branch=1)
+    x, c = torch.randn(2, 8, 32, 16), torch.randn(2, 16)
+    with torch.no_grad():
+        for i in range(5):
+            cache(unet, x, torch.tensor(500 - i), c)
+        cache(unet, torch.cat([x] * 2), torch.tensor(500), torch.cat([c] * 2))  # 다른 shape은 따로 full step
+    assert (cache.full_steps, cache.cached_steps) == (3, 3)
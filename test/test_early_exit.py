@@ -0,0 +1,62 @@
+import os
+import sys
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import pytest
+import torch
+
+diffusers = pytest.importorskip("diffusers")
+from src.samplers import SAMPLERS, select_items
+
+# AudioLDM scheduler 설정 (leading spacing, steps_offset=0, final alpha = alphas_cumprod[0])
+SCHEDULER_CONFIG = dict(num_train_timesteps=1000, beta_start=0.0015, beta_end=0.0195, beta_schedule="scaled_linear")
+
+
+@pytest.fixture(scope="module")
+def ddim_scheduler():
+    return diffusers.DDIMScheduler(**SCHEDULER_CONFIG, clip_sample=False, set_alpha_to_one=False, steps_offset=0)
+
+
+def gaussian_eps(alphas_cumprod):  # x0 ~ N(0.7, 0.3^2) 일 때의 정확한 eps (UNet 대신)
+    def eps(x, t):
+        a = alphas_cumprod[t].double()
+        return ((1 - a).sqrt() * (x.double() - a.sqrt() * 0.7) / (a * 0.09 + 1 - a)).float()
+    return eps
+
+
+@pytest.mark.parametrize("name", list(SAMPLERS))
+def test_select_items_keeps_batch_subset(ddim_scheduler, name):
+    r"""state를 item 일부만 골라 이어가도 그 item들만 따로 돌린 결과와 같아야 함 (early exit)."""
+    sampler = SAMPLERS[name].from_scheduler(ddim_scheduler)
+    tables = sampler.tables(50, 0.4, 'cpu')
+    eps = gaussian_eps(ddim_scheduler.alphas_cumprod)
+    x = torch.randn(4, 8, 4, 4, generator=torch.Generator().manual_seed(0))
+    keep = torch.tensor([0, 2])
+
+    full, state = x.clone(), None
+    sub, sub_state = x[keep].clone(), None
+    for i, t in enumerate(tables.timestep_list):
+        full, state = sampler.step(eps(full, t), i, full, tables, state)
+        if i == 3:  # 중간에 batch 축소
+            full, state = full[keep], select_items(state, keep)
+        sub, sub_state = sampler.step(eps(sub, t), i, sub, tables, sub_state)
+    torch.testing.assert_close(full, sub)
+    assert select_items(None, keep) is None
+
+
+def test_jump_to_final_is_last_ddim_step(ddim_scheduler):
+    sampler = SAMPLERS['ddim'].from_scheduler(ddim_scheduler)
+    tables = sampler.tables(50, 0.4, 'cpu')
+    x, eps = torch.randn(2, 8, 4, 4), torch.randn(2, 8, 4, 4)
+    last = len(tables) - 1
+    stepped, _ = sampler.step(eps, last, x, tables)  # 마지막 step = final alpha로 가는 DDIM step
+    torch.testing.assert_close(sampler.jump_to_final(eps, last, x, tables), stepped, atol=1e-5, rtol=1e-5)
+
+    # 중간에서 jump: eps를 고정하면 남은 DDIM step을 모두 밟은 것과 같음
+    i = 5
+    y = x.clone()
+    for k in range(i, len(tables)):
+        y, _ = sampler.step(eps, k, y, tables)
+    torch.testing.assert_close(sampler.jump_to_final(eps, i, x, tables), y, atol=1e-4, rtol=1e-4)
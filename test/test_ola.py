@@ -0,0 +1,46 @@
+import os
+import sys
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import pytest
+import torch
+
+from src.utilities.ola import chunk_spans, overlap_add, StreamingOverlapAdd
+
+
+@pytest.mark.parametrize("total,chunk,overlap", [(100, 100, 10), (250, 64, 16), (256, 64, 16), (300, 64, 0)])
+def test_chunk_spans_cover_total(total, chunk, overlap):
+    spans = chunk_spans(total, chunk, overlap)
+    assert spans[0][0] == 0 and spans[-1][1] == total
+    assert len({e - s for s, e in spans}) == 1  # 모든 구간 길이가 같음 (batch 가능)
+    assert all(prev_end - start >= overlap for (_, prev_end), (start, _) in zip(spans, spans[1:]))
+
+
+@pytest.mark.parametrize("scale", [1, 160])
+def test_overlap_add_reconstructs_shared_signal(scale):  # 겹치는 구간이 같은 신호면 crossfade 후에도 그대로
+    total, spans = 500, chunk_spans(500, 128, 32)
+    signal = torch.randn(2, total * scale)
+    chunks = torch.stack([signal[:, s * scale:e * scale] for s, e in spans])
+    torch.testing.assert_close(overlap_add(chunks, spans, total, scale=scale), signal)
+
+
+@pytest.mark.parametrize("total,chunk,overlap,scale", [
+    (100, 100, 10, 1),   # chunk 하나
+    (250, 64, 16, 1),    # 마지막 구간이 끝에 맞춰져 더 많이 겹침
+    (256, 64, 16, 1),
+    (300, 64, 0, 1),     # 겹침 없음
+    (1000, 256, 64, 160),  # vocoder hop 만큼 scale
+])
+def test_streaming_matches_overlap_add(total, chunk, overlap, scale):
+    spans = chunk_spans(total, chunk, overlap)
+    chunks = torch.randn(len(spans), 2, (spans[0][1] - spans[0][0]) * scale, generator=torch.Generator().manual_seed(0))
+    expected = overlap_add(chunks, spans, total, scale=scale)
+
+    ola = StreamingOverlapAdd(spans, scale=scale)
+    pieces = [ola.push(c) for c in chunks]
+    assert all(p.shape[:-1] == (2,) for p in pieces)
+    torch.testing.assert_close(torch.cat(pieces, dim=-1), expected)
+    with pytest.raises(AssertionError):
+        ola.push(chunks[0])
@@ -0,0 +1,50 @@
+import os
+import sys
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import pytest
+import torch
+
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+diffusers = pytest.importorskip("diffusers")
+transformers = pytest.importorskip("transformers")
+from src.onnx_backend import export_vocoder, export_vae_decoder, check_parity, OnnxRunner
+
+
+@pytest.fixture(scope="module")
+def vocoder():  # 작은 random HiFi-GAN (hop 160 = 5 * 4 * 2 * 2 * 2)
+    torch.manual_seed(0)
+    config = transformers.SpeechT5HifiGanConfig(
+        model_in_dim=64, upsample_initial_channel=32, upsample_rates=[5, 4, 2, 2, 2], upsample_kernel_sizes=[9, 8, 4, 4, 4],
+        resblock_kernel_sizes=[3], resblock_dilation_sizes=[[1, 3]], normalize_before=False,
+    )
+    return transformers.SpeechT5HifiGan(config).eval()
+
+
+@pytest.fixture(scope="module")
+def vae():  # 작은 random VAE (latent 8 channel, 시간 / 주파수 4배)
+    torch.manual_seed(0)
+    return diffusers.AutoencoderKL(
+        in_channels=1, out_channels=1, latent_channels=8, block_out_channels=(16, 32, 32), norm_num_groups=8,
+        down_block_types=("DownEncoderBlock2D",) * 3, up_block_types=("UpDecoderBlock2D",) * 3,
+    ).eval()
+
+
+def test_vocoder_parity(vocoder, tmp_path):
+    path = str(tmp_path / 'vocoder.onnx')
+    exported = export_vocoder(vocoder.double(), path)  # 원본 dtype은 그대로
+    assert next(vocoder.parameters()).dtype == torch.float64
+    mel = torch.randn(3, 300, 64)  # export shape (1, 1024)과 다른 batch / 길이
+    check_parity(exported, path, mel, rel_tol=1e-4)
+    assert OnnxRunner(path)(mel).shape == (3, 300 * 160)
+
+
+def test_vae_decoder_parity(vae, tmp_path):
+    path = str(tmp_path / 'vae_decoder.onnx')
+    exported = export_vae_decoder(vae, path)
+    latents = torch.randn(2, 8, 72, 16)  # export shape (1, 8, 256, 16)과 다른 batch / 길이
+    check_parity(exported, path, latents, rel_tol=1e-4)
+    assert OnnxRunner(path)(latents).shape == (2, 1, 72 * 4, 64)
@@ -0,0 +1,93 @@
+import os
+import sys
+
+proj_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(proj_dir)
+
+import numpy as np
+import pytest
+import torch
+
+diffusers = pytest.importorskip("diffusers")
+from src.samplers import SAMPLERS
+
+# AudioLDM scheduler 설정 (leading spacing, steps_offset=0, final alpha = alphas_cumprod[0])
+SCHEDULER_CONFIG = dict(num_train_timesteps=1000, beta_start=0.0015, beta_end=0.0195, beta_schedule="scaled_linear")
+SETTINGS = [(10, 0.6), (50, 0.4), (200, 0.2)]  # (ddim_steps, transfer_strength)
+
+
+@pytest.fixture(scope="module")
+def ddim_scheduler():
+    return diffusers.DDIMScheduler(**SCHEDULER_CONFIG, clip_sample=False, set_alpha_to_one=False, steps_offset=0)
+
+
+def gaussian_eps(alphas_cumprod):  # x0 ~ N(0.7, 0.3^2) 일 때의 정확한 eps (UNet 대신)
+    def eps(x, t):
+        a = alphas_cumprod[t].double()
+        return ((1 - a).sqrt() * (x.double() - a.sqrt() * 0.7) / (a * 0.09 + 1 - a)).float()
+    return eps
+
+
+def set_custom_timesteps(scheduler, timesteps, alphas_cumprod):
+    r"""multistep scheduler에 sampler와 같은 timestep + final alpha (= alphas_cumprod[0]) 끝점을 지정."""
+    sigma = ((1 - alphas_cumprod) / alphas_cumprod).sqrt().numpy()
+    sigmas = np.concatenate([sigma[timesteps], sigma[:1]]).astype(np.float32)
+    scheduler.timesteps = torch.tensor(timesteps).long()
+    scheduler.sigmas = torch.from_numpy(sigmas)
+    scheduler.num_inference_steps = len(timesteps)
+    scheduler.model_outputs = [None] * scheduler.config.solver_order
+    scheduler.lower_order_nums = 0
+    scheduler._step_index, scheduler._begin_index = None, None
+
+
+@pytest.mark.parametrize("steps,strength", SETTINGS)
+def test_ddim_matches_diffusers(ddim_scheduler, steps, strength):
+    sampler = SAMPLERS['ddim'].from_scheduler(ddim_scheduler)
+    tables = sampler.tables(steps, strength, 'cpu')
+    ddim_scheduler.set_timesteps(steps)
+    assert (ddim_scheduler.timesteps[-len(tables):] == tables.timesteps).all()
+
+    eps = gaussian_eps(ddim_scheduler.alphas_cumprod)
+    x = torch.randn(2, 8, 4, 4, generator=torch.Generator().manual_seed(0))
+    y = x.clone()
+    for i, t in enumerate(tables.timestep_list):
+        x = ddim_scheduler.step(eps(x, t), t, x, eta=0.0).prev_sample
+        y, _ = sampler.step(eps(y, t), i, y, tables)
+    torch.testing.assert_close(y, x, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize("steps,strength", SETTINGS)
+def test_ddim_add_noise_and_inversion(ddim_scheduler, steps, strength):
+    sampler = SAMPLERS['ddim'].from_scheduler(ddim_scheduler)
+    tables = sampler.tables(steps, strength, 'cpu')
+    x0, noise = torch.randn(2, 8, 4, 4), torch.randn(2, 8, 4, 4)
+    expected = ddim_scheduler.add_noise(x0, noise, tables.timesteps[:1])
+    torch.testing.assert_close(sampler.add_noise(x0, noise, tables), expected, atol=1e-6, rtol=1e-5)
+
+    eps = torch.randn_like(x0)
+    stepped, _ = sampler.step(eps, 0, x0, tables)
+    torch.testing.assert_close(sampler.invert_step(eps, 0, stepped, tables), x0, atol=1e-5, rtol=1e-5)
+
+
+@pytest.mark.parametrize("name,scheduler_cls,kwargs", [
+    ('dpmpp', 'DPMSolverMultistepScheduler', dict(algorithm_type='dpmsolver++', solver_order=2)),
+    ('unipc', 'UniPCMultistepScheduler', dict(solver_order=2, predict_x0=True, solver_type='bh2')),
+])
+@pytest.mark.parametrize("steps,strength", SETTINGS)
+def test_multistep_matches_diffusers(ddim_scheduler, name, scheduler_cls, kwargs, steps, strength):
+    sampler = SAMPLERS[name].from_scheduler(ddim_scheduler)
+    tables = sampler.tables(steps, strength, 'cpu')
+    ddim_tables = SAMPLERS['ddim'].from_scheduler(ddim_scheduler).tables(steps, strength, 'cpu')
+    assert len(tables) == len(ddim_tables)
+    assert tables.timestep_list[0] == ddim_tables.timestep_list[0]  # noising 위치는 DDIM과 같음
+    assert all(a > b for a, b in zip(tables.timestep_list, tables.timestep_list[1:]))
+
+    scheduler = getattr(diffusers, scheduler_cls)(**SCHEDULER_CONFIG, **kwargs, final_sigmas_type='sigma_min')
+    set_custom_timesteps(scheduler, list(tables.timestep_list), ddim_scheduler.alphas_cumprod.double())
+    eps = gaussian_eps(ddim_scheduler.alphas_cumprod)
+    x = torch.randn(2, 8, 4, 4, generator=torch.Generator().manual_seed(0))
+    y, state = x.clone(), None
+    for i, t in enumerate(tables.timestep_list):
+        x = scheduler.step(eps(x, t), torch.tensor(t), x).prev_sample
+        y, state = sampler.step(eps(y, t), i, y, tables, state)
+    torch.testing.assert_close(y, x, atol=1e-5, rtol=1e-5)